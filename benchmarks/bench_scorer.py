@@ -0,0 +1,112 @@
+"""Measures the overhead of ValidateScorer itself, without any network calls.
+
+Every item is scored with a FakeLLMService that answers instantly, so the numbers
+are the cost of scheduling, prompt building, parsing and bookkeeping. For each run
+size this reports
+  - items/sec through score_responses,
+  - scheduler overhead: the time per item on top of awaiting the same metric calls
+    one after the other, without the semaphore, gather and progress bar,
+  - memory per item: peak traced allocations during scoring divided by items,
+  - cache hit rate of the service's LLMCache, with a share of repeated items.
+
+Usage: python benchmarks/bench_scorer.py [num_items ...] [--duplicates FRACTION]
+e.g. python benchmarks/bench_scorer.py 1000 10000 100000 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import tracemalloc
+from typing import List
+
+os.environ["TONIC_VALIDATE_DO_NOT_TRACK"] = "true"
+
+from tonic_validate import ValidateScorer  # noqa: E402
+from tonic_validate.classes import Benchmark, LLMResponse  # noqa: E402
+from tonic_validate.metrics import (  # noqa: E402
+    AnswerConsistencyMetric,
+    AnswerSimilarityMetric,
+    AugmentationPrecisionMetric,
+)
+from tonic_validate.services.fake_llm_service import FakeLLMService  # noqa: E402
+
+
+def make_responses(num_items: int, duplicates: float) -> List[LLMResponse]:
+    num_unique = max(1, round(num_items * (1 - duplicates)))
+    # Each repeated item comes right after its original, well within the window of
+    # the LLMCache, so that the cache hit rate shows what the cache can save
+    dogs = [i * num_unique // num_items for i in range(num_items)]
+    benchmark = Benchmark(
+        questions=[f"What is the name of dog {dog}?" for dog in dogs],
+        answers=["Fido"] * num_items,
+    )
+    return [
+        LLMResponse(
+            llm_answer=f"The dog is called Fido {dog}",
+            llm_context_list=[
+                "Ryan has a dog named Fido.",
+                f"Fido {dog} likes long walks.",
+            ],
+            benchmark_item=item,
+        )
+        for dog, item in zip(dogs, benchmark.items)
+    ]
+
+
+def make_scorer() -> ValidateScorer:
+    return ValidateScorer(
+        [
+            AnswerSimilarityMetric(),
+            AugmentationPrecisionMetric(),
+            AnswerConsistencyMetric(),
+        ],
+        llm_service=FakeLLMService(),
+        quiet=True,
+    )
+
+
+async def score_sequentially(scorer: ValidateScorer, responses: List[LLMResponse]):
+    for response in responses:
+        for metric in scorer.metrics:
+            await metric.score(response, scorer.llm_service)
+
+
+def main(sizes: List[int], duplicates: float) -> None:
+    print(f"{duplicates:.0%} repeated items, 3 LLM metrics per item")
+    print(
+        f"{'items':>9}{'items/sec':>12}{'overhead us':>13}"
+        f"{'KiB/item':>10}{'cache hits':>12}"
+    )
+    for num_items in sizes:
+        responses = make_responses(num_items, duplicates)
+
+        scorer = make_scorer()
+        start = time.perf_counter()
+        scorer.score_responses(responses)
+        scored = time.perf_counter() - start
+        hit_rate = scorer.llm_service.cache_hit_rate
+
+        sequential_scorer = make_scorer()
+        start = time.perf_counter()
+        asyncio.run(score_sequentially(sequential_scorer, responses))
+        sequential = time.perf_counter() - start
+
+        tracemalloc.start()
+        make_scorer().score_responses(responses)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(
+            f"{num_items:>9}{num_items / scored:>12.0f}"
+            f"{(scored - sequential) / num_items * 1e6:>13.1f}"
+            f"{peak / num_items / 1024:>10.2f}{hit_rate:>12.1%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sizes", nargs="*", type=int, default=[1_000, 10_000, 100_000])
+    parser.add_argument("--duplicates", type=float, default=0.1)
+    args = parser.parse_args()
+    main(args.sizes, args.duplicates)
@@ -0,0 +1,162 @@
+"""Measures the per-item cost of pydantic validation on the scoring hot path.
+
+Compares the old call chain with the current one. In the old chain, score_run,
+score_responses and a_score_responses each re-validated the full list of
+responses, and every LLMResponse, RunData and Run was constructed with validation.
+The current chain validates the responses once at the public boundary and
+constructs the internal objects with construct_without_validation. No LLM calls
+are made.
+
+Each time is the fastest of several repeats, since the differences are small next
+to the noise of a single pass.
+
+Usage: python benchmarks/bench_validation.py [num_items] [repeats]
+"""
+
+import os
+import sys
+import time
+from typing import Callable, List
+
+os.environ["TONIC_VALIDATE_DO_NOT_TRACK"] = "true"
+
+from pydantic import ConfigDict, validate_call  # noqa: E402
+
+from tonic_validate.classes import Benchmark, LLMResponse, Run, RunData  # noqa: E402
+from tonic_validate.utils.dataclass_util import (  # noqa: E402
+    construct_without_validation,
+)
+
+CONFIG = ConfigDict(arbitrary_types_allowed=True)
+
+
+@validate_call(config=CONFIG)
+def validated_entry(responses: List[LLMResponse]) -> List[LLMResponse]:
+    return responses
+
+
+def old_entry(responses: List[LLMResponse]) -> None:
+    # score_run -> score_responses -> a_score_responses, each one validated
+    validated_entry(validated_entry(validated_entry(responses)))
+
+
+def new_entry(responses: List[LLMResponse]) -> None:
+    validated_entry(responses)
+
+
+def validated_responses(benchmark: Benchmark) -> None:
+    for item in benchmark.items:
+        LLMResponse(
+            llm_answer="Fido",
+            llm_context_list=["Ryan has a dog named Fido."] * 5,
+            benchmark_item=item,
+            run_time=0.1,
+        )
+
+
+def unvalidated_responses(benchmark: Benchmark) -> None:
+    for item in benchmark.items:
+        construct_without_validation(
+            LLMResponse,
+            llm_answer="Fido",
+            llm_context_list=["Ryan has a dog named Fido."] * 5,
+            benchmark_item=item,
+            run_time=0.1,
+        )
+
+
+def validated_run(responses: List[LLMResponse]) -> None:
+    run_data = [
+        RunData(
+            scores={"answer_similarity": 5.0},
+            reference_question=response.benchmark_item.question,
+            reference_answer=response.benchmark_item.answer,
+            llm_answer=response.llm_answer,
+            llm_context=response.llm_context_list,
+        )
+        for response in responses
+    ]
+    Run(overall_scores={"answer_similarity": 5.0}, run_data=run_data)
+
+
+def unvalidated_run(responses: List[LLMResponse]) -> None:
+    run_data = [
+        construct_without_validation(
+            RunData,
+            scores={"answer_similarity": 5.0},
+            reference_question=response.benchmark_item.question,
+            reference_answer=response.benchmark_item.answer,
+            llm_answer=response.llm_answer,
+            llm_context=response.llm_context_list,
+        )
+        for response in responses
+    ]
+    construct_without_validation(
+        Run, overall_scores={"answer_similarity": 5.0}, run_data=run_data
+    )
+
+
+def per_item_microseconds(
+    fn: Callable[[], None], num_items: int, repeats: int
+) -> float:
+    """The fastest of several runs, which is the least disturbed by the rest of the
+    machine."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) / num_items * 1e6
+
+
+def main(num_items: int, repeats: int) -> None:
+    benchmark = Benchmark(
+        questions=["What is the name of Ryan's dog?"] * num_items,
+        answers=["Fido"] * num_items,
+    )
+    responses = [
+        LLMResponse(
+            llm_answer="Fido",
+            llm_context_list=["Ryan has a dog named Fido."] * 5,
+            benchmark_item=item,
+        )
+        for item in benchmark.items
+    ]
+
+    cases = [
+        (
+            "entry validation",
+            lambda: old_entry(responses),
+            lambda: new_entry(responses),
+        ),
+        (
+            "LLMResponse construction",
+            lambda: validated_responses(benchmark),
+            lambda: unvalidated_responses(benchmark),
+        ),
+        (
+            "RunData/Run construction",
+            lambda: validated_run(responses),
+            lambda: unvalidated_run(responses),
+        ),
+    ]
+    print(f"{num_items} items, microseconds per item")
+    print(f"{'':<26}{'before':>10}{'after':>10}{'saved':>10}")
+    total_before = total_after = 0.0
+    for name, before_fn, after_fn in cases:
+        before = per_item_microseconds(before_fn, num_items, repeats)
+        after = per_item_microseconds(after_fn, num_items, repeats)
+        total_before += before
+        total_after += after
+        print(f"{name:<26}{before:>10.2f}{after:>10.2f}{before - after:>10.2f}")
+    print(
+        f"{'total':<26}{total_before:>10.2f}{total_after:>10.2f}"
+        f"{total_before - total_after:>10.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+    )
@@ -1,17 +1,37 @@
-from .validate_api import ValidateApi
-from .validate_scorer import ValidateScorer
-from .validate_monitorer import ValidateMonitorer
-
-from .classes import (
-    Benchmark,
-    BenchmarkItem,
-    LLMResponse,
-    CallbackLLMResponse,
-    Run,
-    RunData,
-    ContextLengthException,
-    UserInfo,
-)
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .validate_api import ValidateApi
+    from .validate_scorer import ValidateScorer
+    from .validate_monitorer import ValidateMonitorer
+
+    from .classes import (
+        Benchmark,
+        BenchmarkItem,
+        LLMResponse,
+        CallbackLLMResponse,
+        Run,
+        RunData,
+        ContextLengthException,
+        UserInfo,
+    )
+
+# Modules are imported on first access, so that e.g. using ValidateMonitorer does not
+# pay for importing the LLM provider SDKs that ValidateScorer needs
+_lazy_imports = {
+    "ValidateApi": ".validate_api",
+    "ValidateScorer": ".validate_scorer",
+    "ValidateMonitorer": ".validate_monitorer",
+    "Benchmark": ".classes",
+    "BenchmarkItem": ".classes",
+    "LLMResponse": ".classes",
+    "CallbackLLMResponse": ".classes",
+    "Run": ".classes",
+    "RunData": ".classes",
+    "ContextLengthException": ".classes",
+    "UserInfo": ".classes",
+}
 
 __all__ = [
     "ValidateApi",
@@ -26,3 +46,15 @@ __all__ = [
     "ContextLengthException",
     "UserInfo",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _lazy_imports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_lazy_imports[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
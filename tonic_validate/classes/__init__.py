@@ -1,8 +1,39 @@
-from .benchmark import Benchmark, BenchmarkItem
-from .llm_response import LLMResponse, CallbackLLMResponse
-from .run import Run, RunData
-from .exceptions import ContextLengthException
-from .user_info import UserInfo
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .benchmark import Benchmark, BenchmarkItem
+    from .llm_response import LLMResponse, CallbackLLMResponse
+    from .run import Run, RunData
+    from .run_stats import CallStats, LLMCallEvent, RunStats
+    from .context_store import ContextList, ContextStore
+    from .exceptions import (
+        CircuitOpenException,
+        ContextLengthException,
+        FatalLLMException,
+    )
+    from .metric_summary import MetricSummary
+    from .user_info import UserInfo
+
+# Modules are imported on first access to keep importing the package fast
+_lazy_imports = {
+    "Benchmark": ".benchmark",
+    "BenchmarkItem": ".benchmark",
+    "LLMResponse": ".llm_response",
+    "CallbackLLMResponse": ".llm_response",
+    "Run": ".run",
+    "RunData": ".run",
+    "RunStats": ".run_stats",
+    "CallStats": ".run_stats",
+    "LLMCallEvent": ".run_stats",
+    "ContextStore": ".context_store",
+    "ContextList": ".context_store",
+    "ContextLengthException": ".exceptions",
+    "FatalLLMException": ".exceptions",
+    "CircuitOpenException": ".exceptions",
+    "MetricSummary": ".metric_summary",
+    "UserInfo": ".user_info",
+}
 
 __all__ = [
     "Benchmark",
@@ -11,6 +42,26 @@ __all__ = [
     "CallbackLLMResponse",
     "Run",
     "RunData",
+    "RunStats",
+    "CallStats",
+    "LLMCallEvent",
+    "ContextStore",
+    "ContextList",
     "ContextLengthException",
+    "FatalLLMException",
+    "CircuitOpenException",
+    "MetricSummary",
     "UserInfo",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _lazy_imports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_lazy_imports[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
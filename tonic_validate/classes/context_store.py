@@ -0,0 +1,160 @@
+import hashlib
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Union, overload
+
+
+class ContextStore:
+    """
+    A content-addressed store for retrieved context chunks.
+
+    Each unique chunk is stored once under an id derived from its content, so a chunk
+    that is retrieved for many questions only takes up memory once and can be
+    referenced by its id.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: Dict[str, str] = {}
+
+    @staticmethod
+    def chunk_id(chunk: str) -> str:
+        """
+        Calculates the id of a chunk from its content
+
+        Parameters
+        ----------
+        chunk: str
+            The context chunk
+
+        Returns
+        -------
+        str
+            The id of the chunk
+        """
+        return hashlib.blake2b(chunk.encode("utf-8"), digest_size=16).hexdigest()
+
+    def add(self, chunk: str) -> str:
+        """
+        Adds a chunk to the store if it is not stored yet
+
+        Parameters
+        ----------
+        chunk: str
+            The context chunk
+
+        Returns
+        -------
+        str
+            The id of the chunk
+        """
+        chunk_id = self.chunk_id(chunk)
+        self._chunks.setdefault(chunk_id, chunk)
+        return chunk_id
+
+    def add_all(self, chunks: Iterable[str]) -> List[str]:
+        """
+        Adds a list of chunks to the store
+
+        Parameters
+        ----------
+        chunks: Iterable[str]
+            The context chunks
+
+        Returns
+        -------
+        List[str]
+            The ids of the chunks, in the same order
+        """
+        return [self.add(chunk) for chunk in chunks]
+
+    def resolve(self, chunk_ids: Iterable[str]) -> List[str]:
+        """
+        Looks up the chunks for a list of ids. The returned strings are the stored
+        objects, so they are shared by every item that references them.
+
+        Parameters
+        ----------
+        chunk_ids: Iterable[str]
+            The ids of the chunks
+
+        Returns
+        -------
+        List[str]
+            The context chunks
+        """
+        return [self._chunks[chunk_id] for chunk_id in chunk_ids]
+
+    def to_dict(self) -> Dict[str, str]:
+        """
+        Converts the store to a dictionary mapping each chunk id to its chunk
+
+        Returns
+        -------
+        Dict[str, str]
+            The stored chunks
+        """
+        return dict(self._chunks)
+
+    def __getitem__(self, chunk_id: str) -> str:
+        return self._chunks[chunk_id]
+
+    def __contains__(self, chunk_id: object) -> bool:
+        return chunk_id in self._chunks
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._chunks)
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+
+class ContextList(Sequence[str]):
+    """
+    The context chunks of an item, kept as the ids of the chunks in a context store
+    and looked up in the store when they are read.
+
+    It compares equal to a list of the same chunks. Copies and pickles of it are
+    plain lists, so that they do not carry the whole store.
+    """
+
+    __slots__ = ("chunk_ids", "_store")
+
+    def __init__(self, chunk_ids: List[str], store: ContextStore) -> None:
+        """
+        Parameters
+        ----------
+        chunk_ids: List[str]
+            The ids of the chunks, in order.
+        store: ContextStore
+            The store that holds the chunks.
+        """
+        self.chunk_ids = chunk_ids
+        self._store = store
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return self._store.resolve(self.chunk_ids[index])
+        return self._store[self.chunk_ids[index]]
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (ContextList, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> List[str]:
+        return list(self)
+
+    def __reduce__(self) -> Any:
+        return (list, (list(self),))
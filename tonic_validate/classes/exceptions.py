@@ -12,3 +12,21 @@ class ContextLengthException(LLMException):
     """
 
     pass
+
+
+class FatalLLMException(LLMException):
+    """
+    The exception to raise when the provider rejects a request in a way that retrying
+    can't fix, e.g. an invalid API key or an unknown model
+    """
+
+    pass
+
+
+class CircuitOpenException(LLMException):
+    """
+    The exception to raise when a request is not sent because too many of the recent
+    requests to the provider failed
+    """
+
+    pass
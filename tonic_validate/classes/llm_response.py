@@ -1,5 +1,5 @@
 from pydantic.dataclasses import dataclass
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from typing_extensions import TypedDict
 
 from tonic_validate.classes.benchmark import BenchmarkItem
@@ -18,12 +18,20 @@ class LLMResponse:
         That context that was used to generate the answer
     benchmark_item: BenchmarkItem
         The benchmark item that was used to ask the LLM the question
+    run_time: Optional[float]
+        How long the LLM took to answer, in seconds
+    tags: Optional[List[str]]
+        Tags used to group the response when summarizing the run
+    metadata: Optional[Dict[str, Any]]
+        Metadata used to group the response when summarizing the run
     """
 
     llm_answer: str
     llm_context_list: List[str]
     benchmark_item: BenchmarkItem
     run_time: Optional[float] = None
+    tags: Optional[List[str]] = None
+    metadata: Optional[Dict[str, Any]] = None
 
 
 class CallbackLLMResponse(TypedDict):
@@ -0,0 +1,40 @@
+from typing import Dict, Optional
+from pydantic.dataclasses import dataclass
+
+
+@dataclass
+class MetricSummary:
+    """
+    Summary statistics for the scores of a single metric across a run.
+
+    Parameters
+    ----------
+    count: int
+        The number of items that have a score for the metric
+    none_count: int
+        The number of items whose score for the metric is None
+    mean: Optional[float]
+        The mean score. None if no item has a score
+    std: Optional[float]
+        The sample standard deviation of the scores. None if no item has a score
+    min: Optional[float]
+        The lowest score
+    max: Optional[float]
+        The highest score
+    percentiles: Dict[float, float]
+        Maps each requested percentile (0-100) to its score
+    ci_low: Optional[float]
+        The lower bound of the confidence interval for the mean
+    ci_high: Optional[float]
+        The upper bound of the confidence interval for the mean
+    """
+
+    count: int
+    none_count: int
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    percentiles: Optional[Dict[float, float]] = None
+    ci_low: Optional[float] = None
+    ci_high: Optional[float] = None
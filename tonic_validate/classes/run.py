@@ -1,8 +1,20 @@
 import logging
-from typing import Any, List, Optional, Dict, Union
+from dataclasses import field
+from typing import Any, List, Optional, Dict, Sequence, Union
+from pydantic import ConfigDict
 from pydantic.dataclasses import dataclass
 from uuid import UUID
 
+from tonic_validate.classes.context_store import ContextList, ContextStore
+from tonic_validate.classes.run_stats import RunStats
+from tonic_validate.utils.score_aggregation import (
+    DEFAULT_BOOTSTRAP_SAMPLES,
+    DEFAULT_CONFIDENCE,
+    DEFAULT_PERCENTILES,
+    RunSummary,
+    summarize_run_data,
+)
+
 logger = logging.getLogger()
 
 
@@ -22,7 +34,12 @@ class RunData:
     llm_answer: str
         The answer from the language model
     llm_context: Optional[List[str]]
-        The context that was used to generate the answer
+        The context that was used to generate the answer. The scorer sets it to a
+        ContextList, which keeps the ids of the chunks in the run's context store
+    tags: Optional[List[str]]
+        Tags used to group the item when summarizing the run
+    metadata: Optional[Dict[str, Any]]
+        Metadata used to group the item when summarizing the run
     """
 
     scores: Dict[str, Union[float, None]]
@@ -30,24 +47,47 @@ class RunData:
     reference_answer: Optional[str]
     llm_answer: str
     llm_context: Optional[List[str]]
+    tags: Optional[List[str]] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+    @property
+    def llm_context_ids(self) -> Optional[List[str]]:
+        """The ids of the context chunks in the run's context store, if the context is
+        kept there."""
+        if isinstance(self.llm_context, ContextList):
+            return self.llm_context.chunk_ids
+        return None
 
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, context_store: Optional[ContextStore] = None) -> Dict[str, Any]:
         """
         Converts the RunData object to a dictionary.
 
+        Args:
+            context_store (Optional[ContextStore]): If set, the context chunks are
+                added to this store and the dictionary references them by id under
+                "llm_context_ids" instead of including them under "llm_context".
+
         Returns:
             Dict[str, Any]: A dictionary representation of the RunData object.
         """
-        return {
+        run_data_dict: Dict[str, Any] = {
             "scores": self.scores,
             "reference_question": self.reference_question,
             "reference_answer": self.reference_answer,
             "llm_answer": self.llm_answer,
-            "llm_context": self.llm_context,
         }
+        if context_store is None:
+            run_data_dict["llm_context"] = (
+                None if self.llm_context is None else list(self.llm_context)
+            )
+        elif self.llm_context is None:
+            run_data_dict["llm_context_ids"] = None
+        else:
+            run_data_dict["llm_context_ids"] = context_store.add_all(self.llm_context)
+        return run_data_dict
 
 
-@dataclass
+@dataclass(config=ConfigDict(arbitrary_types_allowed=True))
 class Run:
     """
     Represents a run. Includes the run data and the overall scores
@@ -62,12 +102,29 @@ class Run:
         The name of the language model evaluator
     id: Optional[UUID]
         The identifier of the run
+    context_store: Optional[ContextStore]
+        Stores each unique context chunk of the run once. The run data references
+        the chunks by id
+    stats: Optional[RunStats]
+        Latency, token, cost, retry and cache statistics of the LLM calls made while
+        scoring the run, in total, per metric and per item
+    truncated: bool
+        Whether the run stopped before scoring every item because it reached the
+        scorer's token, cost or time limit. Only the scored items are in run_data
+    truncation_reason: Optional[str]
+        Which limit the run reached, if it is truncated
     """
 
     overall_scores: Dict[str, float]
     run_data: List[RunData]
     llm_evaluator: Optional[str] = None
     id: Optional[UUID] = None
+    context_store: Optional[ContextStore] = field(
+        default=None, compare=False, repr=False
+    )
+    stats: Optional[RunStats] = field(default=None, compare=False, repr=False)
+    truncated: bool = False
+    truncation_reason: Optional[str] = None
 
     def to_df(self):
         """
@@ -95,3 +152,82 @@ class Run:
             ]
             scores.append(run_score)
         return pd.DataFrame(scores, columns=columns)
+
+    def save(self, path: str) -> None:
+        """
+        Save the run to a compact binary file. Requires pyarrow
+
+        Parameters
+        ----------
+        path: str
+            The path of the file to write
+        """
+        from tonic_validate.utils.run_serialization import save_run
+
+        save_run(self, path)
+
+    @staticmethod
+    def load(path: str, mmap: bool = True) -> "Run":
+        """
+        Load a run saved with Run.save. Requires pyarrow
+
+        The items of the run are only created when they are accessed, so loading is fast
+        even for very large runs.
+
+        Parameters
+        ----------
+        path: str
+            The path of the file to read
+        mmap: bool
+            If True, memory map the file instead of reading it into memory
+
+        Returns:
+            Run: The loaded run
+        """
+        from tonic_validate.utils.run_serialization import load_run
+
+        return load_run(path, mmap=mmap)
+
+    def summarize(
+        self,
+        percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+        bootstrap_samples: int = DEFAULT_BOOTSTRAP_SAMPLES,
+        confidence: float = DEFAULT_CONFIDENCE,
+        seed: Optional[int] = None,
+        by_tag: bool = False,
+        by_metadata: Optional[str] = None,
+    ) -> RunSummary:
+        """
+        Calculate summary statistics for each metric in the run
+
+        Parameters
+        ----------
+        percentiles: Sequence[float]
+            The percentiles (0-100) to calculate
+        bootstrap_samples: int
+            The number of bootstrap resamples for the confidence interval of the mean.
+            If 0, the default, the interval is calculated analytically: the Wilson
+            interval for scores that are all 0 or 1, the normal approximation otherwise
+        confidence: float
+            The confidence level of the interval, between 0 and 1
+        seed: Optional[int]
+            Seed for the bootstrap resampling. Each metric is resampled with its own
+            seed derived from this one
+        by_tag: bool
+            If True, summarize each tag separately
+        by_metadata: Optional[str]
+            If set, summarize each value of this metadata key separately
+
+        Returns:
+            Dict[str, MetricSummary]: The summary for each metric. When grouping by tag
+            or metadata, a dictionary mapping each group to the summary for each metric.
+        """
+        return summarize_run_data(
+            self.run_data,
+            percentiles=percentiles,
+            bootstrap_samples=bootstrap_samples,
+            confidence=confidence,
+            seed=seed,
+            by_tag=by_tag,
+            by_metadata=by_metadata,
+        )
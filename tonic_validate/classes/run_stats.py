@@ -0,0 +1,218 @@
+import threading
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+
+from pydantic.dataclasses import dataclass
+
+
+@dataclass
+class LLMCallEvent:
+    """
+    Describes a single call to an LLM service's get_response.
+
+    Parameters
+    ----------
+    model: str
+        The model that was called
+    metric: Optional[str]
+        The name of the metric that made the call, if it was made while scoring
+    item_index: Optional[int]
+        The index of the item that was being scored, if it was made while scoring
+    start_time: float
+        When the call started, in seconds since the epoch
+    latency: float
+        How long the call took in seconds, including retries and waits
+    prompt_tokens: int
+        The number of tokens sent to the provider, 0 for cache hits
+    completion_tokens: int
+        The number of tokens the provider returned, 0 for cache hits
+    requests: int
+        The number of requests sent to the provider, including failed ones
+    retries: int
+        The number of requests that were retried
+    rate_limits: int
+        The number of requests that were rate limited
+    cache_hit: bool
+        Whether the response came from the service's cache
+    cost: Optional[float]
+        The estimated cost of the call in US dollars, including discounts such as
+        the batch API's, None if the model's price is not known
+    error: Optional[str]
+        The error the call failed with, None if it succeeded
+    """
+
+    model: str
+    metric: Optional[str] = None
+    item_index: Optional[int] = None
+    start_time: float = 0.0
+    latency: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    requests: int = 0
+    retries: int = 0
+    rate_limits: int = 0
+    cache_hit: bool = False
+    cost: Optional[float] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class CallStats:
+    """
+    Aggregated statistics over a group of LLM calls.
+
+    Parameters
+    ----------
+    calls: int
+        The number of get_response calls
+    cache_hits: int
+        The number of calls answered from the cache
+    requests: int
+        The number of requests sent to the provider
+    retries: int
+        The number of requests that were retried
+    rate_limits: int
+        The number of requests that were rate limited
+    errors: int
+        The number of calls that failed
+    prompt_tokens: int
+        The total number of prompt tokens
+    completion_tokens: int
+        The total number of completion tokens
+    cost: float
+        The total estimated cost in US dollars, for calls whose price is known
+    latency: float
+        The total latency of the calls in seconds
+    max_latency: float
+        The latency of the slowest call in seconds
+    prefiltered: int
+        The number of calls that were not made because a prefilter made the judgment
+    """
+
+    calls: int = 0
+    cache_hits: int = 0
+    requests: int = 0
+    retries: int = 0
+    rate_limits: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+    latency: float = 0.0
+    max_latency: float = 0.0
+    prefiltered: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def mean_latency(self) -> Optional[float]:
+        if self.calls == 0:
+            return None
+        return self.latency / self.calls
+
+    def add(self, event: LLMCallEvent) -> None:
+        """Adds a call to the statistics."""
+        self.calls += 1
+        self.cache_hits += event.cache_hit
+        self.requests += event.requests
+        self.retries += event.retries
+        self.rate_limits += event.rate_limits
+        self.errors += event.error is not None
+        self.prompt_tokens += event.prompt_tokens
+        self.completion_tokens += event.completion_tokens
+        if event.cost is not None:
+            self.cost += event.cost
+        self.latency += event.latency
+        self.max_latency = max(self.max_latency, event.latency)
+
+
+class RunStats:
+    """
+    Collects the LLM calls made while scoring a run, in total, per metric and per
+    item, to find which metric or item dominates cost and latency.
+    """
+
+    def __init__(self) -> None:
+        self.total = CallStats()
+        self.by_metric: Dict[str, CallStats] = {}
+        self.by_item: Dict[int, CallStats] = {}
+        # Calls avoided by each prefilter
+        self.by_prefilter: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, event: LLMCallEvent) -> None:
+        """
+        Adds a call to the statistics
+
+        Parameters
+        ----------
+        event: LLMCallEvent
+            The call
+        """
+        with self._lock:
+            for stats in self.__group_stats(event.metric, event.item_index):
+                stats.add(event)
+
+    def __group_stats(
+        self, metric: Optional[str], item_index: Optional[int]
+    ) -> List[CallStats]:
+        """Gets the statistics a call counts towards, creating them if needed."""
+        groups = [self.total]
+        if metric is not None:
+            metric_stats = self.by_metric.get(metric)
+            if metric_stats is None:
+                metric_stats = self.by_metric[metric] = CallStats()
+            groups.append(metric_stats)
+        if item_index is not None:
+            item_stats = self.by_item.get(item_index)
+            if item_stats is None:
+                item_stats = self.by_item[item_index] = CallStats()
+            groups.append(item_stats)
+        return groups
+
+    def record_prefiltered(
+        self, prefilter: str, metric: Optional[str], item_index: Optional[int]
+    ) -> None:
+        """
+        Counts a call that a prefilter made unnecessary
+
+        Parameters
+        ----------
+        prefilter: str
+            The name of the prefilter
+        metric: Optional[str]
+            The metric that would have made the call
+        item_index: Optional[int]
+            The item that would have been judged
+        """
+        with self._lock:
+            self.by_prefilter[prefilter] = self.by_prefilter.get(prefilter, 0) + 1
+            for stats in self.__group_stats(metric, item_index):
+                stats.prefiltered += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Converts the statistics to a dictionary
+
+        Returns
+        -------
+        Dict[str, Any]
+            The total, per metric and per item statistics
+        """
+        with self._lock:
+            return {
+                "total": asdict(self.total),
+                "by_prefilter": dict(self.by_prefilter),
+                "by_metric": {
+                    metric: asdict(stats) for metric, stats in self.by_metric.items()
+                },
+                "by_item": {
+                    item_index: asdict(stats)
+                    for item_index, stats in self.by_item.items()
+                },
+            }
+
+    def __repr__(self) -> str:
+        return f"RunStats(total={self.total}, by_metric={self.by_metric})"
@@ -1,21 +1,47 @@
-from .answer_consistency_binary_metric import AnswerConsistencyBinaryMetric
-from .answer_consistency_metric import AnswerConsistencyMetric
-from .answer_similarity_metric import AnswerSimilarityMetric
-from .augmentation_accuracy_metric import AugmentationAccuracyMetric
-from .augmentation_precision_metric import AugmentationPrecisionMetric
-from .retrieval_precision_metric import RetrievalPrecisionMetric
-from .answer_match_metric import AnswerMatchMetric
-from .binary_metric import BinaryMetric
-from .contains_text_metric import ContainsTextMetric
-from .context_length_metric import ContextLengthMetric
-from .duplication_metric import DuplicationMetric
-from .regex_metric import RegexMetric
-from .response_length_metric import ResponseLengthMetric
-from .hate_speech_content_metric import HateSpeechContentMetric
-from .latency_metric import LatencyMetric
-from .context_contains_pii_metric import ContextContainsPiiMetric
-from .answer_contains_pii_metric import AnswerContainsPiiMetric
-from .metric import Metric
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .answer_consistency_binary_metric import AnswerConsistencyBinaryMetric
+    from .answer_consistency_metric import AnswerConsistencyMetric
+    from .answer_similarity_metric import AnswerSimilarityMetric
+    from .augmentation_accuracy_metric import AugmentationAccuracyMetric
+    from .augmentation_precision_metric import AugmentationPrecisionMetric
+    from .retrieval_precision_metric import RetrievalPrecisionMetric
+    from .answer_match_metric import AnswerMatchMetric
+    from .binary_metric import BinaryMetric
+    from .contains_text_metric import ContainsTextMetric
+    from .context_length_metric import ContextLengthMetric
+    from .duplication_metric import DuplicationMetric
+    from .regex_metric import RegexMetric
+    from .response_length_metric import ResponseLengthMetric
+    from .hate_speech_content_metric import HateSpeechContentMetric
+    from .latency_metric import LatencyMetric
+    from .context_contains_pii_metric import ContextContainsPiiMetric
+    from .answer_contains_pii_metric import AnswerContainsPiiMetric
+    from .metric import Metric
+
+# Metric modules are imported on first access to keep importing the package fast
+_lazy_imports = {
+    "AnswerConsistencyBinaryMetric": ".answer_consistency_binary_metric",
+    "AnswerConsistencyMetric": ".answer_consistency_metric",
+    "AnswerSimilarityMetric": ".answer_similarity_metric",
+    "AugmentationAccuracyMetric": ".augmentation_accuracy_metric",
+    "AugmentationPrecisionMetric": ".augmentation_precision_metric",
+    "RetrievalPrecisionMetric": ".retrieval_precision_metric",
+    "AnswerMatchMetric": ".answer_match_metric",
+    "BinaryMetric": ".binary_metric",
+    "ContainsTextMetric": ".contains_text_metric",
+    "ContextLengthMetric": ".context_length_metric",
+    "DuplicationMetric": ".duplication_metric",
+    "RegexMetric": ".regex_metric",
+    "ResponseLengthMetric": ".response_length_metric",
+    "HateSpeechContentMetric": ".hate_speech_content_metric",
+    "LatencyMetric": ".latency_metric",
+    "ContextContainsPiiMetric": ".context_contains_pii_metric",
+    "AnswerContainsPiiMetric": ".answer_contains_pii_metric",
+    "Metric": ".metric",
+}
 
 __all__ = [
     "AnswerConsistencyBinaryMetric",
@@ -37,3 +63,15 @@ __all__ = [
     "AnswerContainsPiiMetric",
     "Metric",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _lazy_imports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_lazy_imports[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
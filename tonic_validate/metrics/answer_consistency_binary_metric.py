@@ -1,16 +1,18 @@
 import logging
-from typing import Any, Dict, Union
+from typing import TYPE_CHECKING, Any, Dict, Union
 from tonic_validate.classes.llm_response import LLMResponse
 from tonic_validate.metrics.binary_metric import BinaryMetric
 from tonic_validate.metrics.metric import Metric, MetricRequirement
 from tonic_validate.utils.metrics_util import parse_boolean_response
-from tonic_validate.services.openai_service import OpenAIService
-from tonic_validate.services.litellm_service import LiteLLMService
 from tonic_validate.utils.llm_calls import (
     answer_consistent_with_context_call,
     context_consistency_prompt,
 )
 
+if TYPE_CHECKING:
+    from tonic_validate.services.openai_service import OpenAIService
+    from tonic_validate.services.litellm_service import LiteLLMService
+
 logger = logging.getLogger()
 
 
@@ -36,7 +38,7 @@ class AnswerConsistencyBinaryMetric(BinaryMetric):
     async def metric_callback(
         self,
         llm_response: LLMResponse,
-        llm_service: Union[LiteLLMService, OpenAIService],
+        llm_service: "Union[LiteLLMService, OpenAIService]",
     ) -> bool:
         """Check if answer is consistent with context.
 
@@ -1,13 +1,12 @@
 import logging
-from typing import Any, Dict, Union
+from typing import TYPE_CHECKING, Any, Dict, Union
 from tonic_validate.classes.llm_response import LLMResponse
 from tonic_validate.metrics.metric import Metric, MetricRequirement
 from tonic_validate.utils.metrics_util import (
+    gather_calls,
     parse_boolean_response,
     parse_bullet_list_response,
 )
-from tonic_validate.services.openai_service import OpenAIService
-from tonic_validate.services.litellm_service import LiteLLMService
 from tonic_validate.utils.llm_calls import (
     main_points_call,
     statement_derived_from_context_call,
@@ -15,6 +14,10 @@ from tonic_validate.utils.llm_calls import (
     main_points_prompt,
 )
 
+if TYPE_CHECKING:
+    from tonic_validate.services.openai_service import OpenAIService
+    from tonic_validate.services.litellm_service import LiteLLMService
+
 logger = logging.getLogger()
 
 
@@ -46,20 +49,26 @@ class AnswerConsistencyMetric(Metric):
     async def score(
         self,
         llm_response: LLMResponse,
-        llm_service: Union[LiteLLMService, OpenAIService],
+        llm_service: "Union[LiteLLMService, OpenAIService]",
     ) -> float:
         main_points_response = await main_points_call(
             llm_response.llm_answer, llm_service
         )
         main_point_list = parse_bullet_list_response(main_points_response)
-        main_point_derived_from_context_list = []
-        for main_point in main_point_list:
-            statement_derived_from_context_response = (
-                await statement_derived_from_context_call(
+        # The main points are checked independently
+        statement_derived_from_context_responses = await gather_calls(
+            [
+                statement_derived_from_context_call(
                     main_point, llm_response.llm_context_list, llm_service
                 )
+                for main_point in main_point_list
+            ],
+            llm_service,
+        )
+        main_point_derived_from_context_list = [
+            parse_boolean_response(statement_derived_from_context_response)
+            for statement_derived_from_context_response in (
+                statement_derived_from_context_responses
             )
-            main_point_derived_from_context_list.append(
-                parse_boolean_response(statement_derived_from_context_response)
-            )
+        ]
         return sum(main_point_derived_from_context_list) / len(main_point_list)
@@ -1,11 +1,13 @@
 import logging
 
-from typing import Any, Dict, Union
+from typing import TYPE_CHECKING, Any, Dict, Union
 from tonic_validate.classes.llm_response import LLMResponse
 from tonic_validate.metrics.binary_metric import BinaryMetric
 from tonic_validate.metrics.metric import Metric, MetricRequirement
-from tonic_validate.services.openai_service import OpenAIService
-from tonic_validate.services.litellm_service import LiteLLMService
+
+if TYPE_CHECKING:
+    from tonic_validate.services.openai_service import OpenAIService
+    from tonic_validate.services.litellm_service import LiteLLMService
 
 logger = logging.getLogger()
 
@@ -49,7 +51,7 @@ class AnswerMatchMetric(BinaryMetric):
     def metric_callback(
         self,
         llm_response: LLMResponse,
-        llm_service: Union[LiteLLMService, OpenAIService],
+        llm_service: "Union[LiteLLMService, OpenAIService]",
     ) -> bool:
         if self.case_sensitive:
             return self.answer == llm_response.llm_answer
@@ -1,14 +1,24 @@
 import logging
-from typing import Any, Dict, Union
+import random
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
 from tonic_validate.classes.llm_response import LLMResponse
 from tonic_validate.metrics.metric import Metric, MetricRequirement
-from tonic_validate.services.openai_service import OpenAIService
-from tonic_validate.services.litellm_service import LiteLLMService
+from tonic_validate.utils.embeddings import (
+    Embedder,
+    SimilarityCalibration,
+    cosine_similarities,
+    create_embedder,
+    text_hash,
+)
 from tonic_validate.utils.llm_calls import (
     similarity_score_call,
     similarity_score_prompt,
 )
 
+if TYPE_CHECKING:
+    from tonic_validate.services.openai_service import OpenAIService
+    from tonic_validate.services.litellm_service import LiteLLMService
+
 logger = logging.getLogger()
 
 
@@ -21,29 +31,158 @@ class AnswerSimilarityMetric(Metric):
         MetricRequirement.LLM_ANSWER,
     }
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        calibration: Optional[SimilarityCalibration] = None,
+    ) -> None:
         """
         Metric that checks how well the reference answer matches the LLM answer.
         Returns a float between 0 and 5, where 5 is the most similar and 0 is the least similar.
+
+        Parameters
+        ----------
+        embedder: Optional[Embedder]
+            If set, the score is computed from the cosine similarity of the
+            embeddings of the two answers instead of asking the LLM. The answers of a
+            run are embedded in batches before it is scored, so a run costs a few
+            embedding requests rather than an LLM call per item.
+        calibration: Optional[SimilarityCalibration]
+            Maps the similarity of the embeddings to the LLM's scale. See calibrate.
         """
-        pass
+        self.embedder = embedder
+        self.calibration = calibration or SimilarityCalibration()
+        # The similarities of the answer pairs of the run being scored, keyed by the
+        # hashes of the answers. prepare replaces them for every run.
+        self.__similarities: Dict[Tuple[str, str], float] = {}
 
     def serialize_config(self):
-        return {}
+        if self.embedder is None:
+            return {}
+        return {
+            "embedder": self.embedder.kind,
+            "embedding_model": self.embedder.model,
+            "calibration": {
+                "slope": self.calibration.slope,
+                "intercept": self.calibration.intercept,
+            },
+        }
 
     @staticmethod
     def from_config(config: Dict[str, Any]) -> Metric:
-        return AnswerSimilarityMetric()
+        if "embedder" not in config:
+            return AnswerSimilarityMetric()
+        return AnswerSimilarityMetric(
+            create_embedder(config["embedder"], config["embedding_model"]),
+            SimilarityCalibration(**config["calibration"]),
+        )
+
+    async def prepare(
+        self,
+        responses: List[LLMResponse],
+        llm_service: "Union[LiteLLMService, OpenAIService]",
+    ) -> None:
+        if self.embedder is None:
+            return
+        pairs = [
+            (response.benchmark_item.answer, response.llm_answer)
+            for response in responses
+            if response.benchmark_item.answer is not None
+        ]
+        similarities = await self.__embedding_similarities(pairs)
+        self.__similarities = {
+            self.__pair_key(*pair): similarity
+            for pair, similarity in zip(pairs, similarities)
+        }
+
+    @staticmethod
+    def __pair_key(reference: str, answer: str) -> Tuple[str, str]:
+        return (text_hash(reference), text_hash(answer))
+
+    async def __embedding_similarities(self, pairs: List[Any]) -> List[float]:
+        """The cosine similarities of the embeddings of pairs of reference and LLM
+        answers, computed for all pairs at once."""
+        assert self.embedder is not None
+        embeddings = await self.embedder.embed(
+            [reference for reference, _ in pairs] + [answer for _, answer in pairs]
+        )
+        return cosine_similarities(embeddings[: len(pairs)], embeddings[len(pairs) :])
+
+    async def calibrate(
+        self,
+        responses: List[LLMResponse],
+        llm_service: "Union[LiteLLMService, OpenAIService]",
+        sample_size: int = 50,
+        rng: Optional[random.Random] = None,
+    ) -> SimilarityCalibration:
+        """
+        Fits the calibration of the embedding similarities to the LLM's scores of a
+        random sample of the responses, so that the scores of the metric can be
+        compared to the scores of runs that asked the LLM
+
+        Parameters
+        ----------
+        responses: List[LLMResponse]
+            The responses to draw the sample from. Responses without a reference
+            answer are left out.
+        llm_service: Union[LiteLLMService, OpenAIService]
+            The service of the LLM to calibrate against.
+        sample_size: int
+            The number of responses the LLM scores.
+        rng: Optional[random.Random]
+            The random number generator to draw the sample with.
+
+        Returns
+        -------
+        SimilarityCalibration
+            The fitted calibration, which the metric uses from now on.
+        """
+        if self.embedder is None:
+            raise ValueError("Only a metric with an embedder can be calibrated")
+        candidates = [
+            response
+            for response in responses
+            if response.benchmark_item.answer is not None
+        ]
+        rng = rng if rng is not None else random.Random()
+        sample = rng.sample(candidates, min(sample_size, len(candidates)))
+        llm_scores = []
+        pairs = []
+        for response in sample:
+            try:
+                llm_scores.append(await self.__llm_score(response, llm_service))
+            except Exception as e:
+                logger.warning(f"Leaving an item out of the calibration: {e}")
+                continue
+            pairs.append((response.benchmark_item.answer, response.llm_answer))
+        similarities = await self.__embedding_similarities(pairs)
+        self.calibration = SimilarityCalibration.fit(similarities, llm_scores)
+        return self.calibration
 
     async def score(
         self,
         llm_response: LLMResponse,
-        llm_service: Union[LiteLLMService, OpenAIService],
+        llm_service: "Union[LiteLLMService, OpenAIService]",
     ) -> float:
         # Check that the benchmark item has an answer
         if llm_response.benchmark_item.answer is None:
             raise ValueError("The benchmark item does not have an answer")
 
+        if self.embedder is not None:
+            pair = (llm_response.benchmark_item.answer, llm_response.llm_answer)
+            similarity = self.__similarities.get(self.__pair_key(*pair))
+            if similarity is None:
+                # The item was not prepared, e.g. it is scored on its own
+                similarity = (await self.__embedding_similarities([pair]))[0]
+            return self.calibration.score(similarity)
+        return await self.__llm_score(llm_response, llm_service)
+
+    async def __llm_score(
+        self,
+        llm_response: LLMResponse,
+        llm_service: "Union[LiteLLMService, OpenAIService]",
+    ) -> float:
+        assert llm_response.benchmark_item.answer is not None
         similarity_score_response = await similarity_score_call(
             llm_response.benchmark_item.question,
             llm_response.benchmark_item.answer,
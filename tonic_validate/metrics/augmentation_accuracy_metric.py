@@ -1,15 +1,18 @@
 import logging
-from typing import Any, Dict, List, Tuple, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple, Union
+from tonic_validate.classes.context_store import ContextStore
 from tonic_validate.classes.llm_response import LLMResponse
 from tonic_validate.metrics.metric import Metric, MetricRequirement
-from tonic_validate.utils.metrics_util import parse_boolean_response
-from tonic_validate.services.openai_service import OpenAIService
-from tonic_validate.services.litellm_service import LiteLLMService
+from tonic_validate.utils.metrics_util import gather_calls, parse_boolean_response
 from tonic_validate.utils.llm_calls import (
     answer_contains_context_call,
     answer_contains_context_prompt,
 )
 
+if TYPE_CHECKING:
+    from tonic_validate.services.openai_service import OpenAIService
+    from tonic_validate.services.litellm_service import LiteLLMService
+
 logger = logging.getLogger()
 
 
@@ -35,27 +38,43 @@ class AugmentationAccuracyMetric(Metric):
     async def score(
         self,
         llm_response: LLMResponse,
-        llm_service: Union[LiteLLMService, OpenAIService],
+        llm_service: "Union[LiteLLMService, OpenAIService]",
     ) -> float:
         return (await self.calculate_metric(llm_response, llm_service))[0]
 
     async def calculate_metric(
         self,
         llm_response: LLMResponse,
-        llm_service: Union[LiteLLMService, OpenAIService],
+        llm_service: "Union[LiteLLMService, OpenAIService]",
     ) -> Tuple[float, List[bool]]:
-        contains_context_list: List[bool] = []
         if len(llm_response.llm_context_list) == 0:
             raise ValueError(
                 "No context provided, cannot calculate augmentation accuracy"
             )
-        for context in llm_response.llm_context_list:
-            contains_context_response = await answer_contains_context_call(
-                llm_response.llm_answer, context, llm_service
-            )
-            contains_context_list.append(
-                parse_boolean_response(contains_context_response)
+        # Judge each unique chunk once, even if it was retrieved more than once
+        chunk_ids = [
+            ContextStore.chunk_id(context) for context in llm_response.llm_context_list
+        ]
+        unique_contexts = dict(zip(chunk_ids, llm_response.llm_context_list))
+        # The chunks are judged independently
+        contains_context_responses = await gather_calls(
+            [
+                answer_contains_context_call(
+                    llm_response.llm_answer, context, llm_service
+                )
+                for context in unique_contexts.values()
+            ],
+            llm_service,
+        )
+        contains_context_by_chunk_id: Dict[str, bool] = {
+            chunk_id: parse_boolean_response(contains_context_response)
+            for chunk_id, contains_context_response in zip(
+                unique_contexts, contains_context_responses
             )
+        }
+        contains_context_list: List[bool] = [
+            contains_context_by_chunk_id[chunk_id] for chunk_id in chunk_ids
+        ]
 
         score = sum(contains_context_list) / len(contains_context_list)
         return (score, contains_context_list)
@@ -1,13 +1,16 @@
 import logging
-from typing import Any, Dict, List, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Union
 from tonic_validate.classes.llm_response import LLMResponse
 from tonic_validate.metrics.augmentation_accuracy_metric import (
     AugmentationAccuracyMetric,
 )
 from tonic_validate.metrics.metric import Metric
 from tonic_validate.metrics.retrieval_precision_metric import RetrievalPrecisionMetric
-from tonic_validate.services.openai_service import OpenAIService
-from tonic_validate.services.litellm_service import LiteLLMService
+from tonic_validate.utils.metrics_util import gather_calls
+
+if TYPE_CHECKING:
+    from tonic_validate.services.openai_service import OpenAIService
+    from tonic_validate.services.litellm_service import LiteLLMService
 
 logger = logging.getLogger()
 
@@ -36,15 +39,16 @@ class AugmentationPrecisionMetric(Metric):
     async def score(
         self,
         llm_response: LLMResponse,
-        llm_service: Union[LiteLLMService, OpenAIService],
+        llm_service: "Union[LiteLLMService, OpenAIService]",
     ) -> float:
-        retrieval_precision_score = await self.retrieval_precision.calculate_metric(
-            llm_response, llm_service
+        retrieval_precision_score, augmentation_accuracy_score = await gather_calls(
+            [
+                self.retrieval_precision.calculate_metric(llm_response, llm_service),
+                self.augmentation_accuracy.calculate_metric(llm_response, llm_service),
+            ],
+            llm_service,
         )
         context_relevant_list = retrieval_precision_score[1]
-        augmentation_accuracy_score = await self.augmentation_accuracy.calculate_metric(
-            llm_response, llm_service
-        )
         contains_context_list = augmentation_accuracy_score[1]
 
         return self.score_from_context_labels(
@@ -1,12 +1,14 @@
 import logging
-from typing import Any, Awaitable, Callable, Dict, Union
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Union
 
 from tonic_validate.classes.llm_response import LLMResponse
 from tonic_validate.metrics.metric import Metric
-from tonic_validate.services.openai_service import OpenAIService
-from tonic_validate.services.litellm_service import LiteLLMService
 import inspect
 
+if TYPE_CHECKING:
+    from tonic_validate.services.openai_service import OpenAIService
+    from tonic_validate.services.litellm_service import LiteLLMService
+
 logger = logging.getLogger()
 
 
@@ -19,7 +21,7 @@ class BinaryMetric(Metric):
         self,
         name: str,
         callback: Callable[
-            [LLMResponse, Union[LiteLLMService, OpenAIService]],
+            [LLMResponse, "Union[LiteLLMService, OpenAIService]"],
             Union[Awaitable[bool], bool],
         ],
     ):
@@ -47,7 +49,7 @@ class BinaryMetric(Metric):
     async def score(
         self,
         llm_response: LLMResponse,
-        llm_service: Union[LiteLLMService, OpenAIService],
+        llm_service: "Union[LiteLLMService, OpenAIService]",
     ) -> float:
         if inspect.iscoroutinefunction(self.callback):
             result = await self.callback(llm_response, llm_service)
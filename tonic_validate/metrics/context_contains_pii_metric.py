@@ -1,11 +1,13 @@
 import os
 import requests
-from typing import Any, Dict, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 from tonic_validate.classes.llm_response import LLMResponse
 from tonic_validate.metrics.binary_metric import BinaryMetric
 from tonic_validate.metrics.metric import Metric, MetricRequirement
-from tonic_validate.services.openai_service import OpenAIService
-from tonic_validate.services.litellm_service import LiteLLMService
+
+if TYPE_CHECKING:
+    from tonic_validate.services.openai_service import OpenAIService
+    from tonic_validate.services.litellm_service import LiteLLMService
 
 
 class ContextContainsPiiMetric(BinaryMetric):
@@ -56,7 +58,7 @@ class ContextContainsPiiMetric(BinaryMetric):
     def metric_callback(
         self,
         llm_response: LLMResponse,
-        llm_service: Union[LiteLLMService, OpenAIService],
+        llm_service: "Union[LiteLLMService, OpenAIService]",
     ) -> bool:
         try:
             response = self.textual.redact("\n".join(llm_response.llm_context_list))
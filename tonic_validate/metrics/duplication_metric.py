@@ -1,17 +1,21 @@
 import logging
 
-from typing import Any, Dict, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 from tonic_validate.classes.llm_response import LLMResponse
 from tonic_validate.metrics.binary_metric import BinaryMetric
 from tonic_validate.metrics.metric import Metric, MetricRequirement
-from tonic_validate.services.openai_service import OpenAIService
-from tonic_validate.services.litellm_service import LiteLLMService
+from tonic_validate.utils.duplication import DuplicationDetector
+from tonic_validate.utils.embeddings import create_embedder
 from tonic_validate.utils.llm_calls import (
     contains_duplicate_information,
     contains_duplicate_info_prompt,
 )
 from tonic_validate.utils.metrics_util import parse_boolean_response
 
+if TYPE_CHECKING:
+    from tonic_validate.services.openai_service import OpenAIService
+    from tonic_validate.services.litellm_service import LiteLLMService
+
 logger = logging.getLogger()
 
 
@@ -20,25 +24,66 @@ class DuplicationMetric(BinaryMetric):
     prompt: str = contains_duplicate_info_prompt()
     requirements = {MetricRequirement.LLM_ANSWER}
 
-    def __init__(self):
+    def __init__(self, detector: Optional[DuplicationDetector] = None):
         """
         Binary metric that checks whether the response contains duplicate information.
         Returns 1 (True) if the response contains duplicate information. Returns 0 (False) if it does not contain duplicate information.
+
+        Parameters
+        ----------
+        detector: Optional[DuplicationDetector]
+            If set, the sentences of the response are compared locally, or by their
+            embeddings, and the LLM is only asked about responses whose most
+            similar sentences are close to the detector's threshold.
         """
         super().__init__(self.name, self.metric_callback)
+        self.detector = detector
 
     def serialize_config(self):
-        return {}
+        if self.detector is None:
+            return {}
+        embedder = self.detector.embedder
+        return {
+            "embedder": None if embedder is None else embedder.kind,
+            "embedding_model": None if embedder is None else embedder.model,
+            "threshold": self.detector.threshold,
+            "margin": self.detector.margin,
+            "min_words": self.detector.min_words,
+        }
 
     @staticmethod
     def from_config(config: Dict[str, Any]) -> Metric:
-        return DuplicationMetric()
+        if not config:
+            return DuplicationMetric()
+        embedder = None
+        if config["embedder"] is not None:
+            embedder = create_embedder(config["embedder"], config["embedding_model"])
+        return DuplicationMetric(
+            DuplicationDetector(
+                embedder,
+                threshold=config["threshold"],
+                margin=config["margin"],
+                min_words=config["min_words"],
+            )
+        )
+
+    async def prepare(
+        self,
+        responses: List[LLMResponse],
+        llm_service: "Union[LiteLLMService, OpenAIService]",
+    ) -> None:
+        if self.detector is not None:
+            await self.detector.prepare([response.llm_answer for response in responses])
 
     async def metric_callback(
         self,
         llm_response: LLMResponse,
-        llm_service: Union[LiteLLMService, OpenAIService],
+        llm_service: "Union[LiteLLMService, OpenAIService]",
     ) -> bool:
+        if self.detector is not None:
+            is_duplicated = await self.detector.is_duplicated(llm_response.llm_answer)
+            if is_duplicated is not None:
+                return is_duplicated
         return parse_boolean_response(
             await contains_duplicate_information(llm_response.llm_answer, llm_service)
         )
@@ -1,10 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional, Set, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Union
 from enum import Enum
 
 from tonic_validate.classes.llm_response import LLMResponse
-from tonic_validate.services.openai_service import OpenAIService
-from tonic_validate.services.litellm_service import LiteLLMService
+
+if TYPE_CHECKING:
+    from tonic_validate.services.openai_service import OpenAIService
+    from tonic_validate.services.litellm_service import LiteLLMService
 
 
 class MetricRequirement(str, Enum):
@@ -45,7 +47,17 @@ class Metric(ABC):
     async def score(
         self,
         llm_response: LLMResponse,
-        llm_service: Union[LiteLLMService, OpenAIService],
+        llm_service: "Union[LiteLLMService, OpenAIService]",
     ) -> float:
         """Calculate the score of the metric"""
         pass
+
+    async def prepare(
+        self,
+        responses: List[LLMResponse],
+        llm_service: "Union[LiteLLMService, OpenAIService]",
+    ) -> None:
+        """Called by the scorer with the responses of a run, or of a batch of a
+        sampled run, before any of them is scored, e.g. to batch work across the
+        responses. Does nothing by default."""
+        pass
@@ -1,14 +1,17 @@
 import logging
-from typing import Any, Dict, List, Tuple, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple, Union
+from tonic_validate.classes.context_store import ContextStore
 from tonic_validate.classes.llm_response import LLMResponse
 from tonic_validate.metrics.metric import Metric, MetricRequirement
-from tonic_validate.utils.metrics_util import parse_boolean_response
-from tonic_validate.services.openai_service import OpenAIService
+from tonic_validate.utils.metrics_util import gather_calls, parse_boolean_response
 from tonic_validate.utils.llm_calls import (
     context_relevancy_call,
     context_relevancy_prompt,
 )
-from tonic_validate.services.litellm_service import LiteLLMService
+
+if TYPE_CHECKING:
+    from tonic_validate.services.openai_service import OpenAIService
+    from tonic_validate.services.litellm_service import LiteLLMService
 
 logger = logging.getLogger()
 
@@ -35,25 +38,43 @@ class RetrievalPrecisionMetric(Metric):
     async def score(
         self,
         llm_response: LLMResponse,
-        llm_service: Union[LiteLLMService, OpenAIService],
+        llm_service: "Union[LiteLLMService, OpenAIService]",
     ) -> float:
         return (await self.calculate_metric(llm_response, llm_service))[0]
 
     async def calculate_metric(
         self,
         llm_response: LLMResponse,
-        llm_service: Union[LiteLLMService, OpenAIService],
+        llm_service: "Union[LiteLLMService, OpenAIService]",
     ) -> Tuple[float, List[bool]]:
         if len(llm_response.llm_context_list) == 0:
             raise ValueError(
                 "No context provided, cannot calculate retrieval precision"
             )
-        context_relevant_list: List[bool] = []
-        for context in llm_response.llm_context_list:
-            relevance_response = await context_relevancy_call(
-                llm_response.benchmark_item.question, context, llm_service
+        # Judge each unique chunk once, even if it was retrieved more than once
+        chunk_ids = [
+            ContextStore.chunk_id(context) for context in llm_response.llm_context_list
+        ]
+        unique_contexts = dict(zip(chunk_ids, llm_response.llm_context_list))
+        # The chunks are judged independently
+        relevance_responses = await gather_calls(
+            [
+                context_relevancy_call(
+                    llm_response.benchmark_item.question, context, llm_service
+                )
+                for context in unique_contexts.values()
+            ],
+            llm_service,
+        )
+        relevance_by_chunk_id: Dict[str, bool] = {
+            chunk_id: parse_boolean_response(relevance_response)
+            for chunk_id, relevance_response in zip(
+                unique_contexts, relevance_responses
             )
-            context_relevant_list.append(parse_boolean_response(relevance_response))
+        }
+        context_relevant_list: List[bool] = [
+            relevance_by_chunk_id[chunk_id] for chunk_id in chunk_ids
+        ]
 
         score = sum(context_relevant_list) / len(context_relevant_list)
         return (score, context_relevant_list)
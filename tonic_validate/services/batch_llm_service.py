@@ -0,0 +1,358 @@
+import asyncio
+import json
+import logging
+import os
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from pydantic.dataclasses import dataclass
+
+from tonic_validate.classes.exceptions import LLMException
+from tonic_validate.services.staged_llm_service import StagedLLMService
+from tonic_validate.utils.instrumentation import CallRecorder, LLMCallListener
+from tonic_validate.utils.model_info import get_context_window
+from tonic_validate.utils.token_budget import ContextLengthPolicy
+from tonic_validate.utils.token_counter import count_tokens
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from tiktoken import Encoding
+
+logger = logging.getLogger()
+
+# Providers charge half the price for batched requests
+BATCH_PRICE_MULTIPLIER = 0.5
+
+
+@dataclass
+class BatchResult:
+    """
+    The result of one request of a batch job.
+
+    Parameters
+    ----------
+    response: Optional[str]
+        The model's response, None if the request failed
+    prompt_tokens: int
+        The number of prompt tokens the provider charged
+    completion_tokens: int
+        The number of completion tokens the provider charged
+    error: Optional[str]
+        Why the request failed, None if it succeeded
+    """
+
+    response: Optional[str] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    error: Optional[str] = None
+
+
+class OpenAIBatchClient:
+    def __init__(
+        self,
+        client: Optional["AsyncOpenAI"] = None,
+        completion_window: str = "24h",
+    ) -> None:
+        """
+        Submits prompts to the OpenAI (or Azure OpenAI) Batch API.
+
+        A batch client has two methods: submit, which starts a batch job for a set of
+        prompts and returns its id, and results, which returns the results of a
+        finished job or None while it is still running.
+
+        Parameters
+        ----------
+        client: Optional[AsyncOpenAI]
+            The client to use, e.g. the client of an OpenAIService. If not set, an
+            AsyncOpenAI client is created from the environment.
+        completion_window: str
+            The time frame the provider has to finish a job in.
+        """
+        if client is None:
+            from openai import AsyncOpenAI
+
+            client = AsyncOpenAI()
+        self.client = client
+        self.completion_window = completion_window
+
+    async def submit(self, model: str, prompts: Dict[str, str]) -> str:
+        """
+        Starts a batch job
+
+        Parameters
+        ----------
+        model: str
+            The model to send the prompts to.
+        prompts: Dict[str, str]
+            The prompts by their custom ids.
+
+        Returns
+        -------
+        str
+            The id of the job.
+        """
+        from tonic_validate.services.openai_service import SYSTEM_MESSAGE
+
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": model,
+                        "messages": [
+                            {"role": "system", "content": SYSTEM_MESSAGE},
+                            {"role": "user", "content": prompt},
+                        ],
+                        "temperature": 0.0,
+                    },
+                }
+            )
+            for custom_id, prompt in prompts.items()
+        ]
+        input_file = await self.client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    async def results(self, job_id: str) -> Optional[Dict[str, BatchResult]]:
+        """
+        Gets the results of a batch job
+
+        Parameters
+        ----------
+        job_id: str
+            The id of the job.
+
+        Returns
+        -------
+        Optional[Dict[str, BatchResult]]
+            The results by custom id, None if the job is still running. Requests that
+            are missing from a finished job, e.g. because it expired, failed.
+        """
+        batch = await self.client.batches.retrieve(job_id)
+        if batch.status not in ("completed", "failed", "expired", "cancelled"):
+            return None
+        if batch.status != "completed":
+            logger.warning(f"Batch job {job_id} ended with status {batch.status}")
+        results: Dict[str, BatchResult] = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id is None:
+                continue
+            content = await self.client.files.content(file_id)
+            for line in content.text.splitlines():
+                if line.strip() == "":
+                    continue
+                output = json.loads(line)
+                results[output["custom_id"]] = self.__parse_output(output)
+        return results
+
+    @staticmethod
+    def __parse_output(output: Dict[str, Any]) -> BatchResult:
+        if output.get("error"):
+            return BatchResult(error=output["error"].get("message", str(output)))
+        response = output["response"]
+        body = response["body"]
+        if response["status_code"] != 200:
+            return BatchResult(error=body.get("error", {}).get("message", str(body)))
+        usage = body.get("usage") or {}
+        return BatchResult(
+            response=body["choices"][0]["message"]["content"],
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+        )
+
+
+class BatchLLMService(StagedLLMService):
+    def __init__(
+        self,
+        batch_client: Any,
+        model: str,
+        encoder: Optional["Encoding"] = None,
+        state_path: Optional[str] = None,
+        poll_interval: float = 60.0,
+        context_length_policy: ContextLengthPolicy = ContextLengthPolicy.PROVIDER,
+        context_window: Optional[int] = None,
+    ) -> None:
+        """
+        The BatchLLMService class sends prompts to a provider's batch API, which is
+        cheaper but can take hours, e.g. for nightly evaluations.
+
+        The scorer scores every item at once, and the prompts of each stage (see
+        StagedLLMService) are submitted as one batch job. A run takes as many jobs as
+        the metrics have consecutive prompts, usually two.
+
+        With a state_path, the ids of running jobs and the results of finished ones are
+        saved, so that a run that was interrupted picks up its jobs instead of
+        submitting them again when it is scored again with the same state_path.
+
+        Parameters
+        ----------
+        batch_client: Any
+            The client that submits jobs, e.g. an OpenAIBatchClient, or a
+            FakeBatchClient for testing.
+        model: str
+            The model to use for completions.
+        encoder: Optional[Encoding]
+            The encoding to use for token count. If not set, tokens are approximated
+            by whitespace separated words.
+        state_path: Optional[str]
+            The JSON file the jobs and results are saved to.
+        poll_interval: float
+            The time in seconds between checks whether a job is done.
+        context_length_policy: ContextLengthPolicy
+            What to do with prompts that do not fit in the model's context window.
+        context_window: Optional[int]
+            The context window of the model in tokens. If not set, it is looked up from
+            the model name.
+        """
+        super().__init__()
+        self.batch_client = batch_client
+        self.model = model
+        self.encoder = encoder
+        self.state_path = state_path
+        self.poll_interval = poll_interval
+        self.context_length_policy = context_length_policy
+        self.context_window = (
+            context_window if context_window is not None else get_context_window(model)
+        )
+        # Costs of batched calls are estimated at the discounted price
+        self.price_multiplier = BATCH_PRICE_MULTIPLIER
+        # Called with an LLMCallEvent after every get_response call
+        self.listeners: List[LLMCallListener] = []
+        # The custom ids of the prompts of each running job, and the results of the
+        # finished jobs by custom id
+        self.jobs: Dict[str, List[str]] = {}
+        self.results: Dict[str, BatchResult] = {}
+        self.__charged: set = set()
+        self.__load_state()
+
+    async def get_response(self, prompt: str) -> str:
+        """
+        Retrieves a response from the language model, waiting for the batch job that
+        the prompt is sent in
+
+        Parameters
+        ----------
+        prompt: str
+            The prompt to send to the language model.
+
+        Returns
+        -------
+        str
+            The response from the language model.
+        """
+        recorder = CallRecorder(self, prompt)
+        custom_id = self.prompt_id(prompt)
+        result = self.results.get(custom_id)
+        # Failed requests are sent again, like prompts without a result
+        if result is None or result.error is not None:
+            result = await self.stage(custom_id, prompt)
+        # Only the first successful call for a prompt is charged, the others are like
+        # cache hits
+        cache_hit = custom_id in self.__charged
+        recorder.requests = 0 if cache_hit else 1
+        if result.error is not None or result.response is None:
+            error = LLMException(
+                f"Batch request to {self.model} failed: {result.error or 'no response'}"
+            )
+            recorder.finish(error=error)
+            raise error
+        self.__charged.add(custom_id)
+        if not cache_hit:
+            recorder.usage(result.prompt_tokens, result.completion_tokens)
+        recorder.finish(result.response, cache_hit=cache_hit)
+        return result.response
+
+    def get_token_count(self, text: str) -> int:
+        if self.encoder is None:
+            return len(text.split())
+        return count_tokens(self.encoder, text)
+
+    async def execute_stage(self, prompts: Dict[str, str]) -> Dict[str, BatchResult]:
+        """Submits the prompts that weren't submitted yet and waits for their jobs."""
+        submitted = {
+            custom_id for custom_ids in self.jobs.values() for custom_id in custom_ids
+        }
+        new_prompts = {
+            custom_id: prompt
+            for custom_id, prompt in prompts.items()
+            if custom_id not in submitted
+        }
+        if new_prompts:
+            job_id = await self.batch_client.submit(self.model, new_prompts)
+            logger.info(
+                f"Submitted batch job {job_id} with {len(new_prompts)} prompts "
+                f"to {self.model}"
+            )
+            self.jobs[job_id] = list(new_prompts)
+            self.__save_state()
+
+        job_ids = [
+            job_id
+            for job_id, custom_ids in self.jobs.items()
+            if any(custom_id in prompts for custom_id in custom_ids)
+        ]
+        await asyncio.gather(*[self.__wait_for_job(job_id) for job_id in job_ids])
+        return {custom_id: self.results[custom_id] for custom_id in prompts}
+
+    async def __wait_for_job(self, job_id: str) -> None:
+        while True:
+            results = await self.batch_client.results(job_id)
+            if results is not None:
+                break
+            logger.debug(f"Batch job {job_id} is still running")
+            await asyncio.sleep(self.poll_interval)
+        for custom_id in self.jobs.pop(job_id):
+            self.results[custom_id] = results.get(
+                custom_id, BatchResult(error=f"Batch job {job_id} has no result")
+            )
+        self.__save_state()
+
+    def __load_state(self) -> None:
+        if self.state_path is None or not os.path.exists(self.state_path):
+            return
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state["model"] != self.model:
+            raise ValueError(
+                f"The batch state in {self.state_path} is for {state['model']}, "
+                f"not {self.model}"
+            )
+        self.jobs = state["jobs"]
+        # Failed requests are sent again, also if an older version saved them
+        self.results = {
+            custom_id: BatchResult(**result)
+            for custom_id, result in state["results"].items()
+            if result.get("error") is None
+        }
+        logger.info(
+            f"Resuming from {self.state_path} with {len(self.jobs)} running jobs and "
+            f"{len(self.results)} results"
+        )
+
+    def __save_state(self) -> None:
+        if self.state_path is None:
+            return
+        state = {
+            "model": self.model,
+            "jobs": self.jobs,
+            # Only successful results, so that a resumed run sends the failed
+            # requests again, e.g. those of an expired or cancelled job
+            "results": {
+                custom_id: asdict(result)
+                for custom_id, result in self.results.items()
+                if result.error is None
+            },
+        }
+        # Write to a temporary file first, so an interruption can't corrupt the state
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
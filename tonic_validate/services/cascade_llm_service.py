@@ -0,0 +1,245 @@
+import logging
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic.dataclasses import dataclass
+
+from tonic_validate.classes.run_stats import LLMCallEvent
+from tonic_validate.utils.instrumentation import LLMCallListener, current_metric
+from tonic_validate.utils.metrics_util import (
+    parse_boolean_response,
+    parse_bullet_list_response,
+)
+from tonic_validate.utils.prefilter import Judgment
+from tonic_validate.utils.token_budget import ContextLengthPolicy
+
+logger = logging.getLogger()
+
+
+@dataclass
+class CascadeStats:
+    """
+    How often the cheap model of a cascade was trusted, and how often it agreed with
+    the expensive model when it was audited.
+
+    Parameters
+    ----------
+    calls: int
+        The number of get_response calls
+    escalations: int
+        The number of calls that were sent to the expensive model because the cheap
+        model's response couldn't be used
+    unparseable: int
+        The number of escalations because the response couldn't be parsed
+    ambiguous: int
+        The number of escalations because the response could only be parsed
+        leniently, e.g. "The answer is true" instead of "true"
+    errors: int
+        The number of escalations because the cheap model failed
+    audits: int
+        The number of usable responses that were checked against the expensive model
+    agreements: int
+        The number of audits in which both models made the same judgment
+    """
+
+    calls: int = 0
+    escalations: int = 0
+    unparseable: int = 0
+    ambiguous: int = 0
+    errors: int = 0
+    audits: int = 0
+    agreements: int = 0
+
+    @property
+    def escalation_rate(self) -> float:
+        """The fraction of calls that were escalated to the expensive model."""
+        if self.calls == 0:
+            return 0.0
+        return self.escalations / self.calls
+
+    @property
+    def agreement_rate(self) -> Optional[float]:
+        """The fraction of audits the models agreed on, None if there were none."""
+        if self.audits == 0:
+            return None
+        return self.agreements / self.audits
+
+
+def parse_judgment_response(judgment: Judgment, response: str) -> Tuple[Any, bool]:
+    """
+    Parses an evaluator response the way the metrics do
+
+    Parameters
+    ----------
+    judgment: Judgment
+        The judgment the response is for.
+    response: str
+        The evaluator's response.
+
+    Returns
+    -------
+    Tuple[Any, bool]
+        The judgment (a bool, a similarity score or the number of main points) and
+        whether the response was in the requested format, rather than only parseable
+        leniently.
+
+    Raises
+    ------
+    ValueError
+        If the response can't be parsed.
+    """
+    if judgment == Judgment.SIMILARITY_SCORE:
+        score = float(response)
+        if not 0 <= score <= 5:
+            raise ValueError(f"Similarity score {score} is not within 0 to 5")
+        return score, True
+    if judgment == Judgment.MAIN_POINTS:
+        main_points = parse_bullet_list_response(response)
+        return len(main_points), response.lstrip().startswith(("*", "-"))
+    value = parse_boolean_response(response)
+    return value, response.strip().strip("'\".").lower() in ("true", "false")
+
+
+class CascadeLLMService:
+    def __init__(
+        self,
+        cheap_service: Any,
+        expensive_service: Any,
+        audit_rate: float = 0.0,
+        similarity_tolerance: float = 1.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        The CascadeLLMService class asks a cheap model first and only asks an expensive
+        model when the cheap model's response is unparseable or ambiguous, or the cheap
+        model fails. A random fraction of the other responses is audited: they are
+        also sent to the expensive model, whose response is used, and the agreement of
+        the two models is recorded per metric in stats_by_metric.
+
+        Prompts are fitted to the smaller of the two context windows, and tokens are
+        counted with the expensive model's encoder. Each model's calls are recorded in
+        run.stats under its own name.
+
+        Parameters
+        ----------
+        cheap_service: Any
+            The service of the cheap model, e.g. an OpenAIService for gpt-4o-mini.
+        expensive_service: Any
+            The service of the expensive model.
+        audit_rate: float
+            The fraction of usable cheap responses to check against the expensive
+            model, between 0 and 1.
+        similarity_tolerance: float
+            How far apart two similarity scores may be to count as agreeing.
+        seed: Optional[int]
+            Seed for choosing which responses are audited.
+        """
+        if not 0 <= audit_rate <= 1:
+            raise ValueError(f"Audit rate {audit_rate} is not within 0 to 1")
+        self.cheap_service = cheap_service
+        self.expensive_service = expensive_service
+        self.audit_rate = audit_rate
+        self.similarity_tolerance = similarity_tolerance
+        self.random = random.Random(seed)
+        self.model = expensive_service.model
+        self.encoder = getattr(expensive_service, "encoder", None)
+        self.context_length_policy = getattr(
+            expensive_service, "context_length_policy", ContextLengthPolicy.PROVIDER
+        )
+        context_windows = [
+            getattr(service, "context_window", None)
+            for service in (cheap_service, expensive_service)
+        ]
+        known_context_windows = [window for window in context_windows if window]
+        self.context_window = (
+            min(known_context_windows) if known_context_windows else None
+        )
+        # Called with the LLMCallEvent of every call to either model
+        self.listeners: List[LLMCallListener] = []
+        for service in (cheap_service, expensive_service):
+            if hasattr(service, "listeners"):
+                service.listeners.append(self.__forward_event)
+        self.stats = CascadeStats()
+        self.stats_by_metric: Dict[str, CascadeStats] = {}
+
+    def __forward_event(self, event: LLMCallEvent) -> None:
+        for listener in self.listeners:
+            listener(event)
+
+    def get_token_count(self, text: str) -> int:
+        return self.expensive_service.get_token_count(text)
+
+    async def get_response(
+        self, prompt: str, judgment: Optional[Judgment] = None
+    ) -> str:
+        """
+        Retrieves a response from the cheap model, escalating to the expensive one
+        if needed
+
+        Parameters
+        ----------
+        prompt: str
+            The prompt to send to the models.
+        judgment: Optional[Judgment]
+            The judgment the prompt asks for, used to check the cheap model's response.
+            Without it, only failed calls are escalated and no responses are audited.
+
+        Returns
+        -------
+        str
+            The expensive model's response if the call was escalated or audited,
+            otherwise the cheap model's response.
+        """
+        metric = current_metric.get()
+        group_stats = [self.stats]
+        if metric is not None:
+            if metric not in self.stats_by_metric:
+                self.stats_by_metric[metric] = CascadeStats()
+            group_stats.append(self.stats_by_metric[metric])
+        for stats in group_stats:
+            stats.calls += 1
+
+        cheap_value = None
+        reason = None
+        try:
+            cheap_response = await self.cheap_service.get_response(prompt)
+        except Exception as e:
+            logger.debug(f"{self.cheap_service.model} failed, escalating: {e}")
+            reason = "errors"
+        else:
+            if judgment is not None:
+                try:
+                    cheap_value, confident = parse_judgment_response(
+                        judgment, cheap_response
+                    )
+                    if not confident:
+                        reason = "ambiguous"
+                except ValueError:
+                    reason = "unparseable"
+
+        if reason is not None:
+            for stats in group_stats:
+                stats.escalations += 1
+                setattr(stats, reason, getattr(stats, reason) + 1)
+            return await self.expensive_service.get_response(prompt)
+
+        if judgment is None or self.random.random() >= self.audit_rate:
+            return cheap_response
+
+        expensive_response = await self.expensive_service.get_response(prompt)
+        try:
+            expensive_value, _ = parse_judgment_response(judgment, expensive_response)
+            agrees = self.__agree(judgment, cheap_value, expensive_value)
+        except ValueError:
+            agrees = False
+        for stats in group_stats:
+            stats.audits += 1
+            stats.agreements += int(agrees)
+        return expensive_response
+
+    def __agree(
+        self, judgment: Judgment, cheap_value: Any, expensive_value: Any
+    ) -> bool:
+        if judgment == Judgment.SIMILARITY_SCORE:
+            return abs(cheap_value - expensive_value) <= self.similarity_tolerance
+        return cheap_value == expensive_value
@@ -0,0 +1,310 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from tonic_validate.utils.instrumentation import CallRecorder
+from tonic_validate.utils.retry_policy import ErrorKind, classify_error
+
+logger = logging.getLogger()
+
+T = TypeVar("T")
+
+# The weight of the latest latency in an endpoint's average latency
+LATENCY_SMOOTHING = 0.2
+# The quota headers are ignored once they are older than a quota window
+QUOTA_WINDOW = 60.0
+
+
+def _header(headers: Optional[Mapping[str, str]], name: str) -> Optional[float]:
+    if headers is None:
+        return None
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """The time in seconds the provider asked to wait for in the response of a failed
+    request, if it did."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    retry_after_ms = _header(headers, "retry-after-ms")
+    if retry_after_ms is not None:
+        return retry_after_ms / 1000
+    return _header(headers, "retry-after")
+
+
+class Endpoint:
+    """
+    One deployment or API key of a model, e.g. an Azure OpenAI deployment in one
+    region, with what the pool knows about its quota and latency.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        model: Optional[str] = None,
+        tokens_per_minute: Optional[int] = None,
+        weight: float = 1.0,
+        name: Optional[str] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        client: Any
+            The client that sends the requests, e.g. an AsyncAzureOpenAI client for
+            the deployment's endpoint and key.
+        model: Optional[str]
+            The model, or the Azure deployment name, to request. If not set, the
+            service's model is requested.
+        tokens_per_minute: Optional[int]
+            The token quota of the endpoint, used while the provider has not reported
+            the remaining quota in its response headers.
+        weight: float
+            The share of the requests the endpoint gets relative to the other
+            endpoints, all else being equal.
+        name: Optional[str]
+            The name of the endpoint in logs. Defaults to its model and position in
+            the pool.
+        """
+        self.client = client
+        self.model = model
+        self.tokens_per_minute = tokens_per_minute
+        self.weight = weight
+        self.name = name
+        self.latency: Optional[float] = None
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.__token_usage: Deque[Tuple[float, int]] = deque()
+        self.__remaining_tokens: Optional[float] = None
+        self.__token_limit: Optional[float] = None
+        self.__quota_time = 0.0
+
+    def record_usage(
+        self, tokens: int, headers: Optional[Mapping[str, str]] = None
+    ) -> None:
+        """
+        Records the tokens of a response and the rate limit headers it came with
+
+        Parameters
+        ----------
+        tokens: int
+            The prompt and completion tokens of the response.
+        headers: Optional[Mapping[str, str]]
+            The headers of the response. OpenAI and Azure report the remaining token
+            quota in x-ratelimit-remaining-tokens.
+        """
+        now = time.monotonic()
+        self.__token_usage.append((now, tokens))
+        remaining = _header(headers, "x-ratelimit-remaining-tokens")
+        if remaining is not None:
+            self.__remaining_tokens = remaining
+            self.__token_limit = _header(headers, "x-ratelimit-limit-tokens")
+            self.__quota_time = now
+
+    def remaining_quota(self) -> Optional[float]:
+        """The fraction of the endpoint's token quota that is left, if it is known."""
+        now = time.monotonic()
+        limit = self.__token_limit or self.tokens_per_minute
+        if (
+            self.__remaining_tokens is not None
+            and now - self.__quota_time < QUOTA_WINDOW
+        ):
+            if limit:
+                return min(self.__remaining_tokens / limit, 1.0)
+            return 1.0 if self.__remaining_tokens > 0 else 0.0
+        if not self.tokens_per_minute:
+            return None
+        while self.__token_usage and now - self.__token_usage[0][0] >= QUOTA_WINDOW:
+            self.__token_usage.popleft()
+        used = sum(tokens for _, tokens in self.__token_usage)
+        return max(self.tokens_per_minute - used, 0) / self.tokens_per_minute
+
+    def is_available(self, now: float) -> bool:
+        """Whether the endpoint is not cooling down after a failed request."""
+        return now >= self.cooldown_until
+
+
+class EndpointPool:
+    """
+    Spreads the requests of a service over several endpoints of the same model, e.g.
+    Azure deployments in different regions, each with its own quota, so that the
+    throughput of the service grows with the number of endpoints.
+
+    Each request goes to an endpoint drawn with a probability proportional to its
+    weight and the fraction of its quota that is left, and inversely proportional to
+    its average latency and the requests it has in flight. An endpoint that rate
+    limits a request or fails with an error that can go away, e.g. a server error, is
+    skipped until the time its provider asked to wait for, or cooldown_time, has
+    passed, and the request is sent to the next endpoint right away. Only when every
+    endpoint failed does the request fail, and the service retries it after its
+    usual wait.
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[Endpoint],
+        cooldown_time: float = 10.0,
+        classify: Callable[[BaseException], ErrorKind] = classify_error,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        endpoints: Sequence[Endpoint]
+            The endpoints of the model.
+        cooldown_time: float
+            The time in seconds an endpoint is skipped after a failed request, unless
+            its provider asked for another wait.
+        classify: Callable[[BaseException], ErrorKind]
+            Decides which errors the pool fails over from. Errors that are not rate
+            limits or retryable would fail on every endpoint, so they are raised.
+        rng: Optional[random.Random]
+            The random number generator to draw the endpoints from.
+        """
+        if len(endpoints) == 0:
+            raise ValueError("An endpoint pool needs at least one endpoint")
+        self.endpoints: List[Endpoint] = list(endpoints)
+        for i, endpoint in enumerate(self.endpoints):
+            if endpoint.name is None:
+                endpoint.name = f"{endpoint.model or 'endpoint'}-{i}"
+        self.cooldown_time = cooldown_time
+        self.classify = classify
+        self.rng = rng if rng is not None else random.Random()
+        self.failovers = 0
+
+    def choose(self, exclude: Optional[Set[int]] = None) -> Optional[Endpoint]:
+        """
+        Draws the endpoint of the next request
+
+        Parameters
+        ----------
+        exclude: Optional[Set[int]]
+            The ids of the endpoints the request was already sent to.
+
+        Returns
+        -------
+        Optional[Endpoint]
+            An available endpoint, or None if every endpoint not excluded is cooling
+            down.
+        """
+        exclude = exclude or set()
+        now = time.monotonic()
+        candidates = [
+            endpoint
+            for endpoint in self.endpoints
+            if id(endpoint) not in exclude and endpoint.is_available(now)
+        ]
+        if not candidates:
+            return None
+        known_latencies = [e.latency for e in self.endpoints if e.latency is not None]
+        default_latency = (
+            sum(known_latencies) / len(known_latencies) if known_latencies else 1.0
+        )
+        weights = []
+        for endpoint in candidates:
+            quota = endpoint.remaining_quota()
+            latency = (
+                endpoint.latency if endpoint.latency is not None else default_latency
+            )
+            weights.append(
+                endpoint.weight
+                * (quota if quota is not None else 1.0)
+                / (max(latency, 1e-3) * (1 + endpoint.in_flight))
+            )
+        if sum(weights) <= 0:
+            # Every endpoint used up its quota, so spread the requests evenly
+            weights = [endpoint.weight for endpoint in candidates]
+        return self.rng.choices(candidates, weights=weights)[0]
+
+    async def send(
+        self,
+        send: Callable[[Endpoint], Awaitable[T]],
+        recorder: Optional[CallRecorder] = None,
+    ) -> T:
+        """
+        Sends a request to an endpoint, and to the next one while they fail
+
+        Parameters
+        ----------
+        send: Callable[[Endpoint], Awaitable[T]]
+            Sends the request once to an endpoint.
+        recorder: Optional[CallRecorder]
+            The recorder of the call, which counts the requests sent to the other
+            endpoints and their rate limits.
+
+        Returns
+        -------
+        T
+            The result of the first endpoint that succeeded.
+        """
+        tried: Set[int] = set()
+        last_error: Optional[Exception] = None
+        last_error_kind: Optional[ErrorKind] = None
+        while True:
+            endpoint = self.choose(tried)
+            if endpoint is None:
+                if tried:
+                    # Every endpoint failed, so the caller's retries take over
+                    assert last_error is not None
+                    raise last_error
+                # Every endpoint is cooling down, so wait for the first to be back
+                wait_time = min(e.cooldown_until for e in self.endpoints)
+                await asyncio.sleep(max(wait_time - time.monotonic(), 0))
+                continue
+            if tried:
+                self.failovers += 1
+                if recorder is not None:
+                    # The last error is counted by the caller if no endpoint is left
+                    recorder.requests += 1
+                    if last_error_kind == ErrorKind.RATE_LIMIT:
+                        recorder.rate_limits += 1
+            tried.add(id(endpoint))
+            endpoint.requests += 1
+            endpoint.in_flight += 1
+            start = time.perf_counter()
+            try:
+                result = await send(endpoint)
+            except Exception as e:
+                error_kind = self.classify(e)
+                if error_kind not in (ErrorKind.RATE_LIMIT, ErrorKind.RETRYABLE):
+                    raise
+                endpoint.failures += 1
+                wait_time = retry_after(e)
+                endpoint.cooldown_until = time.monotonic() + (
+                    wait_time if wait_time is not None else self.cooldown_time
+                )
+                logger.debug(f"{endpoint.name} failed a request: {e}")
+                last_error, last_error_kind = e, error_kind
+                continue
+            finally:
+                endpoint.in_flight -= 1
+            latency = time.perf_counter() - start
+            endpoint.latency = (
+                latency
+                if endpoint.latency is None
+                else (1 - LATENCY_SMOOTHING) * endpoint.latency
+                + LATENCY_SMOOTHING * latency
+            )
+            return result
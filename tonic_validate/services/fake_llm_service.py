@@ -0,0 +1,375 @@
+import asyncio
+import logging
+import random
+from functools import lru_cache
+from typing import (
+    TYPE_CHECKING,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from tonic_validate.services.batch_llm_service import BatchResult
+from tonic_validate.utils.circuit_breaker import CircuitBreaker
+from tonic_validate.utils.embeddings import Embedder
+from tonic_validate.utils.hedging import RequestHedger
+from tonic_validate.utils.instrumentation import CallRecorder, LLMCallListener
+from tonic_validate.utils.llm_cache import LLMCache
+from tonic_validate.utils.llm_calls import main_points_prompt, similarity_score_prompt
+from tonic_validate.utils.retry_policy import (
+    EXP_DELAY_BASE_DEPRECATION,
+    create_backoff,
+    send_with_retries,
+)
+from tonic_validate.utils.token_budget import ContextLengthPolicy
+from tonic_validate.utils.token_counter import count_tokens
+
+if TYPE_CHECKING:
+    from tiktoken import Encoding
+
+logger = logging.getLogger()
+
+# A latency in seconds, or a function that draws one from the service's random
+# number generator, e.g. lambda rng: rng.expovariate(1 / 0.5)
+Latency = Union[float, Callable[[random.Random], float]]
+
+
+class FakeRateLimitError(Exception):
+    """Raised by the fake provider to simulate a 429 response."""
+
+
+class FakeProviderError(Exception):
+    """Raised by the fake provider to simulate a transient server error."""
+
+    status_code = 500
+
+
+@lru_cache(maxsize=None)
+def _prompt_templates() -> Tuple[str, str]:
+    return main_points_prompt(), similarity_score_prompt()
+
+
+def default_response(prompt: str) -> str:
+    """Answers a metric prompt with a response that the metric can parse.
+
+    Main points prompts get a one item bullet list, similarity prompts get the highest
+    score and every other prompt is a true or false question that gets "true".
+
+    Parameters
+    ----------
+    prompt: str
+        The prompt sent to the service.
+
+    Returns
+    -------
+    str
+        The response.
+    """
+    main_points_template, similarity_score_template = _prompt_templates()
+    if prompt.startswith(main_points_template):
+        return "* The answer"
+    if prompt.startswith(similarity_score_template):
+        return "5"
+    return "true"
+
+
+def _responder(
+    responses: Optional[Union[Callable[[str], str], Sequence[str]]],
+) -> Callable[[str], str]:
+    if callable(responses):
+        return responses
+    if responses is None:
+        return default_response
+    scripted_responses = list(responses)
+    if len(scripted_responses) == 0:
+        raise ValueError("responses must not be empty")
+    index = 0
+
+    def respond(_: str) -> str:
+        nonlocal index
+        response = scripted_responses[index % len(scripted_responses)]
+        index += 1
+        return response
+
+    return respond
+
+
+class FakeLLMService:
+    def __init__(
+        self,
+        responses: Optional[Union[Callable[[str], str], Sequence[str]]] = None,
+        model: str = "fake-model",
+        latency: Latency = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        starting_wait_time: float = 0.0,
+        max_retries: int = 10,
+        exp_delay_base: Optional[int] = None,
+        seed: int = 0,
+        record_prompts: bool = False,
+        encoder: Optional["Encoding"] = None,
+        context_length_policy: ContextLengthPolicy = ContextLengthPolicy.PROVIDER,
+        context_window: Optional[int] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        request_timeout: Optional[float] = None,
+        hedger: Optional[RequestHedger] = None,
+        jitter_growth: float = 3.0,
+    ) -> None:
+        """
+        The FakeLLMService class answers prompts without calling an LLM, for testing
+        and benchmarking the scorer offline. Its responses, latency and failures are
+        deterministic for a given seed.
+
+        Parameters
+        ----------
+        responses: Optional[Union[Callable[[str], str], Sequence[str]]]
+            Either a function that maps a prompt to its response, or a list of
+            responses that is returned in order and repeated. If not set, every prompt
+            gets a response that its metric can parse (see default_response).
+        model: str
+            The model name reported by the service.
+        latency: Union[float, Callable[[random.Random], float]]
+            The time in seconds each request takes, or a function that draws it from a
+            random number generator.
+        error_rate: float
+            The probability that a request fails with a transient error.
+        rate_limit_rate: float
+            The probability that a request is rate limited.
+        starting_wait_time: float
+            The starting wait time between retries.
+        max_retries: int
+            The maximum number of requests to send for a prompt.
+        exp_delay_base: Optional[int]
+            Deprecated, use jitter_growth. If set, each wait between retries is the
+            previous wait times exp_delay_base and a random factor between 1 and 1.2,
+            as before the waits were drawn with decorrelated jitter.
+        seed: int
+            Seed for the random number generator.
+        record_prompts: bool
+            If True, every prompt that reaches the fake provider is kept in prompts.
+        encoder: Optional[Encoding]
+            The encoding to use for token count. If not set, tokens are approximated
+            by whitespace separated words.
+        context_length_policy: ContextLengthPolicy
+            What to do with prompts that do not fit in the context window.
+        context_window: Optional[int]
+            The context window of the fake model in tokens.
+        circuit_breaker: Optional[CircuitBreaker]
+            Stops sending requests while too many of them fail, e.g. during an outage
+            of the provider.
+        request_timeout: Optional[float]
+            The time in seconds after which a request is abandoned and retried. If not
+            set, the client's default is used.
+        hedger: Optional[RequestHedger]
+            Sends a second request for prompts whose first request is slow.
+        jitter_growth: float
+            The longest wait between retries as a multiple of the previous wait. The
+            waits are drawn with decorrelated jitter.
+        """
+        self.responder = _responder(responses)
+        self.model = model
+        self.encoder = encoder
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.starting_wait_time = starting_wait_time
+        self.max_retries = max_retries
+        if exp_delay_base is not None:
+            logger.warning(EXP_DELAY_BASE_DEPRECATION)
+        self.exp_delay_base = exp_delay_base
+        self.jitter_growth = jitter_growth
+        self.random = random.Random(seed)
+        self.cache = LLMCache()
+        # Called with an LLMCallEvent after every get_response call
+        self.listeners: List[LLMCallListener] = []
+        self.context_length_policy = context_length_policy
+        self.context_window = context_window
+        self.circuit_breaker = circuit_breaker
+        self.request_timeout = request_timeout
+        self.hedger = hedger
+
+        self.record_prompts = record_prompts
+        self.prompts: List[str] = []
+        self.num_calls = 0
+        self.num_cache_hits = 0
+        self.num_requests = 0
+        self.num_errors = 0
+        self.num_rate_limits = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """The fraction of get_response calls that were answered from the cache."""
+        if self.num_calls == 0:
+            return 0.0
+        return self.num_cache_hits / self.num_calls
+
+    async def __request(self, prompt: str) -> str:
+        """Simulates a single request to the provider."""
+        self.num_requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if callable(self.latency):
+                latency = self.latency(self.random)
+            else:
+                latency = self.latency
+            if latency > 0:
+                await asyncio.sleep(latency)
+            failure = self.random.random()
+            if failure < self.rate_limit_rate:
+                self.num_rate_limits += 1
+                raise FakeRateLimitError("Rate limit reached for fake-model")
+            if failure < self.rate_limit_rate + self.error_rate:
+                self.num_errors += 1
+                raise FakeProviderError("The fake provider had an error")
+            if self.record_prompts:
+                self.prompts.append(prompt)
+            return self.responder(prompt)
+        finally:
+            self.in_flight -= 1
+
+    async def get_response(self, prompt: str) -> str:
+        """
+        Retrieves a response from the fake language model
+
+        Parameters
+        ----------
+        prompt: str
+            The prompt to send to the language model.
+
+        Returns
+        -------
+        str
+            The response from the language model.
+        """
+        self.num_calls += 1
+        recorder = CallRecorder(self, prompt)
+        cached_response = self.cache.get(prompt)
+        if cached_response is not None:
+            self.num_cache_hits += 1
+            recorder.finish(cached_response, cache_hit=True)
+            return cached_response
+
+        async def request() -> str:
+            if self.request_timeout is None:
+                return await self.__request(prompt)
+            return await asyncio.wait_for(self.__request(prompt), self.request_timeout)
+
+        def send() -> Awaitable[str]:
+            if self.hedger is None:
+                return request()
+            return self.hedger.send(request, recorder)
+
+        try:
+            response = await send_with_retries(
+                send,
+                recorder,
+                self.model,
+                self.max_retries,
+                create_backoff(
+                    self.starting_wait_time,
+                    self.jitter_growth,
+                    self.exp_delay_base,
+                    rng=self.random,
+                ),
+                circuit_breaker=self.circuit_breaker,
+            )
+        except Exception as e:
+            recorder.finish(error=e)
+            raise
+        self.cache.put(prompt, response)
+        recorder.finish(response)
+        return response
+
+    def get_token_count(self, text: str) -> int:
+        if self.encoder is None:
+            return len(text.split())
+        return count_tokens(self.encoder, text)
+
+
+class FakeBatchClient:
+    def __init__(
+        self,
+        responses: Optional[Union[Callable[[str], str], Sequence[str]]] = None,
+        polls_until_done: int = 1,
+        failed_prompts: Optional[Callable[[str], bool]] = None,
+    ) -> None:
+        """
+        The FakeBatchClient class is a local stand-in for a provider's batch API, for
+        testing a BatchLLMService offline.
+
+        Parameters
+        ----------
+        responses: Optional[Union[Callable[[str], str], Sequence[str]]]
+            The responses, as for FakeLLMService.
+        polls_until_done: int
+            How many times the results of a job are requested before it is done.
+        failed_prompts: Optional[Callable[[str], bool]]
+            Decides which prompts fail in the batch. By default none do.
+        """
+        self.responder = _responder(responses)
+        self.polls_until_done = polls_until_done
+        self.failed_prompts = failed_prompts
+        # The prompts of every submitted job by custom id, and how often the results
+        # of each job were requested
+        self.jobs: Dict[str, Dict[str, str]] = {}
+        self.polls: Dict[str, int] = {}
+
+    async def submit(self, model: str, prompts: Dict[str, str]) -> str:
+        job_id = f"batch_{len(self.jobs)}"
+        self.jobs[job_id] = dict(prompts)
+        self.polls[job_id] = 0
+        return job_id
+
+    async def results(self, job_id: str) -> Optional[Dict[str, BatchResult]]:
+        self.polls[job_id] += 1
+        if self.polls[job_id] < self.polls_until_done:
+            return None
+        results: Dict[str, BatchResult] = {}
+        for custom_id, prompt in self.jobs[job_id].items():
+            if self.failed_prompts is not None and self.failed_prompts(prompt):
+                results[custom_id] = BatchResult(error="The fake request failed")
+                continue
+            response = self.responder(prompt)
+            results[custom_id] = BatchResult(
+                response=response,
+                prompt_tokens=len(prompt.split()),
+                completion_tokens=len(response.split()),
+            )
+        return results
+
+
+class FakeEmbedder(Embedder):
+    kind = "fake"
+
+    def __init__(self, batch_size: int = 512, cache_size: int = 100_000) -> None:
+        """
+        The FakeEmbedder class embeds texts locally by the counts of their letters, for
+        testing embedding metrics offline. Texts with the same letters are identical
+        to it.
+
+        Parameters
+        ----------
+        batch_size: int
+            The number of texts embedded per batch.
+        cache_size: int
+            The number of embeddings kept in the cache.
+        """
+        super().__init__("fake-embedding-model", batch_size, cache_size=cache_size)
+        # The texts of every batch
+        self.batches: List[List[str]] = []
+
+    async def embed_batch(self, texts: List[str]) -> List[Sequence[float]]:
+        self.batches.append(list(texts))
+        vectors = []
+        for text in texts:
+            letters = [c for c in text.lower() if "a" <= c <= "z"]
+            vectors.append([float(letters.count(chr(ord("a") + i))) for i in range(26)])
+        return vectors
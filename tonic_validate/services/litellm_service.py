@@ -1,17 +1,39 @@
-import asyncio
 import logging
 import os
-import random
+from typing import Awaitable, List, Optional
 from litellm import acompletion, ModelResponse, Choices
-from openai import APIConnectionError, BadRequestError, RateLimitError
+from openai import APIConnectionError
 from tiktoken import Encoding
 
-from tonic_validate.classes.exceptions import LLMException, ContextLengthException
+from tonic_validate.utils.circuit_breaker import CircuitBreaker
+from tonic_validate.utils.hedging import RequestHedger
+from tonic_validate.utils.instrumentation import CallRecorder, LLMCallListener
 from tonic_validate.utils.llm_cache import LLMCache
+from tonic_validate.utils.model_info import get_context_window
+from tonic_validate.utils.retry_policy import (
+    EXP_DELAY_BASE_DEPRECATION,
+    ErrorKind,
+    classify_error,
+    create_backoff,
+    send_with_retries,
+)
+from tonic_validate.utils.token_budget import ContextLengthPolicy
+from tonic_validate.utils.token_counter import count_tokens
 
 logger = logging.getLogger()
 
 
+def classify_litellm_error(error: BaseException) -> ErrorKind:
+    """Classifies an error like classify_error, except LiteLLM's APIConnectionError.
+
+    LiteLLM raises APIConnectionError for the provider errors it can't map, which are
+    not retried unless they are timeouts.
+    """
+    if isinstance(error, APIConnectionError) and "Timeout" not in type(error).__name__:
+        return ErrorKind.FATAL
+    return classify_error(error)
+
+
 class LiteLLMService:
     def __init__(
         self,
@@ -19,8 +41,15 @@ class LiteLLMService:
         model: str = "gemini/gemini-1.5-pro-latest",
         starting_wait_time: float = 1.5,
         max_retries: int = 12,
-        exp_delay_base: int = 2,
+        exp_delay_base: Optional[int] = None,
         model_id: str = "",
+        context_length_policy: ContextLengthPolicy = ContextLengthPolicy.PROVIDER,
+        context_window: Optional[int] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        request_timeout: Optional[float] = None,
+        hedger: Optional[RequestHedger] = None,
+        cache: Optional[LLMCache] = None,
+        jitter_growth: float = 3.0,
     ) -> None:
         """
         The LiteLLMService class is a wrapper around LiteLLM client for async operations using different LLMs.
@@ -34,9 +63,32 @@ class LiteLLMService:
         starting_wait_time: float
             The starting wait time between retries.
         max_retries: int
-            The maximum number of retries to attempt.
-        exp_delay_base: int
-            Base for exponential back off delay between retries.
+            The maximum number of requests to send for a prompt. Requests that fail
+            with an error that retrying can't fix, e.g. an unknown model, are not
+            retried (see retry_policy).
+        exp_delay_base: Optional[int]
+            Deprecated, use jitter_growth. If set, each wait between retries is the
+            previous wait times exp_delay_base and a random factor between 1 and 1.2,
+            as before the waits were drawn with decorrelated jitter.
+        context_length_policy: ContextLengthPolicy
+            What to do with prompts that do not fit in the model's context window.
+        context_window: Optional[int]
+            The context window of the model in tokens. If not set, it is looked up from
+            the model name.
+        circuit_breaker: Optional[CircuitBreaker]
+            Stops sending requests while too many of them fail, e.g. during an outage
+            of the provider.
+        request_timeout: Optional[float]
+            The time in seconds after which a request is abandoned and retried. If not
+            set, the client's default is used.
+        hedger: Optional[RequestHedger]
+            Sends a second request for prompts whose first request is slow.
+        cache: Optional[LLMCache]
+            The cache of the responses, e.g. one shared with other services of the
+            same model. If not set, the service gets its own cache.
+        jitter_growth: float
+            The longest wait between retries as a multiple of the previous wait. The
+            waits are drawn with decorrelated jitter.
         """
         try:
             self.check_environment(model)
@@ -46,9 +98,21 @@ class LiteLLMService:
         self.model = model
         self.encoder = encoder
         self.max_retries = max_retries
+        if exp_delay_base is not None:
+            logger.warning(EXP_DELAY_BASE_DEPRECATION)
         self.exp_delay_base = exp_delay_base
+        self.jitter_growth = jitter_growth
         self.starting_wait_time = starting_wait_time
-        self.cache = LLMCache()
+        self.cache = cache if cache is not None else LLMCache()
+        # Called with an LLMCallEvent after every get_response call
+        self.listeners: List[LLMCallListener] = []
+        self.context_length_policy = context_length_policy
+        self.context_window = (
+            context_window if context_window is not None else get_context_window(model)
+        )
+        self.circuit_breaker = circuit_breaker
+        self.request_timeout = request_timeout
+        self.hedger = hedger
         self.model_id = model_id
 
     def check_environment(self, model: str) -> None:
@@ -116,76 +180,80 @@ class LiteLLMService:
             The response from the language model.
         """
 
-        async def get_litellm_response():
-            num_retries = 0
-            wait_time = self.starting_wait_time
-            while num_retries < self.max_retries:
-                random_value = random.randrange(0, 20) * 0.01
-                wait_time_multiplier = self.exp_delay_base * (1 + random_value)
-                try:
-                    messages = [
-                        {
-                            "role": "system",
-                            "content": "You are a helpful assistant. Respond using markdown.",
-                        },
-                        {"role": "user", "content": prompt},
-                    ]
-                    if self.model_id != "":
-                        response = await acompletion(
-                            model=self.model,
-                            model_id=self.model_id,
-                            messages=messages,
-                            temperature=0.0,
-                        )
-                    else:
-                        response = await acompletion(
-                            model=self.model,
-                            messages=messages,
-                            temperature=0.0,
-                        )
-                    # Check that type is ModelResponse
-                    if not isinstance(response, ModelResponse):
-                        raise Exception(
-                            f"Failed to get response from {self.model}, response is not a ModelResponse"
-                        )
-                    choice = response.choices[0]
-                    if not isinstance(choice, Choices):
-                        raise Exception(
-                            f"Failed to get response from {self.model}, choice is not a Choices object"
-                        )
-                    response_content = choice.message.content
-                    if response_content is None:
-                        raise Exception(
-                            f"Failed to get message response from {self.model}, message does not exist"
-                        )
-                    return response_content
-                except BadRequestError as e:
-                    if e.code == "context_length_exceeded":
-                        raise ContextLengthException(e.message)
-                except APIConnectionError as e:
-                    raise LLMException(e.message)
-                except RateLimitError:
-                    log_message = (
-                        "hit openai.error.RateLimitError and entered retry "
-                        f"logic, num_retries={num_retries}"
-                    )
-                    logger.debug(log_message)
-                    await asyncio.sleep(wait_time)
-                    wait_time *= wait_time_multiplier
-                except Exception as e:
-                    logger.warning(e)
-                    await asyncio.sleep(wait_time)
-                    wait_time *= wait_time_multiplier
-                num_retries += 1
-            raise LLMException(
-                f"Failed to get completion response from {self.model}, max retires hit"
-            )
+        async def get_litellm_response() -> str:
+            messages = [
+                {
+                    "role": "system",
+                    "content": "You are a helpful assistant. Respond using markdown.",
+                },
+                {"role": "user", "content": prompt},
+            ]
+            options = {}
+            if self.request_timeout is not None:
+                options["timeout"] = self.request_timeout
+            if self.model_id != "":
+                response = await acompletion(
+                    model=self.model,
+                    model_id=self.model_id,
+                    messages=messages,
+                    temperature=0.0,
+                    **options,
+                )
+            else:
+                response = await acompletion(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.0,
+                    **options,
+                )
+            # Check that type is ModelResponse
+            if not isinstance(response, ModelResponse):
+                raise Exception(
+                    f"Failed to get response from {self.model}, response is not a ModelResponse"
+                )
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                recorder.usage(usage.prompt_tokens, usage.completion_tokens)
+            choice = response.choices[0]
+            if not isinstance(choice, Choices):
+                raise Exception(
+                    f"Failed to get response from {self.model}, choice is not a Choices object"
+                )
+            response_content = choice.message.content
+            if response_content is None:
+                raise Exception(
+                    f"Failed to get message response from {self.model}, message does not exist"
+                )
+            return response_content
 
+        recorder = CallRecorder(self, prompt)
         cached_response = self.cache.get(prompt)
         if cached_response is not None:
+            recorder.finish(cached_response, cache_hit=True)
             return cached_response
-        response = await get_litellm_response()
+
+        def send() -> Awaitable[str]:
+            if self.hedger is None:
+                return get_litellm_response()
+            return self.hedger.send(get_litellm_response, recorder)
+
+        try:
+            response = await send_with_retries(
+                send,
+                recorder,
+                self.model,
+                self.max_retries,
+                create_backoff(
+                    self.starting_wait_time, self.jitter_growth, self.exp_delay_base
+                ),
+                classify=classify_litellm_error,
+                circuit_breaker=self.circuit_breaker,
+            )
+        except Exception as e:
+            recorder.finish(error=e)
+            raise
         self.cache.put(prompt, response)
+        recorder.finish(response)
         return response
 
     def get_token_count(self, text: str) -> int:
@@ -202,4 +270,4 @@ class LiteLLMService:
         int
             The number of tokens in the text.
         """
-        return len(self.encoder.encode(text))
+        return count_tokens(self.encoder, text)
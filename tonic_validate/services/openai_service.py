@@ -1,15 +1,81 @@
-import asyncio
 import logging
 import os
-import random
-from openai import AsyncAzureOpenAI, BadRequestError, AsyncOpenAI, RateLimitError
+from typing import TYPE_CHECKING, Awaitable, List, Optional
+from openai import AsyncAzureOpenAI, AsyncOpenAI
 from tiktoken import Encoding
 
-from tonic_validate.classes.exceptions import ContextLengthException, LLMException
+from tonic_validate.services.endpoint_pool import Endpoint, EndpointPool
+from tonic_validate.utils.circuit_breaker import CircuitBreaker
+from tonic_validate.utils.hedging import RequestHedger
+from tonic_validate.utils.instrumentation import CallRecorder, LLMCallListener
 from tonic_validate.utils.llm_cache import LLMCache
+from tonic_validate.utils.model_info import get_context_window
+from tonic_validate.utils.retry_policy import (
+    EXP_DELAY_BASE_DEPRECATION,
+    create_backoff,
+    send_with_retries,
+)
+from tonic_validate.utils.token_budget import ContextLengthPolicy
+from tonic_validate.utils.token_counter import count_tokens
+
+if TYPE_CHECKING:
+    import httpx
 
 logger = logging.getLogger()
 
+SYSTEM_MESSAGE = "You are a helpful assistant. Respond using markdown."
+
+
+def openai_provider() -> str:
+    """The provider the OpenAI client calls given the environment: "azure", "openai"
+    or "openrouter"."""
+    # Check if AZURE_OPENAI_API_KEY is set and if so then use AzureOpenAI
+    if "AZURE_OPENAI_API_KEY" in os.environ:
+        if "AZURE_OPENAI_ENDPOINT" not in os.environ:
+            raise Exception(
+                "AZURE_OPENAI_ENDPOINT must be set in the environment when using AzureOpenAI"
+            )
+        return "azure"
+    elif "OPENAI_API_KEY" in os.environ:
+        return "openai"
+    elif "OPENROUTR_API_KEY" in os.environ:
+        return "openrouter"
+    raise Exception(
+        "OPENAI_API_KEY or AZURE_OPENAI_API_KEY must be set in the environment"
+    )
+
+
+def create_openai_client(
+    http_client: Optional["httpx.AsyncClient"] = None,
+) -> AsyncOpenAI:
+    """
+    Creates the client for the provider that the environment has credentials for
+
+    Parameters
+    ----------
+    http_client: Optional[httpx.AsyncClient]
+        The HTTP client whose connection pool the client sends its requests over. If
+        not set, the client creates its own.
+
+    Returns
+    -------
+    AsyncOpenAI
+        An AsyncAzureOpenAI client if AZURE_OPENAI_API_KEY is set, otherwise a client
+        for OpenAI or OpenRouter.
+    """
+    provider = openai_provider()
+    if provider == "azure":
+        return AsyncAzureOpenAI(
+            api_version="2023-12-01-preview", http_client=http_client
+        )
+    elif provider == "openai":
+        return AsyncOpenAI(http_client=http_client)
+    return AsyncOpenAI(
+        base_url="https://openrouter.ai/api/v1",
+        api_key=os.environ["OPENROUTR_API_KEY"],
+        http_client=http_client,
+    )
+
 
 class OpenAIService:
     def __init__(
@@ -18,7 +84,16 @@ class OpenAIService:
         model: str = "gpt-4-1106-preview",
         starting_wait_time: float = 1.0,
         max_retries: int = 10,
-        exp_delay_base: int = 2,
+        exp_delay_base: Optional[int] = None,
+        context_length_policy: ContextLengthPolicy = ContextLengthPolicy.PROVIDER,
+        context_window: Optional[int] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        request_timeout: Optional[float] = None,
+        hedger: Optional[RequestHedger] = None,
+        client: Optional[AsyncOpenAI] = None,
+        cache: Optional[LLMCache] = None,
+        endpoint_pool: Optional[EndpointPool] = None,
+        jitter_growth: float = 3.0,
     ) -> None:
         """
         The OpenAIService class is a wrapper around the OpenAI and AzureOpenAI clients.
@@ -32,35 +107,64 @@ class OpenAIService:
         starting_wait_time: float
             The starting wait time between retries.
         max_retries: int
-            The maximum number of retries to attempt.
-        exp_delay_base: int
-            Base for exponential back off delay between retries.
+            The maximum number of requests to send for a prompt. Requests that fail
+            with an error that retrying can't fix, e.g. an invalid API key, are not
+            retried (see retry_policy).
+        exp_delay_base: Optional[int]
+            Deprecated, use jitter_growth. If set, each wait between retries is the
+            previous wait times exp_delay_base and a random factor between 1 and 1.2,
+            as before the waits were drawn with decorrelated jitter.
+        context_length_policy: ContextLengthPolicy
+            What to do with prompts that do not fit in the model's context window.
+        context_window: Optional[int]
+            The context window of the model in tokens. If not set, it is looked up from
+            the model name.
+        circuit_breaker: Optional[CircuitBreaker]
+            Stops sending requests while too many of them fail, e.g. during an outage
+            of the provider.
+        request_timeout: Optional[float]
+            The time in seconds after which a request is abandoned and retried. If not
+            set, the client's default is used.
+        hedger: Optional[RequestHedger]
+            Sends a second request for prompts whose first request is slow.
+        client: Optional[AsyncOpenAI]
+            The client to send the requests with, e.g. one shared with other services.
+            If not set, a client is created from the environment (see
+            create_openai_client).
+        cache: Optional[LLMCache]
+            The cache of the responses, e.g. one shared with other services of the
+            same model. If not set, the service gets its own cache.
+        endpoint_pool: Optional[EndpointPool]
+            The endpoints to spread the requests over, e.g. Azure deployments in
+            several regions. If set, the requests are sent with the clients of the
+            endpoints and no client is created from the environment.
+        jitter_growth: float
+            The longest wait between retries as a multiple of the previous wait. The
+            waits are drawn with decorrelated jitter.
         """
 
-        # Check if AZURE_OPENAI_API_KEY is set and if so then use AzureOpenAI
-        if "AZURE_OPENAI_API_KEY" in os.environ:
-            if "AZURE_OPENAI_ENDPOINT" not in os.environ:
-                raise Exception(
-                    "AZURE_OPENAI_ENDPOINT must be set in the environment when using AzureOpenAI"
-                )
-            self.client = AsyncAzureOpenAI(api_version="2023-12-01-preview")
-        elif "OPENAI_API_KEY" in os.environ:
-            self.client = AsyncOpenAI()
-        elif "OPENROUTR_API_KEY" in os.environ:
-            self.client = AsyncOpenAI(
-                base_url="https://openrouter.ai/api/v1",
-                api_key=os.environ["OPENROUTR_API_KEY"],
-            )
-        else:
-            raise Exception(
-                "OPENAI_API_KEY or AZURE_OPENAI_API_KEY must be set in the environment"
-            )
+        self.endpoint_pool = endpoint_pool
+        if client is None and endpoint_pool is None:
+            client = create_openai_client()
+        self.client: Optional[AsyncOpenAI] = client
         self.model = model
         self.encoder = encoder
         self.max_retries = max_retries
+        if exp_delay_base is not None:
+            logger.warning(EXP_DELAY_BASE_DEPRECATION)
         self.exp_delay_base = exp_delay_base
+        self.jitter_growth = jitter_growth
         self.starting_wait_time = starting_wait_time
-        self.cache = LLMCache()
+        self.cache = cache if cache is not None else LLMCache()
+        # Called with an LLMCallEvent after every get_response call
+        self.listeners: List[LLMCallListener] = []
+        self.context_length_policy = context_length_policy
+        self.context_window = (
+            context_window if context_window is not None else get_context_window(model)
+        )
+        self.circuit_breaker = circuit_breaker
+        self.request_timeout = request_timeout
+        self.hedger = hedger
 
     async def get_response(self, prompt: str) -> str:
         """
@@ -77,56 +181,84 @@ class OpenAIService:
             The response from the language model.
         """
 
-        async def get_openai_response():
-            num_retries = 0
-            wait_time = self.starting_wait_time
-            while num_retries < self.max_retries:
-                random_value = random.randrange(0, 20) * 0.01
-                wait_time_multiplier = self.exp_delay_base * (1 + random_value)
-                try:
-                    completion = await self.client.chat.completions.create(
-                        model=self.model,
-                        messages=[
-                            {
-                                "role": "system",
-                                "content": "You are a helpful assistant. Respond using markdown.",
-                            },
-                            {"role": "user", "content": prompt},
-                        ],
-                        temperature=0.0,
-                    )
-                    response = completion.choices[0].message.content
-                    if response is None:
-                        raise Exception(
-                            f"Failed to get message response from {self.model}, message does not exist"
-                        )
-                    return response
-                except BadRequestError as e:
-                    if e.code == "context_length_exceeded":
-                        raise ContextLengthException(e.message)
-                except RateLimitError:
-                    log_message = (
-                        "hit openai.error.RateLimitError and entered retry "
-                        f"logic, num_retries={num_retries}"
-                    )
-                    logger.debug(log_message)
-                    await asyncio.sleep(wait_time)
-                    wait_time *= wait_time_multiplier
-                except Exception as e:
-                    logger.warning(e)
-                    await asyncio.sleep(wait_time)
-                    wait_time *= wait_time_multiplier
-                num_retries += 1
-            raise LLMException(
-                f"Failed to get completion response from {self.model}, max retires hit"
+        async def get_openai_response(endpoint: Optional[Endpoint] = None) -> str:
+            options = {}
+            if self.request_timeout is not None:
+                options["timeout"] = self.request_timeout
+            request = dict(
+                model=self.model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": SYSTEM_MESSAGE,
+                    },
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0.0,
+                **options,
             )
+            if endpoint is None:
+                assert self.client is not None
+                completion = await self.client.chat.completions.create(**request)
+            else:
+                if endpoint.model is not None:
+                    request["model"] = endpoint.model
+                # The headers of the raw response report the quota left on the endpoint
+                raw_response = (
+                    await endpoint.client.chat.completions.with_raw_response.create(
+                        **request
+                    )
+                )
+                completion = raw_response.parse()
+                endpoint.record_usage(
+                    completion.usage.total_tokens if completion.usage else 0,
+                    raw_response.headers,
+                )
+            if completion.usage is not None:
+                recorder.usage(
+                    completion.usage.prompt_tokens,
+                    completion.usage.completion_tokens,
+                )
+            response = completion.choices[0].message.content
+            if response is None:
+                raise Exception(
+                    f"Failed to get message response from {self.model}, message does not exist"
+                )
+            return response
 
+        recorder = CallRecorder(self, prompt)
         cached_response = self.cache.get(prompt)
         if cached_response is not None:
+            recorder.finish(cached_response, cache_hit=True)
             return cached_response
-        response = await get_openai_response()
+
+        def send_once() -> Awaitable[str]:
+            if self.endpoint_pool is None:
+                return get_openai_response()
+            return self.endpoint_pool.send(get_openai_response, recorder)
+
+        def send() -> Awaitable[str]:
+            if self.hedger is None:
+                return send_once()
+            return self.hedger.send(send_once, recorder)
+
+        try:
+            response = await send_with_retries(
+                send,
+                recorder,
+                self.model,
+                self.max_retries,
+                create_backoff(
+                    self.starting_wait_time, self.jitter_growth, self.exp_delay_base
+                ),
+                circuit_breaker=self.circuit_breaker,
+            )
+        except Exception as e:
+            recorder.finish(error=e)
+            raise
         self.cache.put(prompt, response)
+        recorder.finish(response)
         return response
 
     def get_token_count(self, text: str) -> int:
-        return len(self.encoder.encode(text))
+        return count_tokens(self.encoder, text)
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple, Union
+
+from tonic_validate.services.staged_llm_service import StagedLLMService
+from tonic_validate.utils.instrumentation import (
+    CallRecorder,
+    current_item,
+    current_metric,
+)
+from tonic_validate.utils.prefilter import Judgment
+from tonic_validate.utils.token_budget import ContextLengthPolicy
+
+logger = logging.getLogger()
+
+
+class PlannedLLMService(StagedLLMService):
+    def __init__(self, llm_service: Any, max_concurrency: int = 50) -> None:
+        """
+        The PlannedLLMService class plans the prompts of every item before sending
+        them to another service, so that it can optimize across items and metrics.
+
+        The prompts of each stage (see StagedLLMService) are collected first. Identical
+        prompts, e.g. the same context chunk judged for the same question in different
+        items, are sent once. The prompts are sent in sorted order, so that prompts
+        that share a prefix, like a prompt template followed by the same question or
+        answer, are sent one after the other, which suits the prompt caches of the
+        providers. They are sent with up to max_concurrency calls at once.
+
+        The scorer creates one for every service of a run if plan_prompts is set.
+
+        Parameters
+        ----------
+        llm_service: Any
+            The service that the prompts are sent to.
+        max_concurrency: int
+            The maximum number of calls to llm_service at once.
+        """
+        super().__init__()
+        self.llm_service = llm_service
+        self.max_concurrency = max_concurrency
+        self.model = llm_service.model
+        self.encoder = getattr(llm_service, "encoder", None)
+        self.context_length_policy = getattr(
+            llm_service, "context_length_policy", ContextLengthPolicy.PROVIDER
+        )
+        self.context_window = getattr(llm_service, "context_window", None)
+        # Calls answered by another item's call are reported to the same listeners
+        self.listeners = getattr(llm_service, "listeners", [])
+        # The judgment of every waiting prompt, and the metric and item that asked first
+        self.__origins: Dict[
+            str, Tuple[Optional[Judgment], Optional[str], Optional[int]]
+        ] = {}
+        self.num_prompts = 0
+        self.num_deduplicated = 0
+
+    def get_token_count(self, text: str) -> int:
+        return self.llm_service.get_token_count(text)
+
+    async def get_response(
+        self, prompt: str, judgment: Optional[Judgment] = None
+    ) -> str:
+        """
+        Retrieves a response from the service, once every item has planned the
+        prompts of the current stage
+
+        Parameters
+        ----------
+        prompt: str
+            The prompt to send to the service.
+        judgment: Optional[Judgment]
+            The judgment the prompt asks for, passed on to services that use it.
+
+        Returns
+        -------
+        str
+            The response from the service.
+        """
+        self.num_prompts += 1
+        prompt_id = self.prompt_id(prompt)
+        duplicate = self.is_waiting(prompt_id)
+        if duplicate:
+            self.num_deduplicated += 1
+        else:
+            self.__origins[prompt_id] = (
+                judgment,
+                current_metric.get(),
+                current_item.get(),
+            )
+        result: Union[str, BaseException] = await self.stage(prompt_id, prompt)
+        if isinstance(result, BaseException):
+            raise result
+        if duplicate:
+            CallRecorder(self, prompt).finish(result, cache_hit=True)
+        return result
+
+    async def execute_stage(
+        self, prompts: Dict[str, str]
+    ) -> Dict[str, Union[str, BaseException]]:
+        """Sends the prompts of a stage in sorted order."""
+        from tonic_validate.utils.llm_calls import get_judgment_response
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def send(prompt_id: str) -> Union[str, BaseException]:
+            judgment, metric, item_index = self.__origins.pop(prompt_id)
+            # Attribute the call to the first item that asked for it
+            current_metric.set(metric)
+            current_item.set(item_index)
+            async with semaphore:
+                try:
+                    if judgment is None:
+                        return await self.llm_service.get_response(prompts[prompt_id])
+                    return await get_judgment_response(
+                        self.llm_service, prompts[prompt_id], judgment
+                    )
+                except Exception as e:
+                    return e
+
+        prompt_ids = sorted(prompts, key=prompts.__getitem__)
+        logger.debug(f"Sending {len(prompt_ids)} planned prompts to {self.model}")
+        results = await asyncio.gather(*[send(prompt_id) for prompt_id in prompt_ids])
+        return dict(zip(prompt_ids, results))
@@ -0,0 +1,104 @@
+from typing import Any, Optional
+
+from tonic_validate.utils.circuit_breaker import CircuitBreaker
+from tonic_validate.utils.hedging import RequestHedger
+from tonic_validate.utils.llm_cache import LLMCache
+from tonic_validate.utils.token_budget import ContextLengthPolicy
+from tonic_validate.utils.token_counter import get_encoder
+
+# Models whose names start with one of these are called through LiteLLM, every other
+# model through the OpenAI client
+LITELLM_MODEL_PREFIXES = (
+    "gemini",
+    "claude",
+    "command",
+    "mistral",
+    "together_ai",
+    "bedrock",
+    "sagemaker",
+)
+
+
+def create_llm_service(
+    model_evaluator: str,
+    max_retries: int = 10,
+    model_id: str = "",
+    context_length_policy: ContextLengthPolicy = ContextLengthPolicy.PROVIDER,
+    context_window: Optional[int] = None,
+    circuit_breaker: Optional[CircuitBreaker] = None,
+    request_timeout: Optional[float] = None,
+    hedger: Optional[RequestHedger] = None,
+    client: Optional[Any] = None,
+    cache: Optional[LLMCache] = None,
+) -> Any:
+    """
+    Creates the service that calls an evaluator model
+
+    Every call creates a new service with its own cache and retries, unless a cache is
+    passed in. The encoder is shared with every other service for the same model. See
+    ServiceRegistry for services that share their clients and caches.
+
+    Parameters
+    ----------
+    model_evaluator: str
+        The model to be used for scoring.
+    max_retries: int
+        The number of times to retry a failed llm request.
+    model_id: str
+        The model id for AWS Sagemaker endpoints.
+    context_length_policy: ContextLengthPolicy
+        What to do with prompts that do not fit in the model's context window.
+    context_window: Optional[int]
+        The context window of the model in tokens, if it can't be looked up from the
+        model name.
+    circuit_breaker: Optional[CircuitBreaker]
+        The circuit breaker of the service. It should not be shared with the service
+        of another model.
+    request_timeout: Optional[float]
+        The time in seconds after which a request is abandoned and retried.
+    hedger: Optional[RequestHedger]
+        Sends a second request for prompts whose first request is slow. Like the
+        circuit breaker, it should not be shared with the service of another model.
+    client: Optional[AsyncOpenAI]
+        The client of an OpenAIService, e.g. one shared with other services. Not used
+        by LiteLLMService.
+    cache: Optional[LLMCache]
+        The cache of the service, e.g. one shared with other services of the model.
+
+    Returns
+    -------
+    Union[LiteLLMService, OpenAIService]
+        A LiteLLMService for the models in LITELLM_MODEL_PREFIXES, otherwise an
+        OpenAIService.
+    """
+    encoder = get_encoder(model_evaluator)
+    if model_evaluator.lower().startswith(LITELLM_MODEL_PREFIXES):
+        from tonic_validate.services.litellm_service import LiteLLMService
+
+        return LiteLLMService(
+            encoder,
+            model_evaluator,
+            max_retries=max_retries,
+            model_id=model_id,
+            context_length_policy=context_length_policy,
+            context_window=context_window,
+            circuit_breaker=circuit_breaker,
+            request_timeout=request_timeout,
+            hedger=hedger,
+            cache=cache,
+        )
+
+    from tonic_validate.services.openai_service import OpenAIService
+
+    return OpenAIService(
+        encoder,
+        model_evaluator,
+        max_retries=max_retries,
+        context_length_policy=context_length_policy,
+        context_window=context_window,
+        circuit_breaker=circuit_breaker,
+        request_timeout=request_timeout,
+        hedger=hedger,
+        client=client,
+        cache=cache,
+    )
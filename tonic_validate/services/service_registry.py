@@ -0,0 +1,239 @@
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import field
+from typing import Any, Dict, Optional, Tuple
+
+from pydantic import ConfigDict
+from pydantic.dataclasses import dataclass
+
+from tonic_validate.services.service_factory import (
+    LITELLM_MODEL_PREFIXES,
+    create_llm_service,
+)
+from tonic_validate.utils.circuit_breaker import CircuitBreaker
+from tonic_validate.utils.event_loop_runner import EventLoopRunner
+from tonic_validate.utils.hedging import RequestHedger
+from tonic_validate.utils.llm_cache import LLMCache
+from tonic_validate.utils.token_budget import ContextLengthPolicy
+
+logger = logging.getLogger()
+
+# The environment variables that hold the credentials of the providers. Services whose
+# credentials differ never share a client or a cache.
+CREDENTIAL_VARIABLES = (
+    "OPENAI_API_KEY",
+    "AZURE_OPENAI_API_KEY",
+    "AZURE_OPENAI_ENDPOINT",
+    "OPENROUTR_API_KEY",
+    "GEMINI_API_KEY",
+    "ANTHROPIC_API_KEY",
+    "COHERE_API_KEY",
+    "MISTRAL_API_KEY",
+    "TOGETHERAI_API_KEY",
+    "AWS_ACCESS_KEY_ID",
+    "AWS_SECRET_ACCESS_KEY",
+    "AWS_REGION_NAME",
+)
+
+# (provider, credentials fingerprint)
+ClientKey = Tuple[str, str]
+# (provider, model, credentials fingerprint)
+ServiceKey = Tuple[str, str, str]
+
+
+def credentials_fingerprint() -> str:
+    """A hash of the provider credentials in the environment, which keys the shared
+    clients without keeping the credentials themselves."""
+    digest = hashlib.sha256()
+    for name in CREDENTIAL_VARIABLES:
+        digest.update(f"{name}={os.environ.get(name, '')}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def provider_of(model_evaluator: str) -> str:
+    """The provider that serves a model, e.g. "openai", "azure" or "gemini"."""
+    model = model_evaluator.lower()
+    for prefix in LITELLM_MODEL_PREFIXES:
+        if model.startswith(prefix):
+            return prefix
+    from tonic_validate.services.openai_service import openai_provider
+
+    return openai_provider()
+
+
+@dataclass(config=ConfigDict(arbitrary_types_allowed=True))
+class SharedResources:
+    """
+    What the registry's services of one model share.
+
+    Parameters
+    ----------
+    cache: LLMCache
+        The cache of the responses.
+    circuit_breaker: Optional[CircuitBreaker]
+        The circuit breaker, if a service asked for one.
+    hedger: Optional[RequestHedger]
+        The hedger, if a service asked for one.
+    """
+
+    cache: LLMCache = field(default_factory=LLMCache)
+    circuit_breaker: Optional[CircuitBreaker] = None
+    hedger: Optional[RequestHedger] = None
+
+
+class ServiceRegistry:
+    """
+    Creates evaluator services that share their clients, caches, circuit breakers and
+    hedgers with the other services of the same model and credentials, e.g. those of
+    several scorers.
+
+    Every OpenAIService the factory creates opens its own connection pool and has its
+    own cache, so scorers that evaluate with the same model open new connections,
+    send the prompts another scorer already sent and back off independently from a
+    failing provider. The services of a registry send their requests through one
+    client per provider and credentials, whose pool has the registry's limits, and
+    share the cache, circuit breaker and hedger of their model.
+
+    The connections of a client belong to the event loop they were opened on, so the
+    scorers of a registry run their synchronous methods on the registry's event loop.
+    The async methods of those scorers should be awaited on one loop too.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        max_connections: int
+            The maximum number of connections open at once to each provider.
+        max_keepalive_connections: int
+            The maximum number of idle connections kept open to each provider.
+        keepalive_expiry: float
+            The time in seconds after which an idle connection is closed.
+        """
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.runner = EventLoopRunner("tonic-validate-service-registry")
+        self.__lock = threading.Lock()
+        self.__clients: Dict[ClientKey, Any] = {}
+        self.__resources: Dict[ServiceKey, SharedResources] = {}
+
+    def create_llm_service(
+        self,
+        model_evaluator: str,
+        max_retries: int = 10,
+        model_id: str = "",
+        context_length_policy: ContextLengthPolicy = ContextLengthPolicy.PROVIDER,
+        context_window: Optional[int] = None,
+        request_timeout: Optional[float] = None,
+        circuit_breaker_error_rate: Optional[float] = None,
+        hedge_requests: bool = False,
+    ) -> Any:
+        """
+        Creates the service that calls an evaluator model, like create_llm_service, with
+        the client, cache, circuit breaker and hedger it shares with the registry's
+        other services of the model
+
+        Parameters
+        ----------
+        model_evaluator: str
+            The model to be used for scoring.
+        max_retries: int
+            The number of times to retry a failed llm request.
+        model_id: str
+            The model id for AWS Sagemaker endpoints.
+        context_length_policy: ContextLengthPolicy
+            What to do with prompts that do not fit in the model's context window.
+        context_window: Optional[int]
+            The context window of the model in tokens, if it can't be looked up from
+            the model name.
+        request_timeout: Optional[float]
+            The time in seconds after which a request is abandoned and retried.
+        circuit_breaker_error_rate: Optional[float]
+            If set and the model has no circuit breaker yet, the model gets one that
+            opens once this fraction of the recent requests failed. A model keeps the
+            circuit breaker its first service asked for.
+        hedge_requests: bool
+            If True and the model has no hedger yet, the model gets one.
+
+        Returns
+        -------
+        Union[LiteLLMService, OpenAIService]
+            The service of the model.
+        """
+        provider = provider_of(model_evaluator)
+        fingerprint = credentials_fingerprint()
+        with self.__lock:
+            resources = self.__resources.setdefault(
+                (provider, model_evaluator, fingerprint), SharedResources()
+            )
+            if (
+                resources.circuit_breaker is None
+                and circuit_breaker_error_rate is not None
+            ):
+                resources.circuit_breaker = CircuitBreaker(
+                    error_rate=circuit_breaker_error_rate
+                )
+            if resources.hedger is None and hedge_requests:
+                resources.hedger = RequestHedger()
+            client = None
+            if not model_evaluator.lower().startswith(LITELLM_MODEL_PREFIXES):
+                # LiteLLM keeps its own clients, which it reuses between calls
+                client = self.__clients.get((provider, fingerprint))
+                if client is None:
+                    client = self.__create_client()
+                    self.__clients[(provider, fingerprint)] = client
+        return create_llm_service(
+            model_evaluator,
+            max_retries=max_retries,
+            model_id=model_id,
+            context_length_policy=context_length_policy,
+            context_window=context_window,
+            circuit_breaker=resources.circuit_breaker,
+            request_timeout=request_timeout,
+            hedger=resources.hedger,
+            client=client,
+            cache=resources.cache,
+        )
+
+    def __create_client(self) -> Any:
+        import httpx
+        from tonic_validate.services.openai_service import create_openai_client
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(600.0, connect=5.0),
+            follow_redirects=True,
+        )
+        return create_openai_client(http_client)
+
+    def close(self) -> None:
+        """Closes the connections of the shared clients and stops the event loop.
+
+        The services created so far can't send requests after it.
+        """
+        with self.__lock:
+            clients = list(self.__clients.values())
+            self.__clients.clear()
+        if clients and self.runner.is_running:
+
+            async def close_clients() -> None:
+                for client in clients:
+                    await client.close()
+
+            try:
+                self.runner.run(close_clients())
+            except Exception as e:
+                logger.debug(f"Failed to close the clients of the registry: {e!r}")
+        self.runner.close()
@@ -0,0 +1,245 @@
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, Iterator, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+class StageTracker:
+    """
+    Counts the branches of a run that can still add prompts to a stage, e.g. the
+    scoring of each item, and the calls that wait for a stage, so that run_staged
+    executes a stage as soon as every branch waits.
+
+    A branch that awaits several calls at once with gather_staged is replaced by one
+    branch per call until they are done.
+    """
+
+    def __init__(self) -> None:
+        self.active = 0
+        self.waiting = 0
+        self.__waiting_by_future: Dict["asyncio.Future[Any]", int] = {}
+        self.__all_waiting = asyncio.Event()
+
+    @property
+    def all_waiting(self) -> bool:
+        """Whether calls wait for a stage and no branch can add more prompts."""
+        return self.waiting > 0 and self.waiting >= self.active
+
+    async def wait_until_all_waiting(self) -> None:
+        await self.__all_waiting.wait()
+
+    def add_branches(self, count: int) -> None:
+        self.active += count
+        self.__update()
+
+    async def wait(self, future: "asyncio.Future[T]") -> T:
+        """Waits for the stage that resolves the future of a prompt."""
+        self.waiting += 1
+        self.__waiting_by_future[future] = self.__waiting_by_future.get(future, 0) + 1
+        self.__update()
+        return await future
+
+    def resolved(self, future: "asyncio.Future[Any]") -> None:
+        """Stops counting the calls that wait for a future once it is resolved, before
+        they get to run again."""
+        self.waiting -= self.__waiting_by_future.pop(future, 0)
+        self.__update()
+
+    def __update(self) -> None:
+        if self.all_waiting:
+            self.__all_waiting.set()
+        else:
+            self.__all_waiting.clear()
+
+
+# The tracker of the run_staged call the current task belongs to
+current_stage_tracker: ContextVar[Optional[StageTracker]] = ContextVar(
+    "current_stage_tracker", default=None
+)
+
+
+@contextmanager
+def staged_branch() -> Iterator[None]:
+    """Counts the code in the block as a branch that can add prompts to a stage, e.g.
+    the scoring of an item."""
+    tracker = current_stage_tracker.get()
+    if tracker is None:
+        yield
+        return
+    tracker.add_branches(1)
+    try:
+        yield
+    finally:
+        tracker.add_branches(-1)
+
+
+async def gather_staged(*awaitables: Awaitable[T]) -> List[T]:
+    """Like asyncio.gather, but the current branch is counted as one branch per
+    awaitable until they are done."""
+    tracker = current_stage_tracker.get()
+    if tracker is None:
+        return list(await asyncio.gather(*awaitables))
+
+    async def branch(awaitable: Awaitable[T]) -> T:
+        try:
+            return await awaitable
+        finally:
+            tracker.add_branches(-1)
+
+    tracker.add_branches(len(awaitables) - 1)
+    try:
+        return list(
+            await asyncio.gather(*[branch(awaitable) for awaitable in awaitables])
+        )
+    finally:
+        tracker.add_branches(1)
+
+
+class StagedLLMService(ABC):
+    """
+    Base class of the services that collect the prompts of every item before sending
+    any of them.
+
+    get_response calls wait in stage until every branch of the run waits (see
+    StageTracker), and then run_staged calls flush, which executes all waiting prompts at once with
+    execute_stage. Identical prompts are executed once. The items then continue until
+    they wait for their next prompts, e.g. the statements of the main points of an
+    answer, which form the next stage.
+    """
+
+    def __init__(self) -> None:
+        self._pending: Dict[str, str] = {}
+        self._waiters: Dict[str, "asyncio.Future[Any]"] = {}
+
+    @staticmethod
+    def prompt_id(prompt: str) -> str:
+        """The id of a prompt, the same for the same prompt."""
+        return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    @property
+    def num_pending(self) -> int:
+        """The number of prompts that wait for the next stage."""
+        return len(self._pending)
+
+    def is_waiting(self, prompt_id: str) -> bool:
+        """Whether the prompt already waits for the next stage."""
+        return prompt_id in self._waiters
+
+    async def stage(self, prompt_id: str, prompt: str) -> Any:
+        """
+        Waits for the next stage to execute a prompt
+
+        Parameters
+        ----------
+        prompt_id: str
+            The id of the prompt.
+        prompt: str
+            The prompt.
+
+        Returns
+        -------
+        Any
+            The result execute_stage returned for the prompt.
+        """
+        if prompt_id not in self._waiters:
+            self._waiters[prompt_id] = asyncio.get_running_loop().create_future()
+            self._pending[prompt_id] = prompt
+        tracker = current_stage_tracker.get()
+        if tracker is None:
+            return await self._waiters[prompt_id]
+        return await tracker.wait(self._waiters[prompt_id])
+
+    @abstractmethod
+    async def execute_stage(self, prompts: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Executes the prompts of a stage
+
+        Parameters
+        ----------
+        prompts: Dict[str, str]
+            The prompts by id.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The result of each prompt by id.
+        """
+        pass
+
+    async def flush(self) -> None:
+        """Executes the waiting prompts and hands their results to the waiting calls."""
+        pending = self._pending
+        self._pending = {}
+        tracker = current_stage_tracker.get()
+        try:
+            results = await self.execute_stage(pending)
+        except BaseException:
+            # The calls can't get their results
+            for prompt_id in pending:
+                waiter = self._waiters.pop(prompt_id)
+                waiter.cancel()
+                if tracker is not None:
+                    tracker.resolved(waiter)
+            raise
+        for prompt_id in pending:
+            waiter = self._waiters.pop(prompt_id)
+            waiter.set_result(results.get(prompt_id))
+            if tracker is not None:
+                tracker.resolved(waiter)
+
+
+async def run_staged(
+    coroutine: Awaitable[T], staged_services: Sequence[StagedLLMService]
+) -> T:
+    """
+    Runs a coroutine that makes calls to staged services, executing the waiting
+    prompts whenever the coroutine can't continue without them
+
+    Parameters
+    ----------
+    coroutine: Awaitable[T]
+        The coroutine, e.g. the scoring of a run.
+    staged_services: Sequence[StagedLLMService]
+        The staged services the coroutine calls.
+
+    Returns
+    -------
+    T
+        The result of the coroutine.
+    """
+    tracker = StageTracker()
+    token = current_stage_tracker.set(tracker)
+    # The tasks of the coroutine inherit the tracker
+    task = asyncio.ensure_future(coroutine)
+    try:
+        while not task.done():
+            all_waiting = asyncio.ensure_future(tracker.wait_until_all_waiting())
+            try:
+                await asyncio.wait(
+                    {task, all_waiting}, return_when=asyncio.FIRST_COMPLETED
+                )
+            finally:
+                all_waiting.cancel()
+            if task.done() or not tracker.all_waiting:
+                continue
+            if not any(service.num_pending > 0 for service in staged_services):
+                raise RuntimeError(
+                    "Calls wait for a stage of a service that run_staged does not "
+                    "execute"
+                )
+            await asyncio.gather(
+                *[
+                    service.flush()
+                    for service in staged_services
+                    if service.num_pending > 0
+                ]
+            )
+    finally:
+        current_stage_tracker.reset(token)
+        if not task.done():
+            task.cancel()
+    return task.result()
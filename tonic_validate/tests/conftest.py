@@ -0,0 +1,44 @@
+from typing import Callable, List, Optional, Sequence
+
+import pytest
+from tonic_validate.classes import Benchmark, LLMResponse
+
+DEFAULT_CONTEXT = ("Ryan has a dog named Fido.", "Fido likes walks.")
+
+
+@pytest.fixture(autouse=True)
+def no_telemetry(monkeypatch):
+    monkeypatch.setenv("TONIC_VALIDATE_DO_NOT_TRACK", "true")
+
+
+@pytest.fixture
+def make_responses() -> Callable[..., List[LLMResponse]]:
+    def make(
+        num_items: Optional[int] = None,
+        llm_answers: Optional[Sequence[str]] = None,
+        llm_context_list: Sequence[str] = DEFAULT_CONTEXT,
+        questions: Optional[Sequence[str]] = None,
+        answers: Optional[Sequence[str]] = None,
+    ) -> List[LLMResponse]:
+        """Makes responses about dogs named Fido, by default one item with "Fido" as
+        reference and LLM answer. The number of items is num_items, or else the
+        number of LLM answers."""
+        if num_items is None:
+            num_items = len(llm_answers) if llm_answers is not None else 1
+        if questions is None:
+            questions = [f"What is the name of dog {i}?" for i in range(num_items)]
+        if answers is None:
+            answers = ["Fido"] * num_items
+        if llm_answers is None:
+            llm_answers = ["Fido"] * num_items
+        benchmark = Benchmark(questions=list(questions), answers=list(answers))
+        return [
+            LLMResponse(
+                llm_answer=llm_answer,
+                llm_context_list=list(llm_context_list),
+                benchmark_item=item,
+            )
+            for item, llm_answer in zip(benchmark.items, llm_answers)
+        ]
+
+    return make
@@ -0,0 +1,147 @@
+import json
+
+import pytest
+from tonic_validate import ValidateScorer
+from tonic_validate.metrics import (
+    AnswerConsistencyMetric,
+    AnswerSimilarityMetric,
+    AugmentationPrecisionMetric,
+)
+from tonic_validate.services.batch_llm_service import BatchLLMService
+from tonic_validate.services.fake_llm_service import FakeBatchClient
+from tonic_validate.utils.model_info import estimate_cost
+from tonic_validate.utils.llm_calls import similarity_score_prompt
+
+
+class InterruptedBatchClient(FakeBatchClient):
+    """Fails while getting results until it is resumed."""
+
+    interrupted = True
+
+    async def results(self, job_id):
+        if self.interrupted:
+            raise KeyboardInterrupt()
+        return await super().results(job_id)
+
+
+def dog_answers(num_items: int):
+    return [f"Fido is dog {i}" for i in range(num_items)]
+
+
+def test_every_item_is_scored_in_one_job_per_stage(make_responses):
+    client = FakeBatchClient(polls_until_done=2)
+    service = BatchLLMService(client, "gpt-4o-mini", poll_interval=0)
+    scorer = ValidateScorer(
+        [
+            AnswerSimilarityMetric(),
+            AnswerConsistencyMetric(),
+            AugmentationPrecisionMetric(),
+        ],
+        llm_service=service,
+    )
+    run = scorer.score_responses(
+        make_responses(llm_answers=dog_answers(20)), parallelism=2
+    )
+
+    assert run.overall_scores == {
+        "answer_similarity": 5.0,
+        "answer_consistency": 1.0,
+        "augmentation_precision": 1.0,
+    }
+    # The main points have to be known before their statements can be checked
+    assert len(client.jobs) == 2
+    assert len(client.jobs["batch_0"]) == 20 * (1 + 1 + 2 + 2)
+    total = run.stats.total
+    assert total.calls == 20 * 7
+    assert total.cost == pytest.approx(
+        estimate_cost("gpt-4o-mini", total.prompt_tokens, total.completion_tokens) / 2
+    )
+
+
+def test_failed_requests_score_none(make_responses):
+    client = FakeBatchClient(
+        failed_prompts=lambda prompt: (
+            prompt.startswith(similarity_score_prompt()) and "dog 3" in prompt
+        )
+    )
+    scorer = ValidateScorer(
+        [AnswerSimilarityMetric()],
+        llm_service=BatchLLMService(client, "gpt-4o-mini", poll_interval=0),
+    )
+    run = scorer.score_responses(make_responses(llm_answers=dog_answers(5)))
+    scores = [item.scores["answer_similarity"] for item in run.run_data]
+    assert scores == [5.0, 5.0, 5.0, None, 5.0]
+
+
+def test_failed_requests_are_sent_again_on_resume(tmp_path, make_responses):
+    state_path = str(tmp_path / "batch_state.json")
+    client = FakeBatchClient(failed_prompts=lambda prompt: "dog 3" in prompt)
+    scorer = ValidateScorer(
+        [AnswerSimilarityMetric()],
+        llm_service=BatchLLMService(
+            client, "gpt-4o-mini", state_path=state_path, poll_interval=0
+        ),
+    )
+    scorer.score_responses(make_responses(llm_answers=dog_answers(5)))
+
+    client.failed_prompts = None
+    scorer = ValidateScorer(
+        [AnswerSimilarityMetric()],
+        llm_service=BatchLLMService(
+            client, "gpt-4o-mini", state_path=state_path, poll_interval=0
+        ),
+    )
+    run = scorer.score_responses(make_responses(llm_answers=dog_answers(5)))
+    assert run.overall_scores == {"answer_similarity": 5.0}
+    # Only the failed request was sent again
+    assert len(client.jobs["batch_1"]) == 1
+
+
+def test_failed_requests_are_sent_again_by_the_next_run(make_responses):
+    client = FakeBatchClient(failed_prompts=lambda prompt: "dog 3" in prompt)
+    service = BatchLLMService(client, "gpt-4o-mini", poll_interval=0)
+    scorer = ValidateScorer([AnswerSimilarityMetric()], llm_service=service)
+    run = scorer.score_responses(make_responses(llm_answers=dog_answers(5)))
+    assert run.run_data[3].scores["answer_similarity"] is None
+
+    client.failed_prompts = None
+    run = scorer.score_responses(make_responses(llm_answers=dog_answers(5)))
+    assert run.overall_scores == {"answer_similarity": 5.0}
+    # Only the failed request was sent again
+    assert len(client.jobs["batch_1"]) == 1
+
+
+def test_interrupted_run_resumes_its_jobs(tmp_path, make_responses):
+    state_path = str(tmp_path / "batch_state.json")
+    client = InterruptedBatchClient()
+    scorer = ValidateScorer(
+        [AnswerConsistencyMetric()],
+        llm_service=BatchLLMService(
+            client, "gpt-4o-mini", state_path=state_path, poll_interval=0
+        ),
+    )
+    with pytest.raises(KeyboardInterrupt):
+        scorer.score_responses(make_responses(llm_answers=dog_answers(3)))
+    with open(state_path) as f:
+        assert list(json.load(f)["jobs"]) == ["batch_0"]
+
+    client.interrupted = False
+    scorer = ValidateScorer(
+        [AnswerConsistencyMetric()],
+        llm_service=BatchLLMService(
+            client, "gpt-4o-mini", state_path=state_path, poll_interval=0
+        ),
+    )
+    run = scorer.score_responses(make_responses(llm_answers=dog_answers(3)))
+    assert run.overall_scores == {"answer_consistency": 1.0}
+    # The running job was picked up rather than submitted again
+    assert list(client.jobs) == ["batch_0", "batch_1"]
+
+    # A finished run is answered from the saved results
+    service = BatchLLMService(
+        client, "gpt-4o-mini", state_path=state_path, poll_interval=0
+    )
+    ValidateScorer([AnswerConsistencyMetric()], llm_service=service).score_responses(
+        make_responses(llm_answers=dog_answers(3))
+    )
+    assert len(client.jobs) == 2
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from tonic_validate import ValidateScorer
+from tonic_validate.metrics import AnswerSimilarityMetric, RetrievalPrecisionMetric
+from tonic_validate.services.cascade_llm_service import (
+    CascadeLLMService,
+    parse_judgment_response,
+)
+from tonic_validate.services.fake_llm_service import FakeLLMService
+from tonic_validate.utils.prefilter import Judgment
+
+
+def test_parse_judgment_response():
+    assert parse_judgment_response(Judgment.CONTEXT_RELEVANCY, " 'True'") == (
+        True,
+        True,
+    )
+    assert parse_judgment_response(Judgment.CONTEXT_RELEVANCY, "It is false") == (
+        False,
+        False,
+    )
+    assert parse_judgment_response(Judgment.SIMILARITY_SCORE, "4") == (4.0, True)
+    assert parse_judgment_response(Judgment.MAIN_POINTS, "* a\n* b") == (2, True)
+    with pytest.raises(ValueError):
+        parse_judgment_response(Judgment.SIMILARITY_SCORE, "7")
+    with pytest.raises(ValueError):
+        parse_judgment_response(Judgment.CONTEXT_RELEVANCY, "true or false")
+
+
+def test_cheap_model_answers_easy_judgments(make_responses):
+    cheap = FakeLLMService(model="cheap-model")
+    expensive = FakeLLMService(model="expensive-model")
+    scorer = ValidateScorer(
+        [AnswerSimilarityMetric(), RetrievalPrecisionMetric()],
+        llm_service=CascadeLLMService(cheap, expensive),
+    )
+    run = scorer.score_responses(
+        make_responses(10, llm_context_list=["Ryan has a dog named Fido."])
+    )
+
+    assert run.overall_scores == {"answer_similarity": 5.0, "retrieval_precision": 1.0}
+    assert cheap.num_calls == 20
+    assert expensive.num_calls == 0
+    assert scorer.llm_service.stats.escalation_rate == 0.0
+
+
+def test_unusable_responses_are_escalated(make_responses):
+    cheap = FakeLLMService(["I think it is true", "no idea"], model="cheap-model")
+    expensive = FakeLLMService(["false"], model="expensive-model")
+    service = CascadeLLMService(cheap, expensive)
+    scorer = ValidateScorer([RetrievalPrecisionMetric()], llm_service=service)
+    run = scorer.score_responses(
+        make_responses(4, llm_context_list=["Ryan has a dog named Fido."]),
+        parallelism=1,
+    )
+
+    assert run.overall_scores == {"retrieval_precision": 0.0}
+    stats = service.stats_by_metric["retrieval_precision"]
+    assert (stats.calls, stats.escalations) == (4, 4)
+    assert (stats.ambiguous, stats.unparseable) == (2, 2)
+    assert run.stats.total.calls == 8
+
+
+def test_audits_record_agreement():
+    cheap = FakeLLMService(["true", "false"], model="cheap-model")
+    expensive = FakeLLMService(["true"], model="expensive-model")
+    service = CascadeLLMService(cheap, expensive, audit_rate=1.0)
+    events = []
+    service.listeners.append(events.append)
+    for i in range(4):
+        asyncio.run(service.get_response(f"prompt {i}", Judgment.CONTEXT_RELEVANCY))
+
+    assert (service.stats.audits, service.stats.agreements) == (4, 2)
+    assert service.stats.agreement_rate == 0.5
+    assert [event.model for event in events] == ["cheap-model", "expensive-model"] * 4
+
+
+def test_failed_cheap_calls_are_escalated():
+    cheap = FakeLLMService(model="cheap-model", error_rate=1.0, max_retries=1)
+    service = CascadeLLMService(cheap, FakeLLMService(model="expensive-model"))
+    assert asyncio.run(service.get_response("prompt")) == "true"
+    assert service.stats.errors == 1
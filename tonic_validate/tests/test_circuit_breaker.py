@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+from tonic_validate.classes.exceptions import CircuitOpenException, LLMException
+from tonic_validate.services.fake_llm_service import FakeLLMService
+from tonic_validate.utils.circuit_breaker import CircuitBreaker, CircuitState
+
+
+def test_outage_fails_fast():
+    breaker = CircuitBreaker(window=10, min_requests=5, open_time=60)
+    service = FakeLLMService(error_rate=1.0, max_retries=10, circuit_breaker=breaker)
+
+    async def call_all():
+        for i in range(20):
+            with pytest.raises(CircuitOpenException):
+                await service.get_response(f"prompt {i}")
+
+    asyncio.run(call_all())
+    # Only the requests until the circuit opened were sent
+    assert service.num_requests == 5
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.trips == 1
+    assert breaker.rejected == 20
+
+
+def test_probe_closes_the_circuit():
+    breaker = CircuitBreaker(window=4, min_requests=2, open_time=0.05)
+    service = FakeLLMService(error_rate=1.0, max_retries=2, circuit_breaker=breaker)
+
+    async def call_all():
+        with pytest.raises(LLMException):
+            await service.get_response("prompt 0")
+        assert breaker.state == CircuitState.OPEN
+        # The provider recovers while the circuit is open
+        service.error_rate = 0.0
+        with pytest.raises(CircuitOpenException):
+            await service.get_response("prompt 1")
+        breaker.wait_while_open = True
+        return await service.get_response("prompt 2")
+
+    assert asyncio.run(call_all()) == "true"
+    assert breaker.state == CircuitState.CLOSED
+    assert service.num_requests == 3
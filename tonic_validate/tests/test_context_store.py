@@ -0,0 +1,108 @@
+import copy
+import logging
+import pickle
+
+import pytest
+from requests import HTTPError
+from tonic_validate import ValidateApi, ValidateScorer
+from tonic_validate.classes import ContextList, ContextStore, Run, RunData
+from tonic_validate.metrics import RetrievalPrecisionMetric
+from tonic_validate.services.fake_llm_service import FakeLLMService
+
+
+def test_chunks_are_stored_once():
+    store = ContextStore()
+    chunk = "Ryan has a dog named Fido."
+    ids = store.add_all(
+        [chunk, "Fido is a dog.", "".join(["Ryan has a dog ", "named Fido."])]
+    )
+    assert ids[0] == ids[2]
+    assert len(store) == 2
+    resolved = store.resolve(ids)
+    assert resolved == [chunk, "Fido is a dog.", chunk]
+    assert resolved[0] is resolved[2]
+
+
+def test_to_dict_references_chunks_by_id():
+    chunk = "Ryan has a dog named Fido."
+    run_data = [
+        RunData(
+            scores={},
+            reference_question=question,
+            reference_answer="Fido",
+            llm_answer="Fido",
+            llm_context=[chunk],
+        )
+        for question in ["What is the name of Ryan's dog?", "Who is Fido?"]
+    ]
+    store = ContextStore()
+    data = [item.to_dict(store) for item in run_data]
+    assert all("llm_context" not in item for item in data)
+    assert data[0]["llm_context_ids"] == data[1]["llm_context_ids"]
+    assert store.to_dict() == {ContextStore.chunk_id(chunk): chunk}
+    assert run_data[0].to_dict()["llm_context"] == [chunk]
+
+
+def test_scored_items_keep_only_chunk_ids(make_responses):
+    scorer = ValidateScorer([RetrievalPrecisionMetric()], llm_service=FakeLLMService())
+    run = scorer.score_responses(make_responses(2))
+    scorer.close()
+    first, second = run.run_data
+    assert isinstance(first.llm_context, ContextList)
+    assert first.llm_context == ["Ryan has a dog named Fido.", "Fido likes walks."]
+    assert first.llm_context_ids == second.llm_context_ids
+    assert first.llm_context[0] is second.llm_context[0]
+    assert first.to_dict()["llm_context"] == list(first.llm_context)
+    assert copy.deepcopy(first.llm_context) == first.llm_context
+    assert pickle.loads(pickle.dumps(first)).llm_context == first.llm_context
+
+
+class FakeHttpClient:
+    def __init__(self, features):
+        self.features = features
+        self.posted = []
+
+    def http_get(self, url, params={}, timeout=None):
+        if isinstance(self.features, Exception):
+            raise self.features
+        return self.features
+
+    def http_post(self, url, params={}, data={}, timeout=None):
+        self.posted.append(data)
+        return {"id": "run"}
+
+
+@pytest.mark.parametrize(
+    "features, deduplicated",
+    [
+        ({"deduplicated_context": True}, True),
+        ({}, False),
+        (HTTPError("404 Client Error"), False),
+    ],
+)
+def test_context_is_deduplicated_only_if_the_server_supports_it(
+    features, deduplicated, caplog
+):
+    # Scorers created by other tests may have raised the level of the root logger
+    caplog.set_level(logging.WARNING)
+    api = ValidateApi("key")
+    api.client = FakeHttpClient(features)
+    run_data = RunData(
+        scores={},
+        reference_question="Who is Fido?",
+        reference_answer="Fido",
+        llm_answer="Fido",
+        llm_context=["Ryan has a dog named Fido."],
+    )
+    run = Run(overall_scores={}, run_data=[run_data])
+    api.upload_run("project", run, deduplicate_context=True)
+    api.upload_run("project", run, deduplicate_context=True)
+    for data in api.client.posted:
+        assert ("contexts" in data) == deduplicated
+        assert ("llm_context" in data["data"][0]) != deduplicated
+    warned = any(
+        "deduplicate_context is ignored" in record.getMessage()
+        for record in caplog.records
+        if record.levelno == logging.WARNING
+    )
+    assert warned != deduplicated
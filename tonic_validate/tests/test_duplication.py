@@ -0,0 +1,70 @@
+import asyncio
+
+from tonic_validate import ValidateScorer
+from tonic_validate.metrics import DuplicationMetric
+from tonic_validate.services.fake_llm_service import FakeEmbedder, FakeLLMService
+from tonic_validate.utils.duplication import (
+    DuplicationDetector,
+    MinHasher,
+    split_sentences,
+)
+
+REPEATING = (
+    "Ryan has a dog named Fido. Fido is a golden retriever. Ryan has a dog named Fido!"
+)
+DISTINCT = "Ryan has a dog named Fido. The dog likes to swim in the lake."
+
+
+def test_split_sentences():
+    text = "Yes.\n- The dog is named Fido.\n- He is five years old! Is he?"
+    assert split_sentences(text) == [
+        "The dog is named Fido.",
+        "He is five years old!",
+    ]
+
+
+def test_minhash_finds_repeated_sentences():
+    minhasher = MinHasher()
+    sentences = split_sentences(REPEATING)
+    assert minhasher.max_similarity(sentences) == 1.0
+    assert minhasher.max_similarity(split_sentences(DISTINCT)) < 0.3
+
+    detector = DuplicationDetector()
+    assert asyncio.run(detector.is_duplicated(REPEATING)) is True
+    assert asyncio.run(detector.is_duplicated(DISTINCT)) is False
+    assert asyncio.run(detector.is_duplicated("Fido.")) is False
+    assert detector.decided == 3
+
+
+def test_only_uncertain_answers_reach_the_llm(make_responses):
+    prompts = []
+
+    def respond(prompt: str) -> str:
+        prompts.append(prompt)
+        return "true"
+
+    # Every similarity is within the margin of the threshold
+    metric = DuplicationMetric(DuplicationDetector(threshold=0.5, margin=0.6))
+    confident_metric = DuplicationMetric(DuplicationDetector())
+    for current_metric, expected_prompts in [(confident_metric, 0), (metric, 1)]:
+        scorer = ValidateScorer(
+            [current_metric], llm_service=FakeLLMService(respond), quiet=True
+        )
+        run = scorer.score_responses(
+            make_responses(llm_answers=[DISTINCT], llm_context_list=[])
+        )
+        scorer.close()
+        assert len(prompts) == expected_prompts
+    assert run.overall_scores == {"duplication_metric": 1.0}
+
+
+def test_run_sentences_are_embedded_together(make_responses):
+    embedder = FakeEmbedder()
+    metric = DuplicationMetric(DuplicationDetector(embedder))
+    scorer = ValidateScorer([metric], llm_service=FakeLLMService(), quiet=True)
+    run = scorer.score_responses(
+        make_responses(llm_answers=[REPEATING, DISTINCT], llm_context_list=[])
+    )
+    scorer.close()
+    assert len(embedder.batches) == 1
+    assert [item.scores["duplication_metric"] for item in run.run_data][0] == 1.0
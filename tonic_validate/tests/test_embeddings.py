@@ -0,0 +1,73 @@
+import asyncio
+import random
+
+import pytest
+from tonic_validate import ValidateScorer
+from tonic_validate.metrics import AnswerSimilarityMetric
+from tonic_validate.services.fake_llm_service import FakeEmbedder, FakeLLMService
+from tonic_validate.utils.embeddings import SimilarityCalibration, cosine_similarities
+
+
+@pytest.fixture
+def responses(make_responses):
+    return make_responses(
+        questions=["What is the dog's name?", "What color is the sky?", "Who?"],
+        answers=["Fido", "Blue", "Ryan"],
+        llm_answers=["Fido", "Blue", "Zzz"],
+        llm_context_list=[],
+    )
+
+
+def test_run_is_embedded_in_one_batch(responses):
+    def respond(prompt: str) -> str:
+        raise AssertionError("The LLM was asked")
+
+    embedder = FakeEmbedder()
+    metric = AnswerSimilarityMetric(embedder=embedder)
+    scorer = ValidateScorer([metric], llm_service=FakeLLMService(respond))
+    run = scorer.score_responses(responses)
+    scorer.close()
+    # Fido and Blue are both answers, so there are 4 distinct texts
+    assert embedder.batches == [["Fido", "Blue", "Ryan", "Zzz"]]
+    scores = [item.scores["answer_similarity"] for item in run.run_data]
+    assert scores[:2] == [5.0, 5.0]
+    assert scores[2] == 0.0
+
+
+def test_prepared_similarities_outlast_the_embedding_cache(responses):
+    # The cache is too small for the run, which must not embed items again
+    embedder = FakeEmbedder(cache_size=1)
+    metric = AnswerSimilarityMetric(embedder=embedder)
+    scorer = ValidateScorer([metric], llm_service=FakeLLMService())
+    run = scorer.score_responses(responses)
+    scorer.close()
+    assert len(embedder.batches) == 1
+    scores = [item.scores["answer_similarity"] for item in run.run_data]
+    assert scores == [5.0, 5.0, 0.0]
+
+
+def test_embeddings_are_cached_by_text():
+    embedder = FakeEmbedder(batch_size=2)
+    first = asyncio.run(embedder.embed(["a", "b", "c", "a"]))
+    assert embedder.batches == [["a", "b"], ["c"]]
+    second = asyncio.run(embedder.embed(["c", "d"]))
+    assert embedder.batches[-1] == ["d"]
+    assert second[0] == first[2]
+    assert cosine_similarities(first[:1], first[3:]) == pytest.approx([1.0])
+
+
+def test_calibration_fits_the_llm_scale(responses):
+    calibration = SimilarityCalibration.fit([0.6, 0.8, 1.0], [1.0, 3.0, 5.0])
+    assert calibration.slope == pytest.approx(10.0)
+    assert calibration.intercept == pytest.approx(-5.0)
+    assert calibration.score(0.2) == 0.0
+    assert calibration.score(0.9) == pytest.approx(4.0)
+
+    metric = AnswerSimilarityMetric(embedder=FakeEmbedder())
+    # The LLM scores every pair 2 points lower than the default calibration
+    llm_service = FakeLLMService(
+        lambda prompt: "3" if "Zzz" not in prompt else "0",
+    )
+    fitted = asyncio.run(metric.calibrate(responses, llm_service, rng=random.Random(0)))
+    assert metric.calibration is fitted
+    assert fitted.score(1.0) == pytest.approx(3.0)
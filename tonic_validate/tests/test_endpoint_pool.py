@@ -0,0 +1,103 @@
+import asyncio
+import random
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+from tonic_validate.services.endpoint_pool import Endpoint, EndpointPool
+from tonic_validate.services.fake_llm_service import FakeRateLimitError
+from tonic_validate.services.openai_service import OpenAIService
+
+
+def test_requests_follow_the_remaining_quota():
+    busy = Endpoint("busy", tokens_per_minute=1000)
+    idle = Endpoint("idle", tokens_per_minute=1000)
+    busy.record_usage(900)
+    pool = EndpointPool([busy, idle], rng=random.Random(0))
+    chosen = [pool.choose().client for _ in range(1000)]
+    assert 850 < chosen.count("idle") < 950
+
+
+def test_rate_limited_endpoint_fails_over():
+    sent = []
+
+    async def send(endpoint: Endpoint) -> str:
+        sent.append(endpoint.client)
+        if endpoint.client == "limited":
+            raise FakeRateLimitError("Rate limit reached")
+        return endpoint.client
+
+    limited = Endpoint("limited")
+    pool = EndpointPool([limited, Endpoint("free", weight=1e-9)], cooldown_time=60)
+    assert asyncio.run(pool.send(send)) == "free"
+    assert sent == ["limited", "free"]
+    assert pool.failovers == 1
+    # The rate limited endpoint is skipped while it cools down
+    assert asyncio.run(pool.send(send)) == "free"
+    assert limited.requests == 1
+
+
+class BadRequestError(Exception):
+    status_code = 400
+
+
+def test_errors_that_fail_everywhere_are_raised():
+    async def send(endpoint: Endpoint) -> str:
+        raise BadRequestError("bad request")
+
+    pool = EndpointPool([Endpoint("a"), Endpoint("b")])
+    with pytest.raises(BadRequestError):
+        asyncio.run(pool.send(send))
+    assert pool.failovers == 0
+
+
+def test_service_spreads_requests_over_deployments():
+    def client(region: str, status_code: int) -> AsyncOpenAI:
+        def respond(request: httpx.Request) -> httpx.Response:
+            if status_code != 200:
+                return httpx.Response(
+                    status_code, headers={"retry-after": "30"}, json={"error": {}}
+                )
+            return httpx.Response(
+                200,
+                headers={
+                    "x-ratelimit-remaining-tokens": "900",
+                    "x-ratelimit-limit-tokens": "1000",
+                },
+                json={
+                    "id": "completion",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": "gpt-4o",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "finish_reason": "stop",
+                            "message": {"role": "assistant", "content": region},
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": 90,
+                        "completion_tokens": 10,
+                        "total_tokens": 100,
+                    },
+                },
+            )
+
+        return AsyncOpenAI(
+            api_key="key",
+            base_url=f"https://{region}.example.com/v1",
+            max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(respond)),
+        )
+
+    east = Endpoint(client("eastus", 429), model="gpt-4o-eastus")
+    west = Endpoint(client("westus", 200), model="gpt-4o-westus", weight=1e-9)
+    service = OpenAIService(None, "gpt-4o", endpoint_pool=EndpointPool([east, west]))
+    events = []
+    service.listeners.append(events.append)
+    assert asyncio.run(service.get_response("prompt")) == "westus"
+    assert events[0].requests == 2
+    assert events[0].rate_limits == 1
+    assert east.cooldown_until > west.cooldown_until
+    assert west.remaining_quota() == pytest.approx(0.9)
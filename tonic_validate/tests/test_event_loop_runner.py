@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+from tonic_validate import ValidateScorer
+from tonic_validate.metrics import AnswerSimilarityMetric
+from tonic_validate.services.fake_llm_service import FakeLLMService
+from tonic_validate.utils.event_loop_runner import EventLoopRunner
+from tonic_validate.utils.llm_cache import LLMCache
+
+
+def test_sync_runs_share_one_event_loop(make_responses):
+    loops = []
+
+    def respond(prompt: str) -> str:
+        loops.append(asyncio.get_running_loop())
+        return "5"
+
+    service = FakeLLMService(respond)
+    scorer = ValidateScorer([AnswerSimilarityMetric()], llm_service=service)
+    scorer.score_responses(make_responses())
+    service.cache = LLMCache()
+    scorer.score_responses(make_responses())
+
+    async def score_inside_a_loop():
+        service.cache = LLMCache()
+        return scorer.score_responses(make_responses())
+
+    run = asyncio.run(score_inside_a_loop())
+    assert run.overall_scores == {"answer_similarity": 5.0}
+    assert len(loops) == 3
+    assert loops[0] is loops[1] is loops[2]
+
+    scorer.close()
+    service.cache = LLMCache()
+    scorer.score_responses(make_responses())
+    assert loops[3] is not loops[0]
+    scorer.close()
+
+
+def test_errors_reach_the_caller():
+    runner = EventLoopRunner()
+
+    async def fail():
+        raise KeyboardInterrupt()
+
+    async def succeed():
+        return 1
+
+    with pytest.raises(KeyboardInterrupt):
+        runner.run(fail())
+    # The interrupt did not stop the loop
+    assert runner.run(succeed()) == 1
+    runner.close()
+    assert not runner.is_running
+
+
+def test_interrupt_from_another_task_reaches_every_caller():
+    runner = EventLoopRunner()
+
+    async def interrupt():
+        raise KeyboardInterrupt()
+
+    async def interrupted():
+        # The child task stops the loop before this coroutine finishes
+        asyncio.ensure_future(interrupt())
+        await asyncio.sleep(10)
+
+    for _ in range(5):
+        with pytest.raises(KeyboardInterrupt):
+            runner.run(interrupted())
+    runner.close()
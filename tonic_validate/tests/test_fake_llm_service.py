@@ -0,0 +1,367 @@
+import asyncio
+
+import pytest
+from tonic_validate import ValidateScorer
+from tonic_validate.classes import Benchmark, LLMResponse
+from tonic_validate.classes.exceptions import LLMException
+from tonic_validate.metrics import (
+    AnswerConsistencyMetric,
+    AnswerSimilarityMetric,
+    AugmentationAccuracyMetric,
+    AugmentationPrecisionMetric,
+    DuplicationMetric,
+    RetrievalPrecisionMetric,
+)
+from tonic_validate.services.fake_llm_service import FakeLLMService
+from tonic_validate.utils.prefilter import DEFAULT_PREFILTERS
+from tonic_validate.utils.token_budget import (
+    MESSAGE_OVERHEAD_TOKENS,
+    RESPONSE_TOKEN_RESERVE,
+    ContextLengthPolicy,
+)
+
+
+def test_default_responses_score_every_metric(make_responses):
+    service = FakeLLMService()
+    scorer = ValidateScorer(
+        [
+            AnswerSimilarityMetric(),
+            AugmentationPrecisionMetric(),
+            AnswerConsistencyMetric(),
+        ],
+        llm_service=service,
+        quiet=True,
+    )
+    run = scorer.score_responses(make_responses(20))
+    assert run.overall_scores == {
+        "answer_similarity": 5.0,
+        "augmentation_precision": 1.0,
+        "answer_consistency": 1.0,
+    }
+    assert service.num_requests > 0
+
+
+def test_scripted_responses_and_cache(make_responses):
+    service = FakeLLMService(["true", "false"], record_prompts=True)
+    scorer = ValidateScorer([RetrievalPrecisionMetric()], llm_service=service)
+    run = scorer.score_responses(make_responses(1) * 3, parallelism=1)
+    # The two contexts get alternating answers, the repeated items hit the cache
+    assert [item.scores["retrieval_precision"] for item in run.run_data] == [0.5] * 3
+    assert service.num_requests == 2
+    assert len(service.prompts) == 2
+    assert service.cache_hit_rate == pytest.approx(4 / 6)
+
+
+def test_failures_are_retried_deterministically():
+    def run_once():
+        service = FakeLLMService(error_rate=0.2, rate_limit_rate=0.2, seed=7)
+        for i in range(50):
+            asyncio.run(service.get_response(f"prompt {i}"))
+        return service.num_requests, service.num_errors, service.num_rate_limits
+
+    num_requests, num_errors, num_rate_limits = run_once()
+    assert num_requests == 50 + num_errors + num_rate_limits
+    assert num_errors > 0 and num_rate_limits > 0
+    assert run_once() == (num_requests, num_errors, num_rate_limits)
+
+
+def test_max_retries_raises():
+    service = FakeLLMService(error_rate=1.0, max_retries=3)
+    with pytest.raises(LLMException):
+        asyncio.run(service.get_response("prompt"))
+    assert service.num_requests == 3
+
+
+def test_parallelism_limits_concurrent_requests(make_responses):
+    service = FakeLLMService(latency=lambda rng: rng.uniform(0.001, 0.005))
+    scorer = ValidateScorer([AnswerSimilarityMetric()], llm_service=service)
+    scorer.score_responses(make_responses(40), parallelism=8)
+    assert 1 < service.max_in_flight <= 8
+
+
+def test_run_stats_per_metric_and_item(make_responses):
+    service = FakeLLMService(rate_limit_rate=0.3, seed=3)
+    events = []
+    service.listeners.append(events.append)
+    scorer = ValidateScorer(
+        [AnswerSimilarityMetric(), RetrievalPrecisionMetric()], llm_service=service
+    )
+    run = scorer.score_responses(make_responses(5) + make_responses(1), parallelism=1)
+    stats = run.stats
+
+    assert stats.total.calls == len(events) == 6 * 3
+    assert stats.by_metric["answer_similarity"].calls == 6
+    assert stats.by_metric["retrieval_precision"].calls == 12
+    assert set(stats.by_item) == set(range(6))
+    assert all(item_stats.calls == 3 for item_stats in stats.by_item.values())
+    # The last item repeats the first one, so whichever is scored second hits the cache
+    repeated = sorted([stats.by_item[0], stats.by_item[5]], key=lambda s: s.cache_hits)
+    assert [item_stats.cache_hits for item_stats in repeated] == [0, 3]
+    assert repeated[1].prompt_tokens == 0
+    assert stats.total.cache_hits == service.num_cache_hits
+    assert stats.total.requests == service.num_requests
+    assert stats.total.rate_limits == service.num_rate_limits > 0
+    assert stats.total.prompt_tokens > 0
+    assert stats.to_dict()["by_metric"]["answer_similarity"]["calls"] == 6
+
+
+def test_token_budget_truncates_run(make_responses):
+    scorer = ValidateScorer(
+        [AnswerSimilarityMetric()], llm_service=FakeLLMService(), max_tokens=500
+    )
+    run = scorer.score_responses(make_responses(20), parallelism=2)
+    assert run.truncated
+    assert run.truncation_reason.startswith("Token budget of 500 reached")
+    assert 0 < len(run.run_data) < 20
+    # Only the items in flight when the budget ran out can go over it
+    assert run.stats.total.total_tokens < 500 + 2 * 200
+    assert run.overall_scores == {"answer_similarity": 5.0}
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_time_limit_truncates_run(make_responses):
+    clock = FakeClock()
+
+    def respond(prompt: str) -> str:
+        clock.now += 1
+        return "5"
+
+    scorer = ValidateScorer(
+        [AnswerSimilarityMetric()],
+        llm_service=FakeLLMService(respond),
+        max_run_time=2.5,
+        clock=clock,
+    )
+    run = scorer.score_responses(make_responses(20), parallelism=1)
+    assert run.truncated
+    assert run.truncation_reason.startswith("Time limit of 2.5 seconds reached")
+    # The items started at 0, 1 and 2 seconds
+    assert len(run.run_data) == 3
+
+
+def test_time_limit_stops_callbacks(make_responses):
+    clock = FakeClock()
+    questions = []
+
+    def callback(question: str):
+        questions.append(question)
+        clock.now += 1
+        return {"llm_answer": "Fido", "llm_context_list": []}
+
+    scorer = ValidateScorer(
+        [AnswerSimilarityMetric()],
+        llm_service=FakeLLMService(),
+        max_run_time=2.5,
+        clock=clock,
+    )
+    benchmark = Benchmark(questions=[f"Question {i}" for i in range(20)])
+    run = scorer.score(benchmark, callback, callback_parallelism=1)
+    assert len(questions) == 3
+    assert run.truncated
+    assert run.run_data == []
+
+    async def a_callback(question: str):
+        return callback(question)
+
+    clock.now = 0.0
+    questions.clear()
+    run = asyncio.run(scorer.a_score(benchmark, a_callback, callback_parallelism=1))
+    assert len(questions) == 3
+    assert run.truncated
+
+
+def test_callback_responses_are_coerced():
+    def callback(question: str):
+        return {"llm_answer": "Fido", "llm_context_list": ("Fido likes walks.",)}
+
+    async def a_callback(question: str):
+        return callback(question)
+
+    scorer = ValidateScorer([AnswerSimilarityMetric()], llm_service=FakeLLMService())
+    scored = []
+    a_score_responses = scorer._a_score_responses
+
+    async def record(responses, *args, **kwargs):
+        scored.extend(responses)
+        return await a_score_responses(responses, *args, **kwargs)
+
+    scorer._a_score_responses = record
+    benchmark = Benchmark(questions=["What is the name of Ryan's dog?"])
+    scorer.score(benchmark, callback)
+    asyncio.run(scorer.a_score(benchmark, a_callback))
+    assert [response.llm_context_list for response in scored] == [
+        ["Fido likes walks."]
+    ] * 2
+    assert all(type(response.llm_context_list) is list for response in scored)
+
+
+@pytest.mark.parametrize(
+    "limit", [{"max_tokens": 500}, {"max_cost": 1.0}, {"max_run_time": 60.0}]
+)
+def test_planned_runs_reject_run_limits(limit):
+    with pytest.raises(ValueError):
+        ValidateScorer(
+            [AnswerSimilarityMetric()],
+            llm_service=FakeLLMService(),
+            plan_prompts=True,
+            **limit,
+        )
+
+
+def test_untruncated_run(make_responses):
+    scorer = ValidateScorer(
+        [AnswerSimilarityMetric()], llm_service=FakeLLMService(), max_cost=1.0
+    )
+    run = scorer.score_responses(make_responses(20))
+    assert not run.truncated
+    assert run.truncation_reason is None
+    assert len(run.run_data) == 20
+
+
+def test_prefilters_avoid_calls():
+    benchmark = Benchmark(
+        questions=["What is the name of Ryan's dog?"] * 3,
+        answers=["Fido", "Fido", "Fido"],
+    )
+    responses = [
+        LLMResponse(
+            llm_answer=answer,
+            llm_context_list=["Ryan has a dog named Fido."],
+            benchmark_item=item,
+        )
+        for answer, item in zip(
+            ["fido ", "Ryan has a dog named Fido.", ""], benchmark.items
+        )
+    ]
+    service = FakeLLMService(record_prompts=True)
+    scorer = ValidateScorer(
+        [AnswerSimilarityMetric(), AugmentationAccuracyMetric()],
+        llm_service=service,
+        prefilters=DEFAULT_PREFILTERS,
+    )
+    run = scorer.score_responses(responses)
+
+    assert [item.scores["augmentation_accuracy"] for item in run.run_data] == [
+        1.0,
+        1.0,
+        0.0,
+    ]
+    # Similarity of the matching answer, and augmentation accuracy of the quoting and
+    # empty answers, are judged locally
+    assert run.stats.total.prefiltered == 3
+    assert run.stats.by_metric["answer_similarity"].prefiltered == 1
+    assert run.stats.by_prefilter == {
+        "answer_matches_reference": 1,
+        "context_in_answer": 1,
+        "empty_answer": 1,
+    }
+    assert service.num_calls == 3
+
+
+def test_metric_evaluators_use_independent_services(make_responses):
+    events = []
+    cheap = FakeLLMService(model="cheap-model")
+    expensive = FakeLLMService(model="expensive-model", latency=0.02)
+    for service in (cheap, expensive):
+        service.listeners.append(events.append)
+    scorer = ValidateScorer(
+        [AnswerSimilarityMetric(), DuplicationMetric()],
+        llm_service=expensive,
+        metric_evaluators={"duplication_metric": cheap},
+    )
+    run = scorer.score_responses(make_responses(5), parallelism=1)
+
+    assert run.overall_scores == {"answer_similarity": 5.0, "duplication_metric": 1.0}
+    assert list(run.run_data[0].scores) == ["answer_similarity", "duplication_metric"]
+    assert (cheap.num_calls, expensive.num_calls) == (5, 5)
+    # The cheap model isn't held back by the slow one, it finishes every item before
+    # the slow one finishes its second
+    models = [event.model for event in events]
+    assert models[:6].count("cheap-model") == 5
+    assert run.stats.by_metric["duplication_metric"].calls == 5
+
+
+def test_metric_evaluators_must_name_a_metric():
+    with pytest.raises(ValueError):
+        ValidateScorer(
+            [AnswerSimilarityMetric()],
+            llm_service=FakeLLMService(),
+            metric_evaluators={"duplication_metric": FakeLLMService()},
+        )
+
+
+def test_planned_prompts_are_deduplicated_and_sorted(make_responses):
+    def score(plan_prompts: bool):
+        service = FakeLLMService(latency=0.001, record_prompts=True)
+        scorer = ValidateScorer(
+            [AnswerConsistencyMetric(), AugmentationPrecisionMetric()],
+            llm_service=service,
+            plan_prompts=plan_prompts,
+        )
+        return scorer.score_responses(make_responses(10), parallelism=4), service
+
+    run, service = score(plan_prompts=False)
+    planned_run, planned_service = score(plan_prompts=True)
+
+    assert planned_run.overall_scores == run.overall_scores
+    # Every item has the same answer and context. Without planning, the items in
+    # flight at once send the same prompts before any of them is cached
+    assert planned_service.num_requests < service.num_requests
+    assert planned_service.num_cache_hits == 0
+    assert planned_run.stats.total.calls == run.stats.total.calls
+    # The last prompt is the statement check, which needs the main points
+    first_stage = planned_service.prompts[:-1]
+    assert first_stage == sorted(first_stage)
+
+
+def test_chunks_of_an_item_are_judged_one_at_a_time(make_responses):
+    service = FakeLLMService(latency=0.01)
+    in_flight = []
+    active = 0
+
+    async def score() -> float:
+        get_response = service.get_response
+
+        async def tracked(*args, **kwargs):
+            nonlocal active
+            active += 1
+            in_flight.append(active)
+            try:
+                return await get_response(*args, **kwargs)
+            finally:
+                active -= 1
+
+        service.get_response = tracked
+        return await AugmentationPrecisionMetric().score(make_responses(1)[0], service)
+
+    asyncio.run(score())
+    assert len(in_flight) == 4
+    assert max(in_flight) == 1
+
+
+@pytest.mark.parametrize(
+    "policy", [ContextLengthPolicy.TRUNCATE, ContextLengthPolicy.SPLIT]
+)
+def test_long_prompts_fit_without_an_encoder(make_responses, policy):
+    # Without an encoder the fake counts words as tokens
+    prompt_words = 150
+    service = FakeLLMService(
+        record_prompts=True,
+        context_length_policy=policy,
+        context_window=prompt_words + RESPONSE_TOKEN_RESERVE + MESSAGE_OVERHEAD_TOKENS,
+    )
+    scorer = ValidateScorer([AnswerConsistencyMetric()], llm_service=service)
+    run = scorer.score_responses(
+        make_responses(llm_context_list=["Ryan has a dog named Fido. " * 100])
+    )
+    scorer.close()
+    assert run.overall_scores == {"answer_consistency": 1.0}
+    assert service.prompts
+    assert all(len(prompt.split()) <= prompt_words for prompt in service.prompts)
@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+import pytest
+from tonic_validate.classes.exceptions import LLMException
+from tonic_validate.services.fake_llm_service import FakeLLMService
+from tonic_validate.utils.hedging import RequestHedger
+
+
+def make_hedger(max_hedge_rate: float = 1.0) -> RequestHedger:
+    hedger = RequestHedger(max_hedge_rate=max_hedge_rate, min_samples=3)
+    hedger.latencies.extend([0.001] * 3)
+    return hedger
+
+
+def slow_then_fast():
+    num_requests = 0
+
+    async def send() -> str:
+        nonlocal num_requests
+        num_requests += 1
+        if num_requests == 1:
+            await asyncio.sleep(0.5)
+            return "slow"
+        return "fast"
+
+    return send
+
+
+def test_slow_request_is_hedged():
+    hedger = make_hedger()
+    start = time.perf_counter()
+    assert asyncio.run(hedger.send(slow_then_fast())) == "fast"
+    assert time.perf_counter() - start < 0.4
+    assert hedger.hedges == 1
+    assert hedger.hedge_wins == 1
+
+
+def test_hedges_are_capped():
+    hedger = make_hedger(max_hedge_rate=0.0)
+    assert asyncio.run(hedger.send(slow_then_fast())) == "slow"
+    assert hedger.hedges == 0
+
+
+def test_service_hedges_its_slowest_request():
+    num_latencies = 0
+
+    def latency(_) -> float:
+        nonlocal num_latencies
+        num_latencies += 1
+        return 0.5 if num_latencies == 21 else 0.001
+
+    hedger = RequestHedger(max_hedge_rate=1.0, min_samples=20)
+    service = FakeLLMService(latency=latency, hedger=hedger)
+    events = []
+    service.listeners.append(events.append)
+
+    async def call_all():
+        for i in range(21):
+            await service.get_response(f"prompt {i}")
+
+    asyncio.run(call_all())
+    assert service.num_requests == 22
+    assert hedger.hedge_wins == 1
+    assert events[-1].requests == 2
+    assert events[-1].latency < 0.4
+
+
+def test_requests_time_out():
+    service = FakeLLMService(latency=1.0, request_timeout=0.01, max_retries=2)
+    with pytest.raises(LLMException):
+        asyncio.run(service.get_response("prompt"))
+    assert service.num_requests == 2
@@ -0,0 +1,51 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ["litellm", "openai", "tiktoken"]
+# Importing litellm alone takes seconds, so this leaves plenty of headroom
+IMPORT_TIME_BUDGET_SECONDS = 2.0
+
+
+def import_in_subprocess(statement: str):
+    """Runs an import in a fresh interpreter, returning its duration and loaded modules."""
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "duration = time.perf_counter() - start\n"
+        "print(json.dumps({'duration': duration, 'modules': list(sys.modules)}))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return result["duration"], set(result["modules"])
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import tonic_validate",
+        "from tonic_validate import ValidateMonitorer",
+        "from tonic_validate.metrics import AnswerConsistencyMetric",
+        "from tonic_validate.classes import Benchmark, LLMResponse, Run",
+    ],
+)
+def test_import_does_not_load_llm_sdks(statement):
+    duration, modules = import_in_subprocess(statement)
+    assert not modules.intersection(HEAVY_MODULES)
+    assert duration < IMPORT_TIME_BUDGET_SECONDS
+
+
+def test_lazy_attributes():
+    import tonic_validate
+    import tonic_validate.metrics as metrics
+
+    assert set(tonic_validate.__all__) <= set(dir(tonic_validate))
+    for name in metrics.__all__:
+        assert getattr(metrics, name).__name__ == name
+    with pytest.raises(AttributeError):
+        tonic_validate.NotAThing  # type: ignore
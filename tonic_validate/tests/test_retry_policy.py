@@ -0,0 +1,129 @@
+import asyncio
+import random
+from collections import Counter
+
+import pytest
+from tonic_validate import ValidateScorer
+from tonic_validate.classes.exceptions import (
+    ContextLengthException,
+    FatalLLMException,
+    LLMException,
+)
+from tonic_validate.metrics import AnswerConsistencyMetric
+from tonic_validate.services.fake_llm_service import FakeLLMService
+from tonic_validate.utils.llm_calls import main_points_prompt
+from tonic_validate.utils.retry_policy import (
+    DecorrelatedJitter,
+    ErrorKind,
+    ExponentialBackoff,
+    RetryBudget,
+    classify_error,
+    create_backoff,
+    current_retry_budget,
+)
+
+
+class FakeStatusError(Exception):
+    def __init__(self, status_code: int, code: str = "") -> None:
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+        self.code = code
+
+
+def raise_error(error: Exception):
+    def respond(prompt: str) -> str:
+        raise error
+
+    return respond
+
+
+def test_errors_are_classified():
+    assert classify_error(FakeStatusError(429)) == ErrorKind.RATE_LIMIT
+    assert classify_error(FakeStatusError(503)) == ErrorKind.RETRYABLE
+    assert classify_error(FakeStatusError(408)) == ErrorKind.RETRYABLE
+    assert classify_error(FakeStatusError(401)) == ErrorKind.FATAL
+    assert classify_error(FakeStatusError(404)) == ErrorKind.FATAL
+    assert (
+        classify_error(FakeStatusError(400, code="context_length_exceeded"))
+        == ErrorKind.CONTEXT_LENGTH
+    )
+    assert classify_error(TimeoutError()) == ErrorKind.RETRYABLE
+
+
+def test_fatal_errors_are_not_retried():
+    service = FakeLLMService(raise_error(FakeStatusError(401)), max_retries=10)
+    with pytest.raises(FatalLLMException):
+        asyncio.run(service.get_response("prompt"))
+    assert service.num_requests == 1
+
+    service = FakeLLMService(
+        raise_error(FakeStatusError(400, code="context_length_exceeded"))
+    )
+    with pytest.raises(ContextLengthException):
+        asyncio.run(service.get_response("prompt"))
+    assert service.num_requests == 1
+
+
+def test_retry_budget_limits_retries_of_a_run():
+    service = FakeLLMService(error_rate=1.0, max_retries=10)
+    budget = RetryBudget(ratio=0.0, min_retries=2)
+
+    async def call_all():
+        current_retry_budget.set(budget)
+        for i in range(3):
+            with pytest.raises(LLMException):
+                await service.get_response(f"prompt {i}")
+
+    asyncio.run(call_all())
+    # Two retries for the first prompt, none for the others
+    assert service.num_requests == 5
+    assert budget.retries == 2
+    assert budget.denied == 3
+
+
+def test_decorrelated_jitter_stays_within_bounds():
+    backoff = DecorrelatedJitter(1.0, max_wait_time=10.0, rng=random.Random(0))
+    waits = [backoff.next_wait_time() for _ in range(50)]
+    assert all(1.0 <= wait <= 10.0 for wait in waits)
+    assert max(waits) == 10.0
+
+
+def test_exp_delay_base_keeps_the_exponential_backoff():
+    backoff = create_backoff(1.0, jitter_growth=3.0, exp_delay_base=2)
+    assert isinstance(backoff, ExponentialBackoff)
+    waits = [backoff.next_wait_time() for _ in range(5)]
+    assert waits[0] == 1.0
+    for previous, wait in zip(waits, waits[1:]):
+        assert 2 * previous <= wait < 2.4 * previous
+
+    service = FakeLLMService(jitter_growth=1.5)
+    backoff = create_backoff(1.0, service.jitter_growth, service.exp_delay_base)
+    assert isinstance(backoff, DecorrelatedJitter)
+    waits = [backoff.next_wait_time() for _ in range(50)]
+    assert all(1.0 <= wait <= 1.5 ** (index + 1) for index, wait in enumerate(waits))
+
+
+def test_unparseable_responses_ask_only_the_failed_call_again(make_responses):
+    asks = Counter()
+
+    def respond(prompt: str) -> str:
+        asks[prompt] += 1
+        if prompt.startswith(main_points_prompt()):
+            return "* Fido\n* Ryan"
+        if "STATEMENT:\nFido\n" in prompt and asks[prompt] == 1:
+            return "It depends"
+        return "true"
+
+    service = FakeLLMService(respond)
+    responses = make_responses(
+        llm_answers=["Fido, Ryan's dog"],
+        llm_context_list=["Ryan has a dog named Fido."],
+    )
+    scorer = ValidateScorer(
+        [AnswerConsistencyMetric()], llm_service=service, max_parsing_retries=3
+    )
+    run = scorer.score_responses(responses)
+
+    assert run.overall_scores == {"answer_consistency": 1.0}
+    assert sorted(asks.values()) == [1, 1, 2]
+    assert run.stats.total.calls == 4
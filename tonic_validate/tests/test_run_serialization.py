@@ -0,0 +1,65 @@
+import pytest
+from tonic_validate.classes import Run, RunData
+
+pytest.importorskip("pyarrow")
+
+
+def make_run() -> Run:
+    run_data = [
+        RunData(
+            scores={"answer_similarity": float(i % 5), "retrieval_precision": None},
+            reference_question=f"Question {i}",
+            reference_answer=None if i % 3 == 0 else "Fido",
+            llm_answer="Fido",
+            llm_context=["Ryan has a dog named Fido."] if i % 2 else None,
+            tags=["even"] if i % 2 == 0 else None,
+            metadata={"index": i},
+        )
+        for i in range(10)
+    ]
+    return Run(
+        overall_scores={"answer_similarity": 2.0},
+        run_data=run_data,
+        llm_evaluator="gpt-4-turbo-preview",
+    )
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_and_load(tmp_path, mmap):
+    run = make_run()
+    path = str(tmp_path / "run.arrow")
+    run.save(path)
+    loaded = Run.load(path, mmap=mmap)
+    assert loaded == run
+    assert loaded.run_data[-1] == run.run_data[-1]
+    assert loaded.summarize(bootstrap_samples=0) == run.summarize(bootstrap_samples=0)
+
+
+def test_save_loaded_run(tmp_path):
+    run = make_run()
+    run.save(str(tmp_path / "first.arrow"))
+    Run.load(str(tmp_path / "first.arrow")).save(str(tmp_path / "second.arrow"))
+    assert Run.load(str(tmp_path / "second.arrow")) == run
+
+
+def test_save_truncated_run(tmp_path):
+    run = make_run()
+    run.truncated = True
+    run.truncation_reason = "Token budget of 1000 reached after using 1200 tokens"
+    run.save(str(tmp_path / "run.arrow"))
+    loaded = Run.load(str(tmp_path / "run.arrow"))
+    assert loaded.truncated
+    assert loaded.truncation_reason == run.truncation_reason
+
+
+def test_load_rejects_other_files(tmp_path):
+    import pyarrow as pa
+    import pyarrow.ipc
+
+    path = str(tmp_path / "other.arrow")
+    table = pa.table({"a": [1, 2]})
+    with pa.OSFile(path, "wb") as sink:
+        with pyarrow.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    with pytest.raises(ValueError):
+        Run.load(path)
@@ -0,0 +1,109 @@
+import pytest
+from tonic_validate.classes import Run, RunData
+from tonic_validate.utils.score_aggregation import (
+    UNGROUPED,
+    overall_scores,
+    percentile,
+    score_columns,
+    summarize_column,
+    summarize_columns,
+)
+
+
+def make_run_data(scores, tags=None, metadata=None) -> RunData:
+    return RunData(
+        scores=scores,
+        reference_question="What is the name of Ryan's dog?",
+        reference_answer="Fido",
+        llm_answer="Fido",
+        llm_context=["Ryan has a dog named Fido."],
+        tags=tags,
+        metadata=metadata,
+    )
+
+
+def test_score_columns_are_aligned():
+    run_data = [
+        make_run_data({"a": 1.0}),
+        make_run_data({"a": None, "b": 0.5}),
+        make_run_data({"b": 1.0}),
+    ]
+    columns = score_columns(run_data)
+    assert columns == {"a": [1.0, None, None], "b": [None, 0.5, 1.0]}
+    assert overall_scores(columns) == {"a": 1.0, "b": 0.75}
+
+
+def test_overall_scores_skips_metrics_without_scores():
+    assert overall_scores({"a": [None, None], "b": [0.0, 1.0]}) == {"b": 0.5}
+
+
+@pytest.mark.parametrize("q, expected", [(0, 1.0), (50, 2.5), (100, 4.0), (25, 1.75)])
+def test_percentile(q, expected):
+    assert percentile([1.0, 2.0, 3.0, 4.0], q) == expected
+
+
+def test_summarize_column():
+    summary = summarize_column(
+        [1.0, 0.0, None, 1.0, 1.0], bootstrap_samples=200, seed=0
+    )
+    assert summary.count == 4
+    assert summary.none_count == 1
+    assert summary.mean == 0.75
+    assert summary.std == pytest.approx(0.5)
+    assert summary.min == 0.0
+    assert summary.max == 1.0
+    assert summary.percentiles is not None
+    assert summary.percentiles[50] == 1.0
+    assert summary.ci_low is not None and summary.ci_high is not None
+    assert summary.ci_low <= summary.mean <= summary.ci_high
+
+
+def test_default_interval_is_analytic():
+    binary = summarize_column([1.0] * 20)
+    # The Wilson interval of a mean of 1 stays below 1 but is not empty
+    assert binary.ci_high == pytest.approx(1.0)
+    assert 0.8 < binary.ci_low < 1.0
+
+    scores = [0.0, 2.5, 5.0, 2.5]
+    summary = summarize_column(scores)
+    assert summary.mean == 2.5
+    assert summary.ci_high - summary.mean == pytest.approx(
+        summary.mean - summary.ci_low
+    )
+    assert summarize_column(scores) == summary
+
+
+def test_columns_are_resampled_with_their_own_seed():
+    column = [0.0, 0.2, 0.4, 0.6, 0.8, 1.0]
+    summaries = summarize_columns(
+        {"a": column, "b": column}, bootstrap_samples=50, seed=1
+    )
+    assert summaries["a"].ci_low != summaries["b"].ci_low
+    again = summarize_columns({"a": column, "b": column}, bootstrap_samples=50, seed=1)
+    assert again == summaries
+
+
+def test_summarize_column_without_scores():
+    summary = summarize_column([None, None])
+    assert summary.count == 0
+    assert summary.none_count == 2
+    assert summary.mean is None
+
+
+def test_summarize_by_tag_and_metadata():
+    run = Run(
+        overall_scores={},
+        run_data=[
+            make_run_data({"a": 1.0}, tags=["x", "y"], metadata={"split": "dev"}),
+            make_run_data({"a": 0.0}, tags=["y"], metadata={"split": "test"}),
+            make_run_data({"a": 0.5}),
+        ],
+    )
+    by_tag = run.summarize(by_tag=True, bootstrap_samples=0)
+    assert by_tag["x"]["a"].mean == 1.0
+    assert by_tag["y"]["a"].mean == 0.5
+    assert by_tag[UNGROUPED]["a"].mean == 0.5
+
+    by_split = run.summarize(by_metadata="split", bootstrap_samples=0)
+    assert by_split["dev"]["a"].count == 1
+    assert by_split["test"]["a"].mean == 0.0
@@ -0,0 +1,97 @@
+import math
+import random
+
+import pytest
+from tonic_validate import ValidateScorer
+from tonic_validate.classes import Run, RunData
+from tonic_validate.metrics import AnswerSimilarityMetric
+from tonic_validate.services.fake_llm_service import FakeLLMService
+from tonic_validate.utils.sequential_sampling import RunningMean, SequentialSampler
+
+
+def make_run_data(score: float) -> RunData:
+    return RunData(
+        scores={"answer_similarity": score},
+        reference_question="What is the name of Ryan's dog?",
+        reference_answer="Fido",
+        llm_answer="Fido",
+        llm_context=[],
+    )
+
+
+def test_running_mean_matches_batch_statistics():
+    values = [random.Random(1).uniform(0, 5) for _ in range(100)]
+    running_mean = RunningMean()
+    for value in values:
+        running_mean.add(value)
+    mean = math.fsum(values) / len(values)
+    variance = math.fsum((value - mean) ** 2 for value in values) / (len(values) - 1)
+    assert running_mean.mean == pytest.approx(mean)
+    assert running_mean.variance == pytest.approx(variance)
+    # Having scored the whole population, the mean is known exactly
+    low, high = running_mean.interval(0.95, population=100)
+    assert low == pytest.approx(high)
+
+
+def test_sampler_visits_every_item_once():
+    sampler = SequentialSampler(250, target_ci_width=0.1, batch_size=100, seed=0)
+    batches = []
+    while batch := sampler.next_batch():
+        batches.append(batch)
+    assert [len(batch) for batch in batches] == [100, 100, 50]
+    assert sorted(sum(batches, [])) == list(range(250))
+
+
+def test_every_check_uses_the_corrected_confidence():
+    sampler = SequentialSampler(
+        1000, target_ci_width=0.1, batch_size=100, min_items=250, seed=0
+    )
+    # Checked after 300, 400, ..., 1000 items
+    assert sampler.num_looks == 8
+    assert sampler.look_confidence == pytest.approx(1 - 0.05 / 8)
+
+    sampler.add(make_run_data(score) for score in [3.0, 4.0, 5.0] * 100)
+    low, _ = sampler.intervals()["answer_similarity"]
+    uncorrected_low, _ = sampler.running_means["answer_similarity"].interval(0.95, 1000)
+    assert low < uncorrected_low
+
+
+def test_sampler_baseline_decisions():
+    rng = random.Random(0)
+    scores = [rng.choice([3.0, 4.0, 5.0]) for _ in range(200)]
+
+    lower_baseline = SequentialSampler(
+        10_000, baseline_scores={"answer_similarity": 2.0}
+    )
+    lower_baseline.add(make_run_data(score) for score in scores)
+    assert lower_baseline.stop_reason() is not None
+
+    close_baseline = SequentialSampler(
+        10_000, baseline_scores={"answer_similarity": 4.0}
+    )
+    close_baseline.add(make_run_data(score) for score in scores)
+    assert close_baseline.stop_reason() is None
+
+    close_baseline.baseline_tolerance = 0.5
+    assert close_baseline.stop_reason() is not None
+
+
+def test_sample_responses_stops_early(make_responses):
+    num_items = 2000
+    responses = make_responses(num_items, llm_context_list=[])
+    scores = iter(random.Random(0).choice("345") for _ in range(num_items))
+    service = FakeLLMService(lambda prompt: next(scores))
+    scorer = ValidateScorer([AnswerSimilarityMetric()], llm_service=service)
+
+    run = scorer.sample_responses(responses, target_ci_width=0.3, batch_size=50, seed=1)
+    assert run.truncated
+    assert 50 <= len(run.run_data) < num_items / 2
+    assert abs(run.overall_scores["answer_similarity"] - 4.0) < 0.3
+    assert service.num_requests == len(run.run_data)
+
+    baseline = Run(overall_scores={"answer_similarity": 4.0}, run_data=[])
+    run = scorer.sample_responses(
+        responses[:100], baseline=baseline, baseline_tolerance=0.0, seed=1
+    )
+    assert not run.truncated
+    assert len(run.run_data) == 100
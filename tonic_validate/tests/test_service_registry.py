@@ -0,0 +1,77 @@
+import pytest
+from tonic_validate import ValidateScorer
+from tonic_validate.metrics import AnswerSimilarityMetric
+from tonic_validate.services import service_factory
+from tonic_validate.services.openai_service import OpenAIService
+from tonic_validate.services.service_registry import ServiceRegistry
+
+
+class WordEncoder:
+    """Encodes each whitespace separated word as one token."""
+
+    name = "words"
+
+    def encode(self, text: str, disallowed_special=()):
+        return text.split()
+
+    def decode(self, tokens) -> str:
+        return " ".join(tokens)
+
+
+@pytest.fixture(autouse=True)
+def openai_environment(monkeypatch):
+    monkeypatch.delenv("AZURE_OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("OPENAI_API_KEY", "key")
+    # tiktoken downloads its encodings, so the services get a local encoder instead
+    monkeypatch.setattr(service_factory, "get_encoder", lambda model: WordEncoder())
+
+
+def test_services_share_the_client_and_cache_of_their_model():
+    registry = ServiceRegistry(max_connections=8)
+    first = registry.create_llm_service("gpt-4o", circuit_breaker_error_rate=0.5)
+    second = registry.create_llm_service("gpt-4o", max_retries=3)
+    other_model = registry.create_llm_service("gpt-4o-mini")
+    assert isinstance(first, OpenAIService)
+    assert first is not second
+    assert first.client is second.client is other_model.client
+    assert first.cache is second.cache
+    assert other_model.cache is not first.cache
+    # The model keeps the circuit breaker its first service asked for
+    assert first.circuit_breaker is not None
+    assert second.circuit_breaker is first.circuit_breaker
+    assert second.max_retries == 3
+    registry.close()
+
+
+def test_services_with_other_credentials_are_not_shared(monkeypatch):
+    registry = ServiceRegistry()
+    first = registry.create_llm_service("gpt-4o")
+    monkeypatch.setenv("OPENAI_API_KEY", "other key")
+    second = registry.create_llm_service("gpt-4o")
+    assert first.client is not second.client
+    assert first.cache is not second.cache
+    registry.close()
+
+
+def test_scorers_share_the_registry():
+    registry = ServiceRegistry()
+    scorers = [
+        ValidateScorer(
+            [AnswerSimilarityMetric()],
+            model_evaluator="gpt-4o",
+            service_registry=registry,
+        )
+        for _ in range(2)
+    ]
+    assert scorers[0].llm_service.client is scorers[1].llm_service.client
+    assert scorers[0].llm_service.cache is scorers[1].llm_service.cache
+
+    async def succeed():
+        return 1
+
+    # Closing a scorer leaves the loop the other scorers use running
+    assert scorers[0]._run_sync(succeed()) == 1
+    scorers[0].close()
+    assert registry.runner.is_running
+    registry.close()
+    assert not registry.runner.is_running
@@ -0,0 +1,53 @@
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+from tonic_validate.services.staged_llm_service import (
+    StagedLLMService,
+    gather_staged,
+    run_staged,
+    staged_branch,
+)
+
+
+class RecordingService(StagedLLMService):
+    def __init__(self) -> None:
+        super().__init__()
+        self.stages: List[List[str]] = []
+
+    async def get_response(self, prompt: str) -> str:
+        return await self.stage(self.prompt_id(prompt), prompt)
+
+    async def execute_stage(self, prompts: Dict[str, str]) -> Dict[str, Any]:
+        self.stages.append(sorted(prompts.values()))
+        return {prompt_id: prompt.upper() for prompt_id, prompt in prompts.items()}
+
+
+def test_stage_waits_for_slow_branches():
+    service = RecordingService()
+
+    async def score_item(index: int) -> List[str]:
+        with staged_branch():
+            if index == 0:
+                # Many turns of the event loop without a new prompt
+                await asyncio.sleep(0.05)
+            first = await service.get_response(f"a{index}")
+            rest = await gather_staged(
+                service.get_response(f"b{index}"), service.get_response(f"c{index}")
+            )
+            return [first] + rest
+
+    async def score_run() -> List[List[str]]:
+        return await asyncio.gather(*[score_item(index) for index in range(3)])
+
+    results = asyncio.run(run_staged(score_run(), [service]))
+    assert results[2] == ["A2", "B2", "C2"]
+    assert service.stages == [
+        ["a0", "a1", "a2"],
+        ["b0", "b1", "b2", "c0", "c1", "c2"],
+    ]
+
+
+def test_execute_stage_is_abstract():
+    with pytest.raises(TypeError):
+        StagedLLMService()  # type: ignore[abstract]
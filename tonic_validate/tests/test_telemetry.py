@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+from tonic_validate.classes import Benchmark
+from tonic_validate.utils import telemetry
+from tonic_validate.utils.http_client import HttpClient
+
+
+@pytest.fixture
+def slow_telemetry_server(monkeypatch):
+    """Makes every telemetry request hang for a while and records the requests."""
+    requests_sent = []
+    release = threading.Event()
+
+    def slow_post(self, url, params={}, data={}, timeout=None):
+        release.wait(timeout=5)
+        requests_sent.append((url, timeout))
+        return {}
+
+    monkeypatch.setenv("TONIC_VALIDATE_DO_NOT_TRACK", "false")
+    monkeypatch.setattr(HttpClient, "http_post", slow_post)
+    monkeypatch.setattr(telemetry.requests, "get", lambda *args, **kwargs: None)
+    monkeypatch.setattr(
+        telemetry.Telemetry,
+        "get_user",
+        lambda self: {"user_id": "test-user", "linked": False},
+    )
+    yield requests_sent, release
+    release.set()
+
+
+def test_benchmark_construction_does_not_wait_for_telemetry(slow_telemetry_server):
+    requests_sent, release = slow_telemetry_server
+    start = time.perf_counter()
+    Benchmark(questions=["What is the name of Ryan's dog?"], answers=["Fido"])
+    assert time.perf_counter() - start < 1
+    assert requests_sent == []
+
+    release.set()
+    assert telemetry.sender.flush(timeout=5)
+    assert ("/benchmarks", telemetry.TELEMETRY_TIMEOUT) in requests_sent
+
+
+def test_sender_drops_events_when_queue_is_full():
+    release = threading.Event()
+    sent = []
+    sender = telemetry.TelemetrySender(max_queued_events=1)
+    sender.submit(lambda: release.wait(timeout=5))
+    # Wait for the worker to pick up the first event, so the queue is empty again
+    time.sleep(0.1)
+    sender.submit(lambda: sent.append(1))
+    sender.submit(lambda: sent.append(2))
+    release.set()
+    assert sender.flush(timeout=5)
+    assert sent == [1]
+
+
+def test_flush_timeouts_do_not_leave_threads_behind():
+    release = threading.Event()
+    sender = telemetry.TelemetrySender()
+    sender.submit(lambda: release.wait(timeout=5))
+    threads = threading.active_count()
+    for _ in range(5):
+        assert not sender.flush(timeout=0.01)
+    assert threading.active_count() == threads
+    release.set()
+    assert sender.flush(timeout=5)
@@ -0,0 +1,139 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from tonic_validate.classes.exceptions import ContextLengthException
+from tonic_validate.utils import llm_calls
+from tonic_validate.utils.model_info import get_context_window
+from tonic_validate.utils.token_budget import (
+    MESSAGE_OVERHEAD_TOKENS,
+    RESPONSE_TOKEN_RESERVE,
+    ContextLengthPolicy,
+    fit_prompt,
+    split_texts,
+    truncate_texts,
+)
+
+
+class WordEncoder:
+    """Encodes each whitespace separated word as one token."""
+
+    name = "words"
+
+    def encode(self, text: str, disallowed_special=()) -> List[str]:
+        return text.split()
+
+    def decode(self, tokens: List[str]) -> str:
+        return " ".join(tokens)
+
+
+class RecordingService:
+    """Records the prompts it is sent instead of calling an LLM."""
+
+    def __init__(self, policy: ContextLengthPolicy, prompt_tokens: int, answer: str):
+        self.model = "test-model"
+        self.encoder = WordEncoder()
+        self.context_length_policy = policy
+        self.context_window = (
+            prompt_tokens + RESPONSE_TOKEN_RESERVE + MESSAGE_OVERHEAD_TOKENS
+        )
+        self.answer = answer
+        self.prompts: List[str] = []
+
+    async def get_response(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return self.answer
+
+    def get_token_count(self, text: str) -> int:
+        return len(self.encoder.encode(text))
+
+
+def build_prompt(texts: List[str]) -> str:
+    return "Template with five words: " + " ".join(texts)
+
+
+def test_context_window_lookup():
+    assert get_context_window("gpt-4") == 8192
+    assert get_context_window("gpt-4-32k-0613") == 32768
+    assert get_context_window("gpt-4o-mini") == 128000
+    assert get_context_window("my-azure-deployment") is None
+
+
+def test_truncate_texts_cuts_longest_texts():
+    service = RecordingService(ContextLengthPolicy.TRUNCATE, 100, "")
+    texts = ["short question", "a " * 50, "b " * 30]
+    truncated = truncate_texts(service, texts, 42)
+    assert truncated[0] == "short question"
+    assert [service.get_token_count(text) for text in truncated] == [2, 20, 20]
+
+
+def test_split_texts_groups_in_order():
+    service = RecordingService(ContextLengthPolicy.SPLIT, 100, "")
+    texts = ["a " * 4, "b " * 4, "c " * 4, "d " * 20]
+    groups = split_texts(service, texts, 10)
+    assert [len(group) for group in groups] == [2, 1, 1]
+    assert service.get_token_count(groups[-1][0]) == 10
+
+
+def test_fit_prompt_policies():
+    texts = ["word " * 50]
+    provider = RecordingService(ContextLengthPolicy.PROVIDER, 20, "")
+    assert fit_prompt(provider, build_prompt, texts) == build_prompt(texts)
+
+    truncate = RecordingService(ContextLengthPolicy.TRUNCATE, 20, "")
+    assert truncate.get_token_count(fit_prompt(truncate, build_prompt, texts)) == 20
+
+    fail_fast = RecordingService(ContextLengthPolicy.FAIL_FAST, 20, "")
+    with pytest.raises(ContextLengthException):
+        fit_prompt(fail_fast, build_prompt, texts)
+
+
+def test_statement_derived_from_split_context():
+    service = RecordingService(ContextLengthPolicy.SPLIT, 400, "false")
+    contexts = [f"context{i} " * 100 for i in range(6)]
+    response = asyncio.run(
+        llm_calls.statement_derived_from_context_call("statement", contexts, service)
+    )
+    assert response == "false"
+    assert len(service.prompts) > 1
+    # Every context is sent whole in exactly one of the prompts
+    for i in range(6):
+        assert sum(f"context{i} " * 99 in prompt for prompt in service.prompts) == 1
+    assert all(service.get_token_count(prompt) <= 400 for prompt in service.prompts)
+
+
+class RejectingService(RecordingService):
+    """Rejects the prompts that are longer than max_tokens, like a provider that
+    counts more tokens than the service's encoder."""
+
+    def __init__(self, prompt_tokens: int, max_tokens: int):
+        super().__init__(ContextLengthPolicy.SPLIT, prompt_tokens, "false")
+        self.max_tokens = max_tokens
+
+    async def get_response(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        if self.get_token_count(prompt) > self.max_tokens:
+            raise ContextLengthException("Prompt too long")
+        return self.answer
+
+
+def test_rejected_split_context_is_truncated_or_skipped():
+    contexts = [f"context{i} " * 100 for i in range(6)]
+    # The provider accepts the prompts once their context is truncated
+    service = RejectingService(400, 300)
+    response = asyncio.run(
+        llm_calls.statement_derived_from_context_call("statement", contexts, service)
+    )
+    assert response == "false"
+    accepted = [p for p in service.prompts if service.get_token_count(p) <= 300]
+    assert len(accepted) == len(service.prompts) // 2
+
+    # The provider rejects every prompt with context
+    service = RejectingService(400, 60)
+    with pytest.raises(ContextLengthException):
+        asyncio.run(
+            llm_calls.statement_derived_from_context_call(
+                "statement", contexts, service
+            )
+        )
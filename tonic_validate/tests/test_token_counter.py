@@ -0,0 +1,48 @@
+from typing import List
+
+import tiktoken
+from tonic_validate.utils import token_counter
+
+
+class CountingEncoder:
+    """Splits on whitespace and records how often it was asked to encode."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+
+    def encode(self, text: str, disallowed_special=()) -> List[str]:
+        self.calls += 1
+        return text.split()
+
+
+def test_token_counts_are_cached_by_text():
+    encoder = CountingEncoder("counting-test")
+    context = "Ryan has a dog named Fido. " * 10
+    assert token_counter.count_tokens(encoder, context) == 60
+    assert token_counter.count_tokens(encoder, "".join([context])) == 60
+    assert encoder.calls == 1
+
+    # Other encodings do not share counts
+    other_encoder = CountingEncoder("other-counting-test")
+    assert token_counter.count_tokens(other_encoder, context) == 60
+    assert other_encoder.calls == 1
+
+
+def test_encoders_are_shared(monkeypatch):
+    created = []
+
+    def encoding_for_model(model):
+        if model == "unknown-model":
+            raise KeyError(model)
+        created.append(model)
+        return CountingEncoder(model)
+
+    monkeypatch.setattr(tiktoken, "encoding_for_model", encoding_for_model)
+    monkeypatch.setattr(tiktoken, "get_encoding", CountingEncoder)
+    monkeypatch.setattr(token_counter, "_encoders", {})
+
+    encoder = token_counter.get_encoder("registry-test-model")
+    assert token_counter.get_encoder("registry-test-model") is encoder
+    assert created == ["registry-test-model"]
+    assert token_counter.get_encoder("unknown-model").name == "cl100k_base"
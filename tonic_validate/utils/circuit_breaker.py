@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Deque
+
+from tonic_validate.classes.exceptions import CircuitOpenException
+
+logger = logging.getLogger()
+
+# How long in seconds requests that wait for a half open circuit check its state again
+PROBE_POLL_INTERVAL = 0.1
+
+
+class CircuitState(str, Enum):
+    """The states of a CircuitBreaker."""
+
+    # Requests are sent
+    CLOSED = "closed"
+    # Requests are rejected, or wait, until open_time has passed
+    OPEN = "open"
+    # One request is sent as a probe, and decides whether the circuit closes again
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a provider that is failing, e.g. during an outage, so
+    that a run fails in seconds instead of sending every request through all of its
+    retries.
+
+    The breaker keeps the outcomes of the last requests. Once at least error_rate of
+    them failed with errors that can go away, e.g. server errors and timeouts, the
+    circuit opens and requests fail right away with a CircuitOpenException, or wait if
+    wait_while_open is set. After open_time, a single request is sent as a probe. If
+    it succeeds, the circuit closes, otherwise it opens again.
+
+    Rate limits and rejected requests, e.g. an invalid prompt, show that the provider
+    is up, so they count as successes.
+    """
+
+    def __init__(
+        self,
+        error_rate: float = 0.5,
+        window: int = 20,
+        min_requests: int = 10,
+        open_time: float = 30.0,
+        wait_while_open: bool = False,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        error_rate: float
+            The fraction of failed requests in the window that opens the circuit.
+        window: int
+            The number of most recent requests whose outcomes are kept.
+        min_requests: int
+            The number of outcomes needed before the circuit can open.
+        open_time: float
+            The time in seconds the circuit stays open before it sends a probe.
+        wait_while_open: bool
+            If True, requests wait while the circuit is open instead of failing, which
+            pauses the run until the provider is back.
+        """
+        self.error_rate = error_rate
+        self.window = window
+        self.min_requests = min_requests
+        self.open_time = open_time
+        self.wait_while_open = wait_while_open
+        # Whether each of the last requests failed
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.trips = 0
+        self.rejected = 0
+        self.__opened_at = 0.0
+        self.__open = False
+        self.__probing = False
+
+    @property
+    def state(self) -> CircuitState:
+        """The state of the circuit."""
+        if not self.__open:
+            return CircuitState.CLOSED
+        if time.monotonic() - self.__opened_at < self.open_time:
+            return CircuitState.OPEN
+        return CircuitState.HALF_OPEN
+
+    async def before_request(self, model: str) -> None:
+        """
+        Waits until a request may be sent
+
+        Parameters
+        ----------
+        model: str
+            The model the request is for, for error messages.
+
+        Raises
+        ------
+        CircuitOpenException
+            If the circuit is open and requests don't wait.
+        """
+        while True:
+            state = self.state
+            if state == CircuitState.CLOSED:
+                return
+            if state == CircuitState.HALF_OPEN and not self.__probing:
+                self.__probing = True
+                logger.info(f"Sending a probe request to {model}")
+                return
+            if not self.wait_while_open:
+                self.rejected += 1
+                raise CircuitOpenException(
+                    f"Not sending the request to {model}, because too many of its "
+                    "recent requests failed"
+                )
+            remaining_time = self.__opened_at + self.open_time - time.monotonic()
+            await asyncio.sleep(max(remaining_time, PROBE_POLL_INTERVAL))
+
+    def record_success(self) -> None:
+        """Records a request that reached the provider."""
+        if self.__probing:
+            logger.info("The probe request succeeded, closing the circuit")
+            self.__open = False
+            self.__probing = False
+            self.outcomes.clear()
+            return
+        self.outcomes.append(False)
+
+    def record_failure(self) -> None:
+        """Records a request that failed with an error that can go away."""
+        if self.__probing:
+            self.__probing = False
+            self.__trip()
+            return
+        self.outcomes.append(True)
+        if (
+            not self.__open
+            and len(self.outcomes) >= self.min_requests
+            and sum(self.outcomes) >= self.error_rate * len(self.outcomes)
+        ):
+            self.__trip()
+
+    def record_cancelled(self) -> None:
+        """Records a request that was cancelled before it got a response."""
+        self.__probing = False
+
+    def __trip(self) -> None:
+        if not self.__open:
+            self.trips += 1
+            logger.warning(
+                f"{sum(self.outcomes)} of the last {len(self.outcomes)} requests "
+                f"failed, opening the circuit for {self.open_time} seconds"
+            )
+        self.__open = True
+        self.__opened_at = time.monotonic()
@@ -0,0 +1,57 @@
+import dataclasses
+from functools import lru_cache
+from typing import Any, Callable, Dict, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=None)
+def _field_defaults(
+    cls: type,
+) -> Tuple[Tuple[str, ...], Dict[str, Any], Dict[str, Callable[[], Any]]]:
+    """Returns the field names, default values and default factories of a dataclass."""
+    names = []
+    defaults: Dict[str, Any] = {}
+    factories: Dict[str, Callable[[], Any]] = {}
+    for field in dataclasses.fields(cls):
+        names.append(field.name)
+        if field.default is not dataclasses.MISSING:
+            defaults[field.name] = field.default
+        elif field.default_factory is not dataclasses.MISSING:
+            factories[field.name] = field.default_factory
+    return tuple(names), defaults, factories
+
+
+def construct_without_validation(cls: Type[T], **values: Any) -> T:
+    """Creates an instance of a pydantic dataclass without running validation.
+
+    Only use this for values that are already known to be valid, e.g. values that were
+    validated at a public entry point or read back from data this library wrote itself.
+    Fields that are not passed get their default value.
+
+    Parameters
+    ----------
+    cls: Type[T]
+        The pydantic dataclass to create.
+    values: Any
+        The field values.
+
+    Returns
+    -------
+    T
+        The new instance.
+    """
+    names, defaults, factories = _field_defaults(cls)
+    if len(values) < len(names):
+        for name in names:
+            if name in values:
+                continue
+            if name in defaults:
+                values[name] = defaults[name]
+            elif name in factories:
+                values[name] = factories[name]()
+            else:
+                raise TypeError(f"Missing value for field {name} of {cls.__name__}")
+    instance = cls.__new__(cls)
+    instance.__dict__.update(values)
+    return instance
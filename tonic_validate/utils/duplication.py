@@ -0,0 +1,221 @@
+import logging
+import random
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from tonic_validate.utils.embeddings import Embedder, max_pairwise_similarity
+
+logger = logging.getLogger()
+
+# Sentences end at ., ! or ? followed by whitespace, or at a line break
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+# The markers of list items, which are not part of their sentence
+LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+WORD = re.compile(r"\w+")
+
+# A Mersenne prime larger than the 32 bit hashes of the shingles
+MINHASH_PRIME = (1 << 61) - 1
+
+
+def split_sentences(text: str, min_words: int = 3) -> List[str]:
+    """
+    Splits a text into sentences
+
+    Parameters
+    ----------
+    text: str
+        The text.
+    min_words: int
+        Sentences with fewer words, e.g. "Yes." or a heading, are left out, since
+        repeating them does not repeat information.
+
+    Returns
+    -------
+    List[str]
+        The sentences, in order.
+    """
+    sentences = []
+    for part in SENTENCE_BOUNDARY.split(text):
+        sentence = LIST_MARKER.sub("", part).strip()
+        if len(WORD.findall(sentence)) >= min_words:
+            sentences.append(sentence)
+    return sentences
+
+
+def shingles(sentence: str, size: int = 3) -> Set[int]:
+    """The hashes of the runs of size words of a sentence, ignoring case and
+    punctuation."""
+    words = [word.lower() for word in WORD.findall(sentence)]
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))}
+    return {
+        zlib.crc32(" ".join(words[i : i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+
+
+class MinHasher:
+    """
+    Estimates the Jaccard similarity of the word shingles of sentences from MinHash
+    signatures, and finds the pairs of sentences worth comparing with locality
+    sensitive hashing, so that long texts are not compared pair by pair.
+
+    The signatures are split into bands, and sentences whose signatures agree on a
+    whole band are compared. Pairs with a similarity above about
+    (1 / bands) ** (1 / rows per band) are likely to be compared.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 32, seed: int = 0) -> None:
+        """
+        Parameters
+        ----------
+        num_perm: int
+            The length of the signatures.
+        bands: int
+            The number of bands the signatures are split into. It must divide
+            num_perm.
+        seed: int
+            The seed of the hash functions.
+        """
+        if num_perm % bands != 0:
+            raise ValueError("The number of bands must divide num_perm")
+        self.num_perm = num_perm
+        self.bands = bands
+        rng = random.Random(seed)
+        self.__permutations = [
+            (rng.randrange(1, MINHASH_PRIME), rng.randrange(0, MINHASH_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, sentence: str) -> Tuple[int, ...]:
+        """The MinHash signature of the shingles of a sentence."""
+        hashes = shingles(sentence)
+        return tuple(
+            min((a * h + b) % MINHASH_PRIME for h in hashes)
+            for a, b in self.__permutations
+        )
+
+    def max_similarity(self, sentences: Sequence[str]) -> float:
+        """The highest estimated similarity of two of the sentences that share a
+        band, or 0 if none do."""
+        signatures = [self.signature(sentence) for sentence in sentences]
+        rows = self.num_perm // self.bands
+        candidates: Set[Tuple[int, int]] = set()
+        for band in range(self.bands):
+            buckets: Dict[Tuple[int, ...], List[int]] = defaultdict(list)
+            for i, signature in enumerate(signatures):
+                buckets[signature[band * rows : (band + 1) * rows]].append(i)
+            for bucket in buckets.values():
+                for position, i in enumerate(bucket):
+                    for j in bucket[position + 1 :]:
+                        candidates.add((i, j))
+        best = 0.0
+        for i, j in candidates:
+            agreeing = sum(a == b for a, b in zip(signatures[i], signatures[j]))
+            best = max(best, agreeing / self.num_perm)
+        return best
+
+
+class DuplicationDetector:
+    """
+    Decides whether a text repeats itself by comparing its sentences, without asking
+    an LLM unless it is unsure.
+
+    With an embedder, the sentences are compared by the cosine similarity of their
+    embeddings, which also finds repeats in other words. Without one, they are
+    compared by the MinHash estimate of the Jaccard similarity of their word
+    shingles, which only finds repeats with mostly the same words but needs no
+    requests. A text whose most similar sentences are at least margin above the
+    threshold repeats itself, one whose most similar sentences are at least margin
+    below it does not, and the others are left to the LLM. A text with fewer than
+    two sentences does not repeat itself.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        threshold: Optional[float] = None,
+        margin: float = 0.05,
+        min_words: int = 3,
+        minhasher: Optional[MinHasher] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        embedder: Optional[Embedder]
+            Embeds the sentences. If not set, the sentences are compared with
+            MinHash.
+        threshold: Optional[float]
+            The similarity of two sentences above which they repeat the same
+            information. Defaults to 0.9 with an embedder and 0.5 with MinHash.
+        margin: float
+            How far from the threshold the highest similarity of a text must be to
+            decide without the LLM.
+        min_words: int
+            Sentences with fewer words are not compared.
+        minhasher: Optional[MinHasher]
+            The MinHasher used without an embedder.
+        """
+        self.embedder = embedder
+        if threshold is None:
+            threshold = 0.9 if embedder is not None else 0.5
+        self.threshold = threshold
+        self.margin = margin
+        self.min_words = min_words
+        self.minhasher = minhasher if minhasher is not None else MinHasher()
+        # How many texts were decided locally and how many were left to the LLM
+        self.decided = 0
+        self.uncertain = 0
+
+    async def prepare(self, texts: Sequence[str]) -> None:
+        """Embeds the sentences of every text in batches, so that deciding each text
+        takes its embeddings from the embedder's cache."""
+        if self.embedder is None:
+            return
+        sentences = [
+            sentence
+            for text in texts
+            for sentence in split_sentences(text, self.min_words)
+        ]
+        await self.embedder.embed(sentences)
+
+    async def max_similarity(self, text: str) -> float:
+        """The highest similarity of two sentences of a text, or 0 if it has fewer
+        than two sentences."""
+        sentences = split_sentences(text, self.min_words)
+        if len(sentences) < 2:
+            return 0.0
+        if self.embedder is None:
+            return self.minhasher.max_similarity(sentences)
+        return max_pairwise_similarity(await self.embedder.embed(sentences))
+
+    async def is_duplicated(self, text: str) -> Optional[bool]:
+        """
+        Decides whether a text repeats itself
+
+        Parameters
+        ----------
+        text: str
+            The text.
+
+        Returns
+        -------
+        Optional[bool]
+            Whether the text repeats itself, or None if its most similar sentences
+            are too close to the threshold to tell.
+        """
+        similarity = await self.max_similarity(text)
+        if similarity >= self.threshold + self.margin:
+            self.decided += 1
+            return True
+        if similarity <= self.threshold - self.margin:
+            self.decided += 1
+            return False
+        self.uncertain += 1
+        logger.debug(
+            f"The most similar sentences have a similarity of {similarity:.2f}, "
+            "asking the LLM whether the text repeats itself"
+        )
+        return None
@@ -0,0 +1,390 @@
+import asyncio
+import functools
+import hashlib
+import logging
+import math
+from abc import ABC, abstractmethod
+from array import array
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+from pydantic.dataclasses import dataclass
+
+from tonic_validate.utils.instrumentation import CallRecorder, LLMCallListener
+from tonic_validate.utils.llm_cache import LLMCache
+from tonic_validate.utils.retry_policy import DecorrelatedJitter, send_with_retries
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger()
+
+# The number of vector pairs compared at once, which bounds the memory of the
+# vectorized comparison
+SIMILARITY_CHUNK_SIZE = 4096
+
+
+def text_hash(text: str) -> str:
+    """The key of a text in the embedding cache."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def normalize(vector: Sequence[float]) -> "array[float]":
+    """Scales a vector to unit length, so that cosine similarity is a dot product, and
+    stores it in single precision to halve the memory of the cache."""
+    norm = math.sqrt(sum(float(x) * float(x) for x in vector))
+    if norm == 0:
+        return array("f", vector)
+    return array("f", (float(x) / norm for x in vector))
+
+
+def cosine_similarities(
+    left: Sequence[Sequence[float]], right: Sequence[Sequence[float]]
+) -> List[float]:
+    """
+    Computes the cosine similarity of each pair of normalized vectors
+
+    The pairs are compared in chunks with numpy if it is installed, and one by one
+    otherwise.
+
+    Parameters
+    ----------
+    left: Sequence[Sequence[float]]
+        The first vector of each pair.
+    right: Sequence[Sequence[float]]
+        The second vector of each pair.
+
+    Returns
+    -------
+    List[float]
+        The similarity of each pair.
+    """
+    if len(left) != len(right):
+        raise ValueError("Both sides need the same number of vectors")
+    try:
+        import numpy as np
+    except ImportError:
+        return [
+            sum(a * b for a, b in zip(left_vector, right_vector))
+            for left_vector, right_vector in zip(left, right)
+        ]
+    similarities: List[float] = []
+    for start in range(0, len(left), SIMILARITY_CHUNK_SIZE):
+        end = start + SIMILARITY_CHUNK_SIZE
+        left_chunk = np.asarray(left[start:end], dtype=np.float32)
+        right_chunk = np.asarray(right[start:end], dtype=np.float32)
+        similarities.extend(np.einsum("ij,ij->i", left_chunk, right_chunk).tolist())
+    return similarities
+
+
+def max_pairwise_similarity(vectors: Sequence[Sequence[float]]) -> float:
+    """
+    Computes the highest cosine similarity of two different normalized vectors
+
+    The vectors are compared with one matrix product with numpy if it is installed,
+    and pair by pair otherwise.
+
+    Parameters
+    ----------
+    vectors: Sequence[Sequence[float]]
+        At least two vectors.
+
+    Returns
+    -------
+    float
+        The similarity of the most similar pair.
+    """
+    if len(vectors) < 2:
+        raise ValueError("Comparing needs at least two vectors")
+    try:
+        import numpy as np
+    except ImportError:
+        return max(
+            sum(a * b for a, b in zip(vectors[i], vectors[j]))
+            for i in range(len(vectors))
+            for j in range(i + 1, len(vectors))
+        )
+    matrix = np.asarray(vectors, dtype=np.float32)
+    similarities = matrix @ matrix.T
+    np.fill_diagonal(similarities, -np.inf)
+    return float(similarities.max())
+
+
+class Embedder(ABC):
+    """
+    Embeds texts in batches and caches the normalized embeddings by the hash of the
+    text, so that every distinct text of a run is embedded once.
+    """
+
+    # The name from_config uses to create the embedder again
+    kind: str
+
+    def __init__(
+        self,
+        model: str,
+        batch_size: int,
+        max_concurrency: int = 1,
+        cache_size: int = 100_000,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        model: str
+            The embedding model.
+        batch_size: int
+            The number of texts embedded per request.
+        max_concurrency: int
+            The number of batches embedded at once.
+        cache_size: int
+            The number of embeddings kept in the cache.
+        """
+        self.model = model
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.cache = LLMCache(maxsize=cache_size)
+        # Called with an LLMCallEvent after every request, like the listeners of the
+        # LLM services
+        self.listeners: List[LLMCallListener] = []
+
+    @abstractmethod
+    async def embed_batch(self, texts: List[str]) -> List[Sequence[float]]:
+        """Embeds a batch of texts with one request."""
+        pass
+
+    async def embed(self, texts: Sequence[str]) -> List["array[float]"]:
+        """
+        Embeds texts, taking the ones embedded before from the cache
+
+        Parameters
+        ----------
+        texts: Sequence[str]
+            The texts, which may repeat.
+
+        Returns
+        -------
+        List[array[float]]
+            The normalized embedding of each text.
+        """
+        embeddings: Dict[str, "array[float]"] = {}
+        missing: Dict[str, str] = {}
+        for text in texts:
+            key = text_hash(text)
+            if key in embeddings or key in missing:
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                embeddings[key] = cached
+            else:
+                missing[key] = text
+        if missing:
+            keys = list(missing)
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def embed_keys(batch_keys: List[str]) -> None:
+                async with semaphore:
+                    vectors = await self.embed_batch(
+                        [missing[key] for key in batch_keys]
+                    )
+                for key, vector in zip(batch_keys, vectors):
+                    embeddings[key] = normalize(vector)
+                    self.cache.put(key, embeddings[key])
+
+            await asyncio.gather(
+                *[
+                    embed_keys(keys[start : start + self.batch_size])
+                    for start in range(0, len(keys), self.batch_size)
+                ]
+            )
+        return [embeddings[text_hash(text)] for text in texts]
+
+
+class OpenAIEmbedder(Embedder):
+    kind = "openai"
+
+    def __init__(
+        self,
+        model: str = "text-embedding-3-small",
+        dimensions: Optional[int] = None,
+        batch_size: int = 512,
+        max_concurrency: int = 4,
+        max_retries: int = 10,
+        cache_size: int = 100_000,
+        client: Optional["AsyncOpenAI"] = None,
+    ) -> None:
+        """
+        Embeds texts with the embeddings endpoint of OpenAI or Azure OpenAI.
+
+        Parameters
+        ----------
+        model: str
+            The embedding model, or the Azure deployment name.
+        dimensions: Optional[int]
+            The number of dimensions of the embeddings, for the models that can
+            shorten them, e.g. 256. Shorter embeddings take less memory in the cache.
+        batch_size: int
+            The number of texts embedded per request.
+        max_concurrency: int
+            The number of requests sent at once.
+        max_retries: int
+            The maximum number of requests to send for a batch.
+        cache_size: int
+            The number of embeddings kept in the cache.
+        client: Optional[AsyncOpenAI]
+            The client to send the requests with. If not set, a client is created
+            from the environment like the one of OpenAIService.
+        """
+        super().__init__(model, batch_size, max_concurrency, cache_size)
+        self.dimensions = dimensions
+        self.max_retries = max_retries
+        self.client = client
+
+    async def embed_batch(self, texts: List[str]) -> List[Sequence[float]]:
+        if self.client is None:
+            from tonic_validate.services.openai_service import create_openai_client
+
+            self.client = create_openai_client()
+        client = self.client
+        options: Dict[str, Any] = {}
+        if self.dimensions is not None:
+            options["dimensions"] = self.dimensions
+
+        # The endpoint rejects empty texts
+        inputs = [text if text else " " for text in texts]
+
+        async def send() -> Any:
+            return await client.embeddings.create(
+                model=self.model, input=inputs, **options
+            )
+
+        recorder = CallRecorder(self, "\n".join(texts))
+        try:
+            response = await send_with_retries(
+                send, recorder, self.model, self.max_retries, DecorrelatedJitter(1.0)
+            )
+        except Exception as e:
+            recorder.finish(error=e)
+            raise
+        if response.usage is not None:
+            recorder.usage(response.usage.prompt_tokens, 0)
+        recorder.finish("")
+        data = sorted(response.data, key=lambda embedding: embedding.index)
+        return [embedding.embedding for embedding in data]
+
+    def get_token_count(self, text: str) -> int:
+        from tonic_validate.utils.token_counter import count_tokens, get_encoder
+
+        return count_tokens(get_encoder(self.model), text)
+
+
+class SentenceTransformerEmbedder(Embedder):
+    kind = "sentence_transformers"
+
+    def __init__(
+        self,
+        model: str = "all-MiniLM-L6-v2",
+        batch_size: int = 64,
+        cache_size: int = 100_000,
+        device: Optional[str] = None,
+    ) -> None:
+        """
+        Embeds texts with a local sentence-transformers model, e.g. on the CPU.
+
+        Parameters
+        ----------
+        model: str
+            The name or path of the sentence-transformers model.
+        batch_size: int
+            The number of texts embedded at once.
+        cache_size: int
+            The number of embeddings kept in the cache.
+        device: Optional[str]
+            The device to run the model on, e.g. "cpu". If not set, the model picks
+            one.
+        """
+        try:
+            from sentence_transformers import SentenceTransformer  # type: ignore
+        except ImportError:
+            raise ImportError(
+                "You must install sentence-transformers to use the SentenceTransformerEmbedder. You can install it via pip: pip install sentence-transformers"
+            )
+        super().__init__(model, batch_size, max_concurrency=1, cache_size=cache_size)
+        self.__model = SentenceTransformer(model, device=device)
+
+    async def embed_batch(self, texts: List[str]) -> List[Sequence[float]]:
+        # The model blocks while it runs, so it runs in a thread to keep the event
+        # loop free for the LLM calls of the other metrics
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            functools.partial(self.__model.encode, texts, batch_size=self.batch_size),
+        )
+
+
+def create_embedder(kind: str, model: str) -> Embedder:
+    """Creates an embedder from the kind and model of a metric's configuration."""
+    if kind == OpenAIEmbedder.kind:
+        return OpenAIEmbedder(model)
+    if kind == SentenceTransformerEmbedder.kind:
+        return SentenceTransformerEmbedder(model)
+    raise ValueError(f"Unknown embedder {kind}")
+
+
+@dataclass
+class SimilarityCalibration:
+    """
+    Maps the cosine similarity of two texts' embeddings to a score between 0 and 5,
+    as slope * similarity + intercept limited to that range.
+
+    The default maps a similarity of 0.5 or less to 0 and 1 to 5. Embedding models
+    differ in how similar unrelated texts are, so fit the calibration to the LLM's
+    scores of a sample of items with AnswerSimilarityMetric.calibrate for scores that
+    can be compared to the LLM's.
+
+    Parameters
+    ----------
+    slope: float
+        The change of the score per unit of similarity.
+    intercept: float
+        The score of a similarity of 0.
+    """
+
+    slope: float = 10.0
+    intercept: float = -5.0
+
+    def score(self, similarity: float) -> float:
+        """The score of a similarity."""
+        return min(max(self.slope * similarity + self.intercept, 0.0), 5.0)
+
+    @staticmethod
+    def fit(
+        similarities: Sequence[float], scores: Sequence[float]
+    ) -> "SimilarityCalibration":
+        """
+        Fits the calibration to scores of the same pairs of texts by least squares
+
+        Parameters
+        ----------
+        similarities: Sequence[float]
+            The cosine similarity of each pair.
+        scores: Sequence[float]
+            The score of each pair, e.g. the LLM's.
+
+        Returns
+        -------
+        SimilarityCalibration
+            The calibration whose scores are closest to the given scores.
+        """
+        if len(similarities) != len(scores) or len(similarities) < 2:
+            raise ValueError("Calibrating needs at least two pairs with a score each")
+        mean_similarity = sum(similarities) / len(similarities)
+        mean_score = sum(scores) / len(scores)
+        variance = sum((x - mean_similarity) ** 2 for x in similarities)
+        if variance == 0:
+            raise ValueError("Calibrating needs pairs with different similarities")
+        covariance = sum(
+            (x - mean_similarity) * (y - mean_score)
+            for x, y in zip(similarities, scores)
+        )
+        slope = covariance / variance
+        return SimilarityCalibration(
+            slope=slope, intercept=mean_score - slope * mean_similarity
+        )
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Coroutine, Dict, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger()
+
+T = TypeVar("T")
+
+
+class EventLoopRunner:
+    """
+    Runs coroutines from synchronous code on an event loop that lives in a background
+    thread for as long as the runner.
+
+    asyncio.run creates a new event loop for every call, so the HTTP connections of
+    the async clients, which belong to the loop they were opened on, can't be reused
+    by the next call. The runner's loop is started on first use and reused by every
+    call, also from inside a running loop, e.g. in a Jupyter notebook.
+    """
+
+    def __init__(self, name: str = "tonic-validate-event-loop") -> None:
+        """
+        Parameters
+        ----------
+        name: str
+            The name of the background thread.
+        """
+        self.name = name
+        self.__lock = threading.Lock()
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+        self.__thread: Optional[threading.Thread] = None
+        # The futures of the waiting calls, and the loop each of them runs on
+        self.__futures: Dict["Future[Any]", asyncio.AbstractEventLoop] = {}
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the background loop is running."""
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def run(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """
+        Runs a coroutine on the background loop and waits for its result
+
+        Parameters
+        ----------
+        coroutine: Coroutine[Any, Any, T]
+            The coroutine.
+
+        Returns
+        -------
+        T
+            The result of the coroutine.
+        """
+        if threading.current_thread() is self.__thread:
+            coroutine.close()
+            raise RuntimeError(
+                "Can't wait for a coroutine on the loop that would have to run it. "
+                "Await it instead."
+            )
+        future: "Future[Tuple[bool, Any]]" = Future()
+        started: List["asyncio.Task[Tuple[bool, Any]]"] = []
+        # The future is registered before the coroutine can run, so that a loop that
+        # dies right away still hands its caller the error that stopped it
+        with self.__lock:
+            loop = self.__start()
+            self.__futures[future] = loop
+
+        def start() -> None:
+            if future.done():
+                # The loop died before the coroutine started
+                coroutine.close()
+                return
+            task = loop.create_task(self.__capture(coroutine))
+            started.append(task)
+            task.add_done_callback(lambda task: self.__resolve(future, task))
+
+        try:
+            loop.call_soon_threadsafe(start)
+        except RuntimeError:
+            # The loop was closed after it died, and future has its error
+            coroutine.close()
+        try:
+            succeeded, result = future.result()
+        except BaseException:
+            # Stop the coroutine if waiting for it was interrupted
+            if not future.done():
+                future.cancel()
+                for task in started:
+                    loop.call_soon_threadsafe(task.cancel)
+            raise
+        finally:
+            self.__futures.pop(future, None)
+        if not succeeded:
+            raise result
+        return result
+
+    @staticmethod
+    def __resolve(
+        future: "Future[Tuple[bool, Any]]", task: "asyncio.Task[Tuple[bool, Any]]"
+    ) -> None:
+        """Hands the outcome of a finished task to its caller, unless the caller
+        already got the error that stopped the loop."""
+        if future.done():
+            return
+        try:
+            if task.cancelled():
+                future.set_exception(asyncio.CancelledError())
+            elif task.exception() is not None:
+                future.set_exception(task.exception())  # type: ignore[arg-type]
+            else:
+                future.set_result(task.result())
+        except InvalidStateError:
+            pass
+
+    @staticmethod
+    async def __capture(coroutine: Coroutine[Any, Any, T]) -> Tuple[bool, Any]:
+        """Returns KeyboardInterrupt and SystemExit instead of raising them on the loop,
+        which they would stop."""
+        try:
+            return True, await coroutine
+        except (KeyboardInterrupt, SystemExit) as e:
+            return False, e
+
+    def close(self) -> None:
+        """Stops the background loop. It is started again by the next run."""
+        with self.__lock:
+            loop, thread = self.__loop, self.__thread
+            self.__loop = self.__thread = None
+        if loop is None or thread is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not threading.current_thread():
+            thread.join()
+
+    def __start(self) -> asyncio.AbstractEventLoop:
+        """Starts the loop if it is not running. Called with the lock held."""
+        if self.__loop is None or self.__thread is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=self.__run_loop, args=(loop,), name=self.name, daemon=True
+            )
+            self.__loop, self.__thread = loop, thread
+            thread.start()
+        return self.__loop
+
+    def __run_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        stop_error: Optional[BaseException] = None
+        try:
+            loop.run_forever()
+        except BaseException as e:
+            # A task other than the ones run was given raised e.g. KeyboardInterrupt,
+            # which stops the loop, so the waiting calls would never get their results
+            logger.debug(f"The event loop of {self.name} stopped with {e!r}")
+            stop_error = e
+        finally:
+            with self.__lock:
+                if self.__loop is loop:
+                    self.__loop = self.__thread = None
+                pending = [
+                    future
+                    for future, future_loop in self.__futures.items()
+                    if future_loop is loop
+                ]
+            if stop_error is not None:
+                # Before the tasks are cancelled, so that the callers get the error
+                # that stopped the loop rather than a CancelledError
+                self.__fail(pending, stop_error)
+            self.__shutdown(loop)
+            # The calls whose coroutines never started before the loop was closed
+            self.__fail(
+                pending, RuntimeError(f"The event loop of {self.name} was closed")
+            )
+
+    @staticmethod
+    def __fail(futures: List["Future[Any]"], error: BaseException) -> None:
+        for future in futures:
+            try:
+                future.set_exception(error)
+            except InvalidStateError:
+                pass
+
+    @staticmethod
+    def __shutdown(loop: asyncio.AbstractEventLoop) -> None:
+        """Cancels the tasks left on a stopped loop and closes it, like asyncio.run."""
+        try:
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
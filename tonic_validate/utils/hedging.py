@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, TypeVar
+
+from tonic_validate.utils.instrumentation import CallRecorder
+
+logger = logging.getLogger()
+
+T = TypeVar("T")
+
+
+class RequestHedger:
+    """
+    Sends a second request for a prompt when the first one takes longer than most
+    requests do, and uses whichever response comes first. A few slow requests then no
+    longer hold their items, and the slots of the scorer's parallelism, for the whole
+    tail of the provider's latency.
+
+    The threshold is a percentile of the latencies of the service's recent requests,
+    so no request is hedged until min_samples requests succeeded. At most
+    max_hedge_rate of the requests are hedged, which caps the extra cost.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        max_hedge_rate: float = 0.05,
+        window: int = 200,
+        min_samples: int = 20,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        percentile: float
+            The percentile of the recent latencies after which a request is hedged.
+        max_hedge_rate: float
+            The maximum number of hedged requests per request.
+        window: int
+            The number of most recent latencies the percentile is taken over.
+        min_samples: int
+            The number of latencies needed before requests are hedged.
+        """
+        self.percentile = percentile
+        self.max_hedge_rate = max_hedge_rate
+        self.min_samples = min_samples
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @property
+    def threshold(self) -> Optional[float]:
+        """The latency in seconds after which a request is hedged, if it is known."""
+        if len(self.latencies) < self.min_samples:
+            return None
+        latencies = sorted(self.latencies)
+        index = max(math.ceil(self.percentile * len(latencies)) - 1, 0)
+        return latencies[index]
+
+    async def send(
+        self, send: Callable[[], Awaitable[T]], recorder: Optional[CallRecorder] = None
+    ) -> T:
+        """
+        Sends a request, and a second one if the first is slow
+
+        Parameters
+        ----------
+        send: Callable[[], Awaitable[T]]
+            Sends the request once.
+        recorder: Optional[CallRecorder]
+            The recorder of the call, which counts the hedged request.
+
+        Returns
+        -------
+        T
+            The result of the first request that succeeded. The other request is
+            cancelled.
+        """
+        self.requests += 1
+        start = time.perf_counter()
+        first = asyncio.ensure_future(send())
+        tasks = [first]
+        try:
+            threshold = self.threshold
+            if threshold is not None:
+                await asyncio.wait({first}, timeout=threshold)
+                if (
+                    not first.done()
+                    and self.hedges < self.max_hedge_rate * self.requests
+                ):
+                    logger.debug(f"Hedging a request after {threshold:.2f} seconds")
+                    self.hedges += 1
+                    if recorder is not None:
+                        recorder.requests += 1
+                    tasks.append(asyncio.ensure_future(send()))
+            error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    task_error = task.exception()
+                    if task_error is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        self.latencies.append(time.perf_counter() - start)
+                        return task.result()
+                    error = error or task_error
+            # Every request failed
+            assert error is not None
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
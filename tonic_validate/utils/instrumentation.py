@@ -0,0 +1,186 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from tonic_validate.classes.run_stats import LLMCallEvent, RunStats
+from tonic_validate.utils.dataclass_util import construct_without_validation
+from tonic_validate.utils.model_info import estimate_cost
+
+if TYPE_CHECKING:
+    from opentelemetry.trace import Tracer
+
+logger = logging.getLogger()
+
+LLMCallListener = Callable[[LLMCallEvent], None]
+
+# Set by the scorer while it scores an item, so that calls can be attributed to the
+# metric and item that made them. Every scored item runs in its own task, so the
+# values of concurrently scored items do not interfere.
+current_metric: ContextVar[Optional[str]] = ContextVar("current_metric", default=None)
+current_item: ContextVar[Optional[int]] = ContextVar("current_item", default=None)
+current_run_stats: ContextVar[Optional[RunStats]] = ContextVar(
+    "current_run_stats", default=None
+)
+
+
+class CallRecorder:
+    """
+    Measures a single get_response call of an LLM service and reports it to the
+    service's listeners and the statistics of the run being scored.
+
+    The service counts requests and rate limits as it retries, and reports the
+    provider's token usage if it has it. Otherwise the tokens are counted with the
+    service's get_token_count.
+    """
+
+    def __init__(self, llm_service: Any, prompt: str) -> None:
+        self.llm_service = llm_service
+        self.prompt = prompt
+        self.metric = current_metric.get()
+        self.item_index = current_item.get()
+        self.start_time = time.time()
+        self.start = time.perf_counter()
+        self.requests = 0
+        self.rate_limits = 0
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+
+    def usage(self, prompt_tokens: int, completion_tokens: int) -> None:
+        """Records the token usage reported by the provider."""
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+    def finish(
+        self,
+        response: Optional[str] = None,
+        error: Optional[BaseException] = None,
+        cache_hit: bool = False,
+    ) -> LLMCallEvent:
+        """
+        Reports the finished call
+
+        Parameters
+        ----------
+        response: Optional[str]
+            The response, if the call succeeded
+        error: Optional[BaseException]
+            The error, if the call failed
+        cache_hit: bool
+            Whether the response came from the service's cache
+
+        Returns
+        -------
+        LLMCallEvent
+            The reported call
+        """
+        prompt_tokens = self.prompt_tokens or 0
+        completion_tokens = self.completion_tokens or 0
+        if response is not None and not cache_hit and self.prompt_tokens is None:
+            prompt_tokens = self.llm_service.get_token_count(self.prompt)
+            completion_tokens = self.llm_service.get_token_count(response)
+        model = self.llm_service.model
+        cost = None
+        if not cache_hit:
+            cost = estimate_cost(model, prompt_tokens, completion_tokens)
+            # e.g. the discount of batch APIs
+            price_multiplier = getattr(self.llm_service, "price_multiplier", None)
+            if cost is not None and price_multiplier is not None:
+                cost *= price_multiplier
+        # Built for every call, so skip validation of the known good values
+        event = construct_without_validation(
+            LLMCallEvent,
+            model=model,
+            metric=self.metric,
+            item_index=self.item_index,
+            start_time=self.start_time,
+            latency=time.perf_counter() - self.start,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            requests=self.requests,
+            retries=max(self.requests - 1, 0),
+            rate_limits=self.rate_limits,
+            cache_hit=cache_hit,
+            cost=cost,
+            error=None if error is None else f"{type(error).__name__}: {error}",
+        )
+        emit(self.llm_service, event)
+        return event
+
+
+def emit(llm_service: Any, event: LLMCallEvent) -> None:
+    """
+    Sends a call event to the service's listeners and the current run's statistics
+
+    Parameters
+    ----------
+    llm_service: Any
+        The service that made the call. Its listeners attribute, if it has one, is a
+        list of functions that are called with every event.
+    event: LLMCallEvent
+        The call
+    """
+    for listener in getattr(llm_service, "listeners", ()):
+        try:
+            listener(event)
+        except Exception as e:
+            logger.warning(f"LLM call listener {listener} failed: {e}")
+    run_stats = current_run_stats.get()
+    if run_stats is not None:
+        run_stats.record(event)
+
+
+def opentelemetry_listener(tracer: Optional["Tracer"] = None) -> LLMCallListener:
+    """
+    Creates a listener that exports each LLM call as an OpenTelemetry span. The span
+    is a child of the span that is current when the call finishes. Add it to a
+    service with llm_service.listeners.append(opentelemetry_listener()).
+
+    Parameters
+    ----------
+    tracer: Optional[Tracer]
+        The tracer to create spans with. Defaults to the global tracer provider's
+        tracer for tonic_validate.
+
+    Returns
+    -------
+    Callable[[LLMCallEvent], None]
+        The listener
+    """
+    try:
+        from opentelemetry import trace
+        from opentelemetry.trace import Status, StatusCode
+    except ImportError as e:
+        logger.error(
+            "opentelemetry-api is not installed. Please install it to export spans."
+        )
+        raise e
+
+    span_tracer = tracer if tracer is not None else trace.get_tracer("tonic_validate")
+
+    def export_span(event: LLMCallEvent) -> None:
+        attributes = {
+            "gen_ai.request.model": event.model,
+            "gen_ai.usage.input_tokens": event.prompt_tokens,
+            "gen_ai.usage.output_tokens": event.completion_tokens,
+            "tonic_validate.metric": event.metric,
+            "tonic_validate.item_index": event.item_index,
+            "tonic_validate.requests": event.requests,
+            "tonic_validate.retries": event.retries,
+            "tonic_validate.rate_limits": event.rate_limits,
+            "tonic_validate.cache_hit": event.cache_hit,
+            "tonic_validate.cost": event.cost,
+        }
+        start_time = int(event.start_time * 1e9)
+        span = span_tracer.start_span(
+            "llm_call",
+            start_time=start_time,
+            attributes={
+                key: value for key, value in attributes.items() if value is not None
+            },
+        )
+        if event.error is not None:
+            span.set_status(Status(StatusCode.ERROR, event.error))
+        span.end(end_time=start_time + int(event.latency * 1e9))
+
+    return export_span
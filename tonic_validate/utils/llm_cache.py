@@ -18,3 +18,6 @@ class LLMCache:
         self.cache[key] = value
         if len(self.cache) > self.maxsize:
             self.cache.popitem(last=False)
+
+    def remove(self, key):
+        self.cache.pop(key, None)
@@ -1,17 +1,90 @@
 import logging
-from typing import List, Union
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, List, Optional, Union
 from tonic_validate.classes.exceptions import ContextLengthException
-from tonic_validate.services.openai_service import OpenAIService
-from tonic_validate.services.litellm_service import LiteLLMService
+from tonic_validate.services.cascade_llm_service import (
+    CascadeLLMService,
+    parse_judgment_response,
+)
+from tonic_validate.services.planned_llm_service import PlannedLLMService
+from tonic_validate.utils.metrics_util import parse_boolean_response
+from tonic_validate.utils.prefilter import Judgment, resolve_locally
+from tonic_validate.utils.token_budget import (
+    ContextLengthPolicy,
+    fit_prompt,
+    get_context_length_policy,
+    input_token_budget,
+    split_texts,
+    truncate_texts,
+)
+
+if TYPE_CHECKING:
+    from tonic_validate.services.openai_service import OpenAIService
+    from tonic_validate.services.litellm_service import LiteLLMService
 
 logger = logging.getLogger()
 
+# How many times a judgment is asked for until the response can be parsed. Set by the
+# scorer from max_parsing_retries while it scores a run.
+parse_attempts: ContextVar[int] = ContextVar("parse_attempts", default=3)
+
+
+async def get_judgment_response(
+    llm_service: "Union[LiteLLMService, OpenAIService]",
+    prompt: str,
+    judgment: Judgment,
+) -> str:
+    """Sends the prompt for a judgment to the evaluator and returns the response.
+
+    A response that can't be parsed is evicted from the service's cache and the prompt
+    is sent again, up to parse_attempts times, so that only the failed call is retried
+    rather than every call of the metric. The last response is returned either way,
+    and the metric reports the parsing error.
+
+    A CascadeLLMService is also told the judgment, so that it can check whether the
+    cheap model's response is usable before returning it. A PlannedLLMService passes
+    it on to the service it wraps. Neither has a cache of its own, so their responses
+    are not asked for again here.
+
+    Parameters
+    ----------
+    llm_service: Union[LiteLLMService, OpenAIService]
+        The service to send the prompt to.
+    prompt: str
+        The prompt.
+    judgment: Judgment
+        The judgment the prompt asks for.
+
+    Returns
+    -------
+    str
+        The evaluator's response.
+    """
+    if isinstance(llm_service, (CascadeLLMService, PlannedLLMService)):
+        return await llm_service.get_response(prompt, judgment)
+    cache = getattr(llm_service, "cache", None)
+    attempts = max(parse_attempts.get(), 1) if cache is not None else 1
+    for attempt in range(1, attempts + 1):
+        response = await llm_service.get_response(prompt)
+        try:
+            parse_judgment_response(judgment, response)
+            break
+        except ValueError as e:
+            if attempt == attempts:
+                break
+            logger.warning(
+                f"Could not parse the {judgment.value} response of {llm_service.model}: "
+                f"{e}. Asking again..."
+            )
+            cache.remove(prompt)
+    return response
+
 
 async def similarity_score_call(
     question: str,
     reference_answer: str,
     llm_answer: str,
-    llm_service: Union[LiteLLMService, OpenAIService],
+    llm_service: "Union[LiteLLMService, OpenAIService]",
 ) -> str:
     """Sends prompt for answer similarity score to OpenAI API, and returns response.
 
@@ -34,13 +107,31 @@ async def similarity_score_call(
     logger.debug(
         f"Asking {llm_service.model} for similarity score for question: {question}"
     )
-    main_message = similarity_score_prompt()
-    main_message += f"\nQUESTION: {question}\n"
-    main_message += f"REFERENCE ANSWER: {reference_answer}\n"
-    main_message += f"NEW ANSWER: {llm_answer}\n"
+
+    local_response = resolve_locally(
+        Judgment.SIMILARITY_SCORE,
+        question=question,
+        reference_answer=reference_answer,
+        answer=llm_answer,
+    )
+    if local_response is not None:
+        return local_response
+
+    def build_prompt(texts: List[str]) -> str:
+        main_message = similarity_score_prompt()
+        main_message += f"\nQUESTION: {texts[0]}\n"
+        main_message += f"REFERENCE ANSWER: {texts[1]}\n"
+        main_message += f"NEW ANSWER: {texts[2]}\n"
+        return main_message
+
+    main_message = fit_prompt(
+        llm_service, build_prompt, [question, reference_answer, llm_answer]
+    )
 
     try:
-        response_message = await llm_service.get_response(main_message)
+        response_message = await get_judgment_response(
+            llm_service, main_message, Judgment.SIMILARITY_SCORE
+        )
     except ContextLengthException as e:
         question_tokens = llm_service.get_token_count(question)
         reference_answer_tokens = llm_service.get_token_count(reference_answer)
@@ -86,7 +177,7 @@ def similarity_score_prompt():
 async def answer_consistent_with_context_call(
     answer: str,
     context_list: List[str],
-    llm_service: Union[LiteLLMService, OpenAIService],
+    llm_service: "Union[LiteLLMService, OpenAIService]",
 ) -> str:
     """Sends prompt for answer consistency binary score and returns response.
 
@@ -106,13 +197,30 @@ async def answer_consistent_with_context_call(
     """
 
     logger.debug(f"Asking {llm_service.model} whether answer hallucinates")
-    main_message = context_consistency_prompt()
-    for i, context in enumerate(context_list):
-        main_message += f"\n\nCONTEXT {i}:\n{context}\nEND OF CONTEXT {i}"
-    main_message += f"\n\nANSWER: {answer}"
+
+    local_response = resolve_locally(
+        Judgment.ANSWER_CONSISTENT_WITH_CONTEXT,
+        answer=answer,
+        context_list=context_list,
+    )
+    if local_response is not None:
+        return local_response
+
+    def build_prompt(texts: List[str]) -> str:
+        main_message = context_consistency_prompt()
+        for i, context in enumerate(texts[1:]):
+            main_message += f"\n\nCONTEXT {i}:\n{context}\nEND OF CONTEXT {i}"
+        main_message += f"\n\nANSWER: {texts[0]}"
+        return main_message
+
+    # Whether the whole answer is supported can't be combined from calls that each
+    # see part of the context, so this prompt is truncated rather than split
+    main_message = fit_prompt(llm_service, build_prompt, [answer] + context_list)
 
     try:
-        response_message = await llm_service.get_response(main_message)
+        response_message = await get_judgment_response(
+            llm_service, main_message, Judgment.ANSWER_CONSISTENT_WITH_CONTEXT
+        )
     except ContextLengthException as e:
         answer_tokens = llm_service.get_token_count(answer)
         context_tokens = 0
@@ -156,7 +264,7 @@ def context_consistency_prompt():
 
 
 async def context_relevancy_call(
-    question: str, context: str, llm_service: Union[LiteLLMService, OpenAIService]
+    question: str, context: str, llm_service: "Union[LiteLLMService, OpenAIService]"
 ) -> str:
     """Sends prompt to get context relevance to Open AI API and returns response.
 
@@ -177,12 +285,25 @@ async def context_relevancy_call(
     logger.debug(
         f"Asking {llm_service.model} for context relevance for question {question}"
     )
-    main_message = context_relevancy_prompt()
-    main_message += f"\nQUESTION: {question}\n"
-    main_message += f"CONTEXT: {context}\n"
+
+    local_response = resolve_locally(
+        Judgment.CONTEXT_RELEVANCY, question=question, context=context
+    )
+    if local_response is not None:
+        return local_response
+
+    def build_prompt(texts: List[str]) -> str:
+        main_message = context_relevancy_prompt()
+        main_message += f"\nQUESTION: {texts[0]}\n"
+        main_message += f"CONTEXT: {texts[1]}\n"
+        return main_message
+
+    main_message = fit_prompt(llm_service, build_prompt, [question, context])
 
     try:
-        response_message = await llm_service.get_response(main_message)
+        response_message = await get_judgment_response(
+            llm_service, main_message, Judgment.CONTEXT_RELEVANCY
+        )
     except ContextLengthException as e:
         question_tokens = llm_service.get_token_count(question)
         context_tokens = llm_service.get_token_count(context)
@@ -223,7 +344,7 @@ def context_relevancy_prompt():
 
 
 async def answer_contains_context_call(
-    answer: str, context: str, llm_service: Union[LiteLLMService, OpenAIService]
+    answer: str, context: str, llm_service: "Union[LiteLLMService, OpenAIService]"
 ) -> str:
     """Sends prompt for whether answer contains context and returns response.
 
@@ -242,12 +363,25 @@ async def answer_contains_context_call(
         Response from OpenAI API.
     """
     logger.debug(f"Asking {llm_service.model} whether answer contains context")
-    main_message = answer_contains_context_prompt()
-    main_message += f"\nANSWER: {answer}\n"
-    main_message += f"CONTEXT: {context}\n"
+
+    local_response = resolve_locally(
+        Judgment.ANSWER_CONTAINS_CONTEXT, answer=answer, context=context
+    )
+    if local_response is not None:
+        return local_response
+
+    def build_prompt(texts: List[str]) -> str:
+        main_message = answer_contains_context_prompt()
+        main_message += f"\nANSWER: {texts[0]}\n"
+        main_message += f"CONTEXT: {texts[1]}\n"
+        return main_message
+
+    main_message = fit_prompt(llm_service, build_prompt, [answer, context])
 
     try:
-        response_message = await llm_service.get_response(main_message)
+        response_message = await get_judgment_response(
+            llm_service, main_message, Judgment.ANSWER_CONTAINS_CONTEXT
+        )
     except ContextLengthException as e:
         answer_tokens = llm_service.get_token_count(answer)
         context_tokens = llm_service.get_token_count(context)
@@ -287,7 +421,7 @@ def answer_contains_context_prompt():
 
 
 async def main_points_call(
-    answer: str, llm_service: Union[LiteLLMService, OpenAIService]
+    answer: str, llm_service: "Union[LiteLLMService, OpenAIService]"
 ) -> str:
     """Sends prompt for main points in answer to Open AI API and returns response.
 
@@ -304,11 +438,20 @@ async def main_points_call(
         Response from OpenAI API.
     """
     logger.debug(f"Asking {llm_service.model} for bullet list of main points in answer")
-    main_message = main_points_prompt()
-    main_message += f"\nANSWER: {answer}"
+
+    local_response = resolve_locally(Judgment.MAIN_POINTS, answer=answer)
+    if local_response is not None:
+        return local_response
+
+    def build_prompt(texts: List[str]) -> str:
+        return main_points_prompt() + f"\nANSWER: {texts[0]}"
+
+    main_message = fit_prompt(llm_service, build_prompt, [answer])
 
     try:
-        response_message = await llm_service.get_response(main_message)
+        response_message = await get_judgment_response(
+            llm_service, main_message, Judgment.MAIN_POINTS
+        )
     except ContextLengthException as e:
         answer_tokens = llm_service.get_token_count(answer)
         total_tokens = llm_service.get_token_count(main_message)
@@ -347,7 +490,7 @@ def main_points_prompt():
 async def statement_derived_from_context_call(
     statement: str,
     context_list: List[str],
-    llm_service: Union[LiteLLMService, OpenAIService],
+    llm_service: "Union[LiteLLMService, OpenAIService]",
 ) -> str:
     """Sends prompt for whether statement is derived from context and returns response.
 
@@ -369,10 +512,33 @@ async def statement_derived_from_context_call(
         f"Asking {llm_service.model} whether statement is derived from context"
     )
 
-    main_message = statement_derived_from_context_prompt(statement, context_list)
+    local_response = resolve_locally(
+        Judgment.STATEMENT_DERIVED_FROM_CONTEXT,
+        statement=statement,
+        context_list=context_list,
+    )
+    if local_response is not None:
+        return local_response
+
+    def build_prompt(texts: List[str]) -> str:
+        return statement_derived_from_context_prompt(texts[0], texts[1:])
+
+    texts = [statement] + context_list
+    if get_context_length_policy(llm_service) == ContextLengthPolicy.SPLIT:
+        budget = input_token_budget(llm_service, build_prompt, texts)
+        context_budget = (
+            None if budget is None else budget - llm_service.get_token_count(statement)
+        )
+        if context_budget is not None and context_budget > 0 and context_list:
+            return await statement_derived_from_split_context_call(
+                statement, context_list, context_budget, llm_service
+            )
+    main_message = fit_prompt(llm_service, build_prompt, texts)
 
     try:
-        response_message = await llm_service.get_response(main_message)
+        response_message = await get_judgment_response(
+            llm_service, main_message, Judgment.STATEMENT_DERIVED_FROM_CONTEXT
+        )
     except ContextLengthException as e:
         statement_tokens = llm_service.get_token_count(statement)
         context_tokens = 0
@@ -396,6 +562,83 @@ async def statement_derived_from_context_call(
     return response_message
 
 
+async def statement_derived_from_split_context_call(
+    statement: str,
+    context_list: List[str],
+    context_budget: int,
+    llm_service: "Union[LiteLLMService, OpenAIService]",
+) -> str:
+    """Checks whether a statement is derived from context that is too long for one prompt.
+
+    The context list is split into groups that fit in the prompt, and each group is
+    checked separately until one of them says the statement is derived from it. The
+    groups are sized with the service's token count, which can differ from the
+    provider's. A group whose prompt the provider still rejects as too long is sent
+    again with its context truncated to half the budget, and skipped with a warning if
+    that is rejected too.
+
+    Parameters
+    ----------
+    statement: str
+        The statement to be checked.
+    context_list: List[str]
+        List of retrieved context to see if statement is derived from this context.
+    context_budget: int
+        The number of tokens the context of each prompt may use.
+    llm_service: Union[LiteLLMService, OpenAIService]
+        The OpenAI Service which allows for communication with the OpenAI API.
+
+    Returns
+    -------
+    str
+        The response for the first group the statement is derived from, or the response
+        for the last group if it is not derived from any of them.
+
+    Raises
+    ------
+    ContextLengthException
+        If the provider rejects the prompt of every group as too long.
+    """
+    context_groups = split_texts(llm_service, context_list, context_budget)
+    logger.debug(
+        f"Splitting {len(context_list)} contexts into {len(context_groups)} prompts"
+    )
+    response_message: Optional[str] = None
+    for index, context_group in enumerate(context_groups):
+        try:
+            group_response = await get_judgment_response(
+                llm_service,
+                statement_derived_from_context_prompt(statement, context_group),
+                Judgment.STATEMENT_DERIVED_FROM_CONTEXT,
+            )
+        except ContextLengthException:
+            truncated_group = truncate_texts(
+                llm_service, context_group, max(context_budget // 2, 1)
+            )
+            try:
+                group_response = await get_judgment_response(
+                    llm_service,
+                    statement_derived_from_context_prompt(statement, truncated_group),
+                    Judgment.STATEMENT_DERIVED_FROM_CONTEXT,
+                )
+            except ContextLengthException as e:
+                logger.warning(
+                    f"Skipping context group {index + 1} of {len(context_groups)}, "
+                    f"which is too long for {llm_service.model} even when truncated: "
+                    f"{e}"
+                )
+                continue
+        response_message = group_response
+        if parse_boolean_response(response_message):
+            break
+    if response_message is None:
+        raise ContextLengthException(
+            f"Every one of the {len(context_groups)} context groups was too long for "
+            f"{llm_service.model} to check whether the statement is derived from it"
+        )
+    return response_message
+
+
 def statement_derived_from_context_prompt(statement: str, context_list: List[str]):
     """
 
@@ -429,7 +672,7 @@ def statement_derived_from_context_prompt(statement: str, context_list: List[str
 
 
 async def contains_duplicate_information(
-    statement: str, llm_service: Union[LiteLLMService, OpenAIService]
+    statement: str, llm_service: "Union[LiteLLMService, OpenAIService]"
 ) -> str:
     """Sends prompt for whether statement contains duplicate information and returns response.
 
@@ -448,11 +691,24 @@ async def contains_duplicate_information(
     logger.debug(
         f"Asking {llm_service.model} whether statement contains duplicate information"
     )
-    main_message = contains_duplicate_info_prompt()
-    main_message += f"\n\nSTATEMENT:\n{statement}\nEND OF STATEMENT"
+
+    local_response = resolve_locally(
+        Judgment.CONTAINS_DUPLICATE_INFORMATION, statement=statement
+    )
+    if local_response is not None:
+        return local_response
+
+    def build_prompt(texts: List[str]) -> str:
+        main_message = contains_duplicate_info_prompt()
+        main_message += f"\n\nSTATEMENT:\n{texts[0]}\nEND OF STATEMENT"
+        return main_message
+
+    main_message = fit_prompt(llm_service, build_prompt, [statement])
 
     try:
-        response_message = await llm_service.get_response(main_message)
+        response_message = await get_judgment_response(
+            llm_service, main_message, Judgment.CONTAINS_DUPLICATE_INFORMATION
+        )
     except ContextLengthException as e:
         statement_tokens = llm_service.get_token_count(statement)
         total_tokens = llm_service.get_token_count(main_message)
@@ -488,7 +744,7 @@ def contains_duplicate_info_prompt():
 
 
 async def contains_hate_speech(
-    statement: str, llm_service: Union[LiteLLMService, OpenAIService]
+    statement: str, llm_service: "Union[LiteLLMService, OpenAIService]"
 ) -> str:
     """Sends prompt for whether statement contains hate speech and returns response.
 
@@ -505,11 +761,22 @@ async def contains_hate_speech(
         Response from OpenAI API.
     """
     logger.debug(f"Asking {llm_service.model} whether statement contains hate speech")
-    main_message = contains_hate_speech_prompt()
-    main_message += f"\n\nSTATEMENT:\n{statement}\nEND OF STATEMENT"
+
+    local_response = resolve_locally(Judgment.CONTAINS_HATE_SPEECH, statement=statement)
+    if local_response is not None:
+        return local_response
+
+    def build_prompt(texts: List[str]) -> str:
+        main_message = contains_hate_speech_prompt()
+        main_message += f"\n\nSTATEMENT:\n{texts[0]}\nEND OF STATEMENT"
+        return main_message
+
+    main_message = fit_prompt(llm_service, build_prompt, [statement])
 
     try:
-        response_message = await llm_service.get_response(main_message)
+        response_message = await get_judgment_response(
+            llm_service, main_message, Judgment.CONTAINS_HATE_SPEECH
+        )
     except ContextLengthException as e:
         statement_tokens = llm_service.get_token_count(statement)
         total_tokens = llm_service.get_token_count(main_message)
@@ -1,8 +1,34 @@
 import logging
-from typing import List
+from typing import Any, Coroutine, List, Sequence, TypeVar
+
+from tonic_validate.services.staged_llm_service import (
+    StagedLLMService,
+    gather_staged,
+)
 
 logger = logging.getLogger()
 
+T = TypeVar("T")
+
+
+async def gather_calls(
+    calls: Sequence[Coroutine[Any, Any, T]], llm_service: Any
+) -> List[T]:
+    """Awaits the LLM calls of an item, all at once for a staged service, so that
+    they join the same stage, and one after the other for the other services, so
+    that an item has one request in flight at a time."""
+    if isinstance(llm_service, StagedLLMService):
+        return await gather_staged(*calls)
+    results: List[T] = []
+    try:
+        for call in calls:
+            results.append(await call)
+    finally:
+        # Calls after a failed one are never started
+        for call in calls[len(results) + 1 :]:
+            call.close()
+    return results
+
 
 def parse_boolean_response(response: str) -> bool:
     """Parse boolean response from LLM evaluator.
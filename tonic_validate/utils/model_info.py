@@ -0,0 +1,110 @@
+from typing import Dict, Mapping, Optional, Tuple
+
+# Context window sizes in tokens, keyed by model name prefix. The longest matching
+# prefix wins, so more specific entries override the model family's default.
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-3.5-turbo-instruct": 4096,
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+    "gpt-4-1106-preview": 128000,
+    "gpt-4-0125-preview": 128000,
+    "gpt-4-vision-preview": 128000,
+    "gpt-4o": 128000,
+    "gpt-4.1": 1047576,
+    "claude-2": 100000,
+    "claude-3": 200000,
+    "gemini/gemini-pro": 30720,
+    "gemini/gemini-1.0-pro": 30720,
+    "gemini/gemini-1.5-flash": 1048576,
+    "gemini/gemini-1.5-pro": 2097152,
+    "command": 4096,
+    "command-r": 128000,
+    "mistral/mistral-tiny": 32000,
+    "mistral/mistral-small": 32000,
+    "mistral/mistral-medium": 32000,
+    "mistral/mistral-large": 32000,
+    "mistral/open-mixtral-8x22b": 65536,
+}
+
+# List prices in US dollars per million (prompt, completion) tokens, keyed by model
+# name prefix like MODEL_CONTEXT_WINDOWS. Add or change entries to match your contract.
+MODEL_TOKEN_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-3.5-turbo": (0.5, 1.5),
+    "gpt-4": (30.0, 60.0),
+    "gpt-4-32k": (60.0, 120.0),
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-4-1106-preview": (10.0, 30.0),
+    "gpt-4-0125-preview": (10.0, 30.0),
+    "gpt-4o": (5.0, 15.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-4.1": (2.0, 8.0),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+    "text-embedding-ada-002": (0.1, 0.0),
+    "claude-3-opus": (15.0, 75.0),
+    "claude-3-sonnet": (3.0, 15.0),
+    "claude-3-5-sonnet": (3.0, 15.0),
+    "claude-3-haiku": (0.25, 1.25),
+    "gemini/gemini-1.5-flash": (0.35, 1.05),
+    "gemini/gemini-1.5-pro": (3.5, 10.5),
+    "mistral/mistral-large": (8.0, 24.0),
+}
+
+
+def _longest_prefix(model: str, table: Mapping[str, object]) -> Optional[str]:
+    model_lower = model.lower()
+    best_match: Optional[str] = None
+    for prefix in table:
+        if model_lower.startswith(prefix) and (
+            best_match is None or len(prefix) > len(best_match)
+        ):
+            best_match = prefix
+    return best_match
+
+
+def get_context_window(model: str) -> Optional[int]:
+    """Looks up the context window of a model.
+
+    Parameters
+    ----------
+    model: str
+        The name of the model.
+
+    Returns
+    -------
+    Optional[int]
+        The number of tokens that fit in the model's context window, or None if the
+        model is not known (e.g. an Azure deployment name).
+    """
+    best_match = _longest_prefix(model, MODEL_CONTEXT_WINDOWS)
+    if best_match is None:
+        return None
+    return MODEL_CONTEXT_WINDOWS[best_match]
+
+
+def estimate_cost(
+    model: str, prompt_tokens: int, completion_tokens: int
+) -> Optional[float]:
+    """Estimates the cost of a call from the model's list prices.
+
+    Parameters
+    ----------
+    model: str
+        The name of the model.
+    prompt_tokens: int
+        The number of prompt tokens.
+    completion_tokens: int
+        The number of completion tokens.
+
+    Returns
+    -------
+    Optional[float]
+        The cost in US dollars, or None if the model's prices are not known.
+    """
+    best_match = _longest_prefix(model, MODEL_TOKEN_PRICES)
+    if best_match is None:
+        return None
+    prompt_price, completion_price = MODEL_TOKEN_PRICES[best_match]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
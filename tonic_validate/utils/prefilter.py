@@ -0,0 +1,132 @@
+import logging
+from contextvars import ContextVar
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from tonic_validate.utils.instrumentation import (
+    current_item,
+    current_metric,
+    current_run_stats,
+)
+
+logger = logging.getLogger()
+
+
+class Judgment(str, Enum):
+    """The judgments the metrics ask the evaluator for, one per call in llm_calls."""
+
+    SIMILARITY_SCORE = "similarity_score"
+    ANSWER_CONSISTENT_WITH_CONTEXT = "answer_consistent_with_context"
+    CONTEXT_RELEVANCY = "context_relevancy"
+    ANSWER_CONTAINS_CONTEXT = "answer_contains_context"
+    MAIN_POINTS = "main_points"
+    STATEMENT_DERIVED_FROM_CONTEXT = "statement_derived_from_context"
+    CONTAINS_DUPLICATE_INFORMATION = "contains_duplicate_information"
+    CONTAINS_HATE_SPEECH = "contains_hate_speech"
+
+
+# A prefilter gets the judgment and the inputs of the call (question, reference_answer,
+# answer, context, context_list or statement) and returns the response the evaluator
+# would give, in the evaluator's format, or None if it can't tell.
+Prefilter = Callable[[Judgment, Dict[str, Any]], Optional[str]]
+
+# The prefilters used by the calls in llm_calls. The scorer sets them for each run.
+active_prefilters: ContextVar[Sequence[Prefilter]] = ContextVar(
+    "active_prefilters", default=()
+)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def empty_answer(judgment: Judgment, inputs: Dict[str, Any]) -> Optional[str]:
+    """An empty answer states nothing, so it can't repeat itself, contain hate speech,
+    contain context or contradict the context."""
+    # The duplication and hate speech calls judge the answer as a statement
+    answer = inputs.get("answer", inputs.get("statement"))
+    if answer is None or answer.strip() != "":
+        return None
+    if judgment in (
+        Judgment.CONTAINS_DUPLICATE_INFORMATION,
+        Judgment.CONTAINS_HATE_SPEECH,
+        Judgment.ANSWER_CONTAINS_CONTEXT,
+    ):
+        return "false"
+    if judgment == Judgment.ANSWER_CONSISTENT_WITH_CONTEXT:
+        return "true"
+    return None
+
+
+def answer_matches_reference(
+    judgment: Judgment, inputs: Dict[str, Any]
+) -> Optional[str]:
+    """An answer that is the reference answer, ignoring case and whitespace, is as
+    similar as it gets."""
+    if judgment != Judgment.SIMILARITY_SCORE:
+        return None
+    answer = _normalize(inputs["answer"])
+    if answer != "" and answer == _normalize(inputs["reference_answer"]):
+        return "5"
+    return None
+
+
+def context_in_answer(judgment: Judgment, inputs: Dict[str, Any]) -> Optional[str]:
+    """An answer that quotes a context chunk verbatim contains its information."""
+    if judgment != Judgment.ANSWER_CONTAINS_CONTEXT:
+        return None
+    context = _normalize(inputs["context"])
+    if context != "" and context in _normalize(inputs["answer"]):
+        return "true"
+    return None
+
+
+def statement_in_context(judgment: Judgment, inputs: Dict[str, Any]) -> Optional[str]:
+    """A statement that is quoted verbatim in the context is derived from it."""
+    if judgment != Judgment.STATEMENT_DERIVED_FROM_CONTEXT:
+        return None
+    statement = _normalize(inputs["statement"])
+    if statement != "" and any(
+        statement in _normalize(context) for context in inputs["context_list"]
+    ):
+        return "true"
+    return None
+
+
+DEFAULT_PREFILTERS: Sequence[Prefilter] = (
+    empty_answer,
+    answer_matches_reference,
+    context_in_answer,
+    statement_in_context,
+)
+
+
+def resolve_locally(judgment: Judgment, **inputs: Any) -> Optional[str]:
+    """
+    Tries to make a judgment with the active prefilters instead of the evaluator
+
+    Parameters
+    ----------
+    judgment: Judgment
+        The judgment the call asks for.
+    inputs: Any
+        The inputs of the call.
+
+    Returns
+    -------
+    Optional[str]
+        The response of the first prefilter that is confident, or None if the call
+        has to go to the evaluator.
+    """
+    for prefilter in active_prefilters.get():
+        response = prefilter(judgment, inputs)
+        if response is not None:
+            name = getattr(prefilter, "__name__", repr(prefilter))
+            logger.debug(f"{name} resolved {judgment.value} locally")
+            run_stats = current_run_stats.get()
+            if run_stats is not None:
+                run_stats.record_prefiltered(
+                    name, current_metric.get(), current_item.get()
+                )
+            return response
+    return None
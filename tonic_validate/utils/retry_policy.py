@@ -0,0 +1,359 @@
+import asyncio
+import logging
+import random
+from contextvars import ContextVar
+from enum import Enum
+from typing import Any, Awaitable, Callable, Optional, TypeVar, Union
+
+from tonic_validate.classes.exceptions import (
+    ContextLengthException,
+    FatalLLMException,
+    LLMException,
+)
+from tonic_validate.utils.circuit_breaker import CircuitBreaker
+from tonic_validate.utils.instrumentation import CallRecorder
+
+logger = logging.getLogger()
+
+T = TypeVar("T")
+
+# The longest wait in seconds between two requests for the same prompt
+DEFAULT_MAX_WAIT_TIME = 60.0
+
+# Logged by the services that are given exp_delay_base
+EXP_DELAY_BASE_DEPRECATION = (
+    "exp_delay_base is deprecated and will be removed in a future version. Waits "
+    "between retries are now drawn with decorrelated jitter, whose growth is set "
+    "with jitter_growth. Services given exp_delay_base keep its exponential backoff."
+)
+
+# Status codes of client errors that can go away on their own: timeouts, conflicts
+# and rate limits. Server errors (5xx) can as well.
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 425, 429})
+
+
+class ErrorKind(str, Enum):
+    """How a failed request is handled."""
+
+    # Retried after a wait, and counted as a rate limit
+    RATE_LIMIT = "rate_limit"
+    # Retried after a wait
+    RETRYABLE = "retryable"
+    # Raised as a ContextLengthException, so that the prompt can be made shorter
+    CONTEXT_LENGTH = "context_length"
+    # Raised as a FatalLLMException without retrying
+    FATAL = "fatal"
+
+
+def classify_error(error: BaseException) -> ErrorKind:
+    """Decides whether a failed request is worth retrying.
+
+    The provider SDKs are not imported: errors are classified by their status_code and
+    code attributes and their class names, which OpenAI's and LiteLLM's exceptions
+    share. Errors that are not recognized are retried.
+
+    Parameters
+    ----------
+    error: BaseException
+        The error the request failed with.
+
+    Returns
+    -------
+    ErrorKind
+        How the error is handled.
+    """
+    if isinstance(error, ContextLengthException):
+        return ErrorKind.CONTEXT_LENGTH
+    if isinstance(error, LLMException):
+        # Raised by the service itself after deciding not to retry
+        return ErrorKind.FATAL
+    name = type(error).__name__
+    if (
+        getattr(error, "code", None) == "context_length_exceeded"
+        or "ContextWindowExceeded" in name
+    ):
+        return ErrorKind.CONTEXT_LENGTH
+    status_code = getattr(error, "status_code", None)
+    if "RateLimit" in name or status_code == 429:
+        return ErrorKind.RATE_LIMIT
+    if isinstance(status_code, int):
+        if status_code in RETRYABLE_STATUS_CODES or status_code >= 500:
+            return ErrorKind.RETRYABLE
+        if 400 <= status_code < 500:
+            # Bad requests, invalid keys, missing permissions and unknown models
+            return ErrorKind.FATAL
+    return ErrorKind.RETRYABLE
+
+
+class DecorrelatedJitter:
+    """
+    Waits between retries with decorrelated jitter: each wait is drawn uniformly
+    between the starting wait time and a multiple of the previous wait, up to a
+    maximum. The waits grow about exponentially, but retries of requests that failed
+    together, e.g. because of the same rate limit, are spread out rather than sent
+    again at the same time.
+    """
+
+    def __init__(
+        self,
+        starting_wait_time: float,
+        growth: float = 3.0,
+        max_wait_time: float = DEFAULT_MAX_WAIT_TIME,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        starting_wait_time: float
+            The shortest wait in seconds.
+        growth: float
+            The longest next wait as a multiple of the previous wait.
+        max_wait_time: float
+            The longest wait in seconds.
+        rng: Optional[random.Random]
+            The random number generator to draw the waits from.
+        """
+        self.starting_wait_time = starting_wait_time
+        self.growth = growth
+        self.max_wait_time = max_wait_time
+        self.rng = rng if rng is not None else random.Random()
+        self.wait_time = starting_wait_time
+
+    def next_wait_time(self) -> float:
+        """Draws the time in seconds to wait before the next retry."""
+        upper = max(self.starting_wait_time, self.wait_time * self.growth)
+        self.wait_time = min(
+            self.max_wait_time, self.rng.uniform(self.starting_wait_time, upper)
+        )
+        return self.wait_time
+
+
+class ExponentialBackoff:
+    """
+    Waits between retries the way the services did before they used decorrelated
+    jitter: each wait is the previous one times base and a random factor between 1
+    and 1.2. Used by the services that are given the deprecated exp_delay_base.
+    """
+
+    def __init__(
+        self,
+        starting_wait_time: float,
+        base: float = 2,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        starting_wait_time: float
+            The first wait in seconds.
+        base: float
+            The factor each wait grows by, before the random factor.
+        rng: Optional[random.Random]
+            The random number generator to draw the random factors from.
+        """
+        self.base = base
+        self.rng = rng if rng is not None else random.Random()
+        self.wait_time = starting_wait_time
+
+    def next_wait_time(self) -> float:
+        """The time in seconds to wait before the next retry."""
+        wait_time = self.wait_time
+        self.wait_time *= self.base * (1 + self.rng.randrange(0, 20) * 0.01)
+        return wait_time
+
+
+Backoff = Union[DecorrelatedJitter, ExponentialBackoff]
+
+
+def create_backoff(
+    starting_wait_time: float,
+    jitter_growth: float,
+    exp_delay_base: Optional[float] = None,
+    rng: Optional[random.Random] = None,
+) -> Backoff:
+    """
+    Creates the backoff of a call to a service
+
+    Parameters
+    ----------
+    starting_wait_time: float
+        The shortest wait in seconds.
+    jitter_growth: float
+        The longest next wait as a multiple of the previous wait, see
+        DecorrelatedJitter.
+    exp_delay_base: Optional[float]
+        The deprecated base of the exponential backoff. If set, it is used instead of
+        decorrelated jitter.
+    rng: Optional[random.Random]
+        The random number generator to draw the waits from.
+
+    Returns
+    -------
+    Backoff
+        A new backoff, which draws the waits of one call.
+    """
+    if exp_delay_base is not None:
+        return ExponentialBackoff(starting_wait_time, exp_delay_base, rng=rng)
+    return DecorrelatedJitter(starting_wait_time, growth=jitter_growth, rng=rng)
+
+
+class RetryBudget:
+    """
+    Limits the retries of a run to a fraction of its requests, so that a provider that
+    fails most requests can't multiply the run's requests and time by the number of
+    retries of each call. Once the budget is used up, failed requests are not retried
+    until enough new requests succeed first.
+
+    The scorer sets one for each run if retry_budget is set.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10) -> None:
+        """
+        Parameters
+        ----------
+        ratio: float
+            The number of retries allowed per first request.
+        min_retries: int
+            The number of retries allowed regardless of the number of requests, so
+            that the first calls of a run can be retried.
+        """
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+
+    def record_request(self) -> None:
+        """Counts the first request for a prompt."""
+        self.requests += 1
+
+    def try_retry(self) -> bool:
+        """
+        Takes a retry from the budget
+
+        Returns
+        -------
+        bool
+            Whether the retry is allowed.
+        """
+        if self.retries < self.min_retries + self.ratio * self.requests:
+            self.retries += 1
+            return True
+        self.denied += 1
+        return False
+
+
+# Set by the scorer while it scores a run. Calls made outside of a run, or in a run
+# without a retry budget, are retried up to the service's max_retries.
+current_retry_budget: ContextVar[Optional[RetryBudget]] = ContextVar(
+    "current_retry_budget", default=None
+)
+
+
+async def send_with_retries(
+    send: Callable[[], Awaitable[T]],
+    recorder: CallRecorder,
+    model: str,
+    max_retries: int,
+    backoff: Backoff,
+    classify: Callable[[BaseException], ErrorKind] = classify_error,
+    circuit_breaker: Optional[CircuitBreaker] = None,
+) -> T:
+    """
+    Sends a request, retrying it while it fails with errors that can go away
+
+    Parameters
+    ----------
+    send: Callable[[], Awaitable[T]]
+        Sends the request once.
+    recorder: CallRecorder
+        The recorder of the call, which counts its requests and rate limits.
+    model: str
+        The model the request is sent to, for error messages.
+    max_retries: int
+        The maximum number of requests to send.
+    backoff: Backoff
+        Draws the waits between the requests.
+    classify: Callable[[BaseException], ErrorKind]
+        Decides how each error is handled.
+    circuit_breaker: Optional[CircuitBreaker]
+        The service's circuit breaker, which is told the outcome of every request and
+        can stop requests from being sent.
+
+    Returns
+    -------
+    T
+        The result of the first request that succeeded.
+
+    Raises
+    ------
+    ContextLengthException
+        If the prompt is too long for the model.
+    FatalLLMException
+        If the request failed with an error that retrying can't fix.
+    CircuitOpenException
+        If the circuit breaker stopped the request from being sent.
+    LLMException
+        If the requests kept failing until max_retries or the run's retry budget was
+        used up.
+    """
+    retry_budget = current_retry_budget.get()
+    if retry_budget is not None:
+        retry_budget.record_request()
+    num_retries = 0
+    while True:
+        if circuit_breaker is not None:
+            await circuit_breaker.before_request(model)
+        recorder.requests += 1
+        try:
+            result = await send()
+        except asyncio.CancelledError:
+            if circuit_breaker is not None:
+                circuit_breaker.record_cancelled()
+            raise
+        except Exception as e:
+            error_kind = classify(e)
+            if circuit_breaker is not None:
+                if error_kind == ErrorKind.RETRYABLE:
+                    circuit_breaker.record_failure()
+                else:
+                    # The provider answered, even if it rejected the request
+                    circuit_breaker.record_success()
+            if error_kind == ErrorKind.CONTEXT_LENGTH:
+                if isinstance(e, ContextLengthException):
+                    raise
+                raise ContextLengthException(_error_message(e)) from e
+            if error_kind == ErrorKind.FATAL:
+                if isinstance(e, LLMException):
+                    raise
+                raise FatalLLMException(
+                    f"{model} rejected the request, which is not retried: "
+                    f"{_error_message(e)}"
+                ) from e
+            if error_kind == ErrorKind.RATE_LIMIT:
+                recorder.rate_limits += 1
+                logger.debug(
+                    f"{model} rate limited the request and entered retry logic, "
+                    f"num_retries={num_retries}"
+                )
+            else:
+                logger.warning(e)
+            num_retries += 1
+            if num_retries >= max_retries:
+                raise LLMException(
+                    f"Failed to get completion response from {model}, max retires hit"
+                ) from e
+            if retry_budget is not None and not retry_budget.try_retry():
+                raise LLMException(
+                    f"Failed to get completion response from {model}, the retry "
+                    "budget of the run is used up"
+                ) from e
+        else:
+            if circuit_breaker is not None:
+                circuit_breaker.record_success()
+            return result
+        await asyncio.sleep(backoff.next_wait_time())
+
+
+def _error_message(error: Any) -> str:
+    return getattr(error, "message", None) or str(error)
@@ -0,0 +1,89 @@
+import time
+from typing import Callable, Optional
+
+from tonic_validate.classes.run_stats import RunStats
+
+
+class RunLimits:
+    """
+    Decides when a run has to stop scheduling new items because it used up its token
+    budget, cost budget or time. Items that are already being scored are finished, so
+    a run can go over its budget by the calls of the items in flight.
+    """
+
+    def __init__(
+        self,
+        stats: RunStats,
+        max_tokens: Optional[int] = None,
+        max_cost: Optional[float] = None,
+        max_run_time: Optional[float] = None,
+        start_time: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        stats: RunStats
+            The statistics of the run's LLM calls, which the budgets are checked against.
+        max_tokens: Optional[int]
+            The maximum number of prompt and completion tokens.
+        max_cost: Optional[float]
+            The maximum estimated cost in US dollars.
+        max_run_time: Optional[float]
+            The maximum time in seconds since start_time.
+        start_time: Optional[float]
+            When the run started, in seconds of the clock. Defaults to now.
+        clock: Callable[[], float]
+            Returns the current time in seconds.
+        """
+        self.stats = stats
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        self.max_run_time = max_run_time
+        self.clock = clock
+        self.start_time = clock() if start_time is None else start_time
+        self.reason: Optional[str] = None
+        self.skipped_items = 0
+
+    def check(self) -> Optional[str]:
+        """
+        Checks whether a new item may be scored. Once a limit is reached, every later
+        check fails as well.
+
+        Returns
+        -------
+        Optional[str]
+            Why the run has to stop, or None if the item may be scored.
+        """
+        if self.reason is None:
+            self.reason = self.__limit_reached()
+        if self.reason is not None:
+            self.skipped_items += 1
+        return self.reason
+
+    def __limit_reached(self) -> Optional[str]:
+        total = self.stats.total
+        if self.max_tokens is not None and total.total_tokens >= self.max_tokens:
+            return (
+                f"Token budget of {self.max_tokens} reached after using "
+                f"{total.total_tokens} tokens"
+            )
+        if self.max_cost is not None and total.cost >= self.max_cost:
+            return (
+                f"Cost budget of ${self.max_cost:.2f} reached after spending "
+                f"${total.cost:.2f}"
+            )
+        return self.time_limit_reached()
+
+    def time_limit_reached(self) -> Optional[str]:
+        """Why the run has to stop because it ran out of time, or None if it has time
+        left. Unlike check, it does not count a skipped item."""
+        if self.max_run_time is None:
+            return None
+        run_time = self.clock() - self.start_time
+        if run_time < self.max_run_time:
+            return None
+        return (
+            f"Time limit of {self.max_run_time} seconds reached after "
+            f"{run_time:.1f} seconds"
+        )
@@ -0,0 +1,239 @@
+import json
+import logging
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Union
+from uuid import UUID
+
+from tonic_validate.utils.dataclass_util import construct_without_validation
+
+if TYPE_CHECKING:
+    from tonic_validate.classes.run import Run, RunData
+
+logger = logging.getLogger()
+
+FORMAT_NAME = b"tonic-validate-run"
+FORMAT_VERSION = b"1"
+SCORE_COLUMN_PREFIX = "score:"
+TEXT_COLUMNS = ["reference_question", "reference_answer", "llm_answer"]
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+    except ImportError as e:
+        logger.error(
+            "-------\n"
+            "PyArrow not found. Please install it to save and load runs. You can "
+            "install it with the arrow extra: pip install tonic-validate[arrow]\n"
+            "-------"
+        )
+        raise e
+    return pa
+
+
+def save_run(run: "Run", path: str) -> None:
+    """Saves a run to an Arrow IPC file.
+
+    Every score gets its own float column, so scores can be read without touching the
+    text. Text columns are dictionary encoded, so questions, answers and context
+    chunks that repeat across items are only stored once.
+
+    Parameters
+    ----------
+    run: Run
+        The run to save.
+    path: str
+        The path of the file to write.
+    """
+    pa = _import_pyarrow()
+    from tonic_validate.utils.score_aggregation import score_columns
+
+    run_data = run.run_data
+    columns: Dict[str, Any] = {}
+    if isinstance(run_data, ArrowRunData):
+        # Already columnar, so the text columns can be copied over as they are
+        for name in TEXT_COLUMNS + ["llm_context", "tags", "metadata"]:
+            columns[name] = run_data.table.column(name)
+    else:
+        for name in TEXT_COLUMNS:
+            columns[name] = pa.array(
+                [getattr(item, name) for item in run_data], type=pa.string()
+            ).dictionary_encode()
+        contexts = [item.llm_context for item in run_data]
+        columns["llm_context"] = _dictionary_encoded_lists(pa, contexts)
+        columns["tags"] = pa.array(
+            [item.tags for item in run_data], type=pa.list_(pa.string())
+        )
+        columns["metadata"] = pa.array(
+            [
+                None if item.metadata is None else json.dumps(item.metadata)
+                for item in run_data
+            ],
+            type=pa.string(),
+        )
+
+    metric_names: List[str] = []
+    for metric_name, column in score_columns(run_data).items():
+        metric_names.append(metric_name)
+        columns[SCORE_COLUMN_PREFIX + metric_name] = pa.array(column, type=pa.float64())
+
+    schema_metadata = {
+        b"format": FORMAT_NAME,
+        b"version": FORMAT_VERSION,
+        b"overall_scores": json.dumps(run.overall_scores).encode(),
+        b"metric_names": json.dumps(metric_names).encode(),
+        b"llm_evaluator": json.dumps(run.llm_evaluator).encode(),
+        b"id": json.dumps(None if run.id is None else str(run.id)).encode(),
+        b"truncation_reason": json.dumps(run.truncation_reason).encode(),
+    }
+    table = pa.table(columns).replace_schema_metadata(schema_metadata)
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _dictionary_encoded_lists(pa, lists: List[Optional[List[str]]]):
+    """Builds a list<dictionary<string>> array where each unique string is stored once."""
+    indices: Dict[str, int] = {}
+    offsets: List[int] = [0]
+    values: List[int] = []
+    validity: List[bool] = []
+    for value_list in lists:
+        validity.append(value_list is not None)
+        for value in value_list or []:
+            values.append(indices.setdefault(value, len(indices)))
+        offsets.append(len(values))
+    dictionary = pa.DictionaryArray.from_arrays(
+        pa.array(values, type=pa.int32()), pa.array(list(indices), type=pa.string())
+    )
+    mask = pa.array([not valid for valid in validity], type=pa.bool_())
+    return pa.ListArray.from_arrays(
+        pa.array(offsets, type=pa.int32()), dictionary, mask=mask
+    )
+
+
+def load_run(path: str, mmap: bool = True) -> "Run":
+    """Loads a run saved with save_run.
+
+    The items of the returned run are created lazily when they are accessed, and the
+    scores can be aggregated straight from the score columns, so loading a large run
+    does not create an object per item.
+
+    Parameters
+    ----------
+    path: str
+        The path of the file to read.
+    mmap: bool
+        If True, memory maps the file instead of reading it into memory.
+
+    Returns
+    -------
+    Run
+        The loaded run.
+    """
+    pa = _import_pyarrow()
+    from tonic_validate.classes.run import Run
+
+    source = pa.memory_map(path, "r") if mmap else pa.OSFile(path, "rb")
+    table = pa.ipc.open_file(source).read_all()
+    schema_metadata = table.schema.metadata or {}
+    if schema_metadata.get(b"format") != FORMAT_NAME:
+        raise ValueError(f"{path} is not a saved Tonic Validate run")
+    if schema_metadata.get(b"version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported run format version {schema_metadata.get(b'version')!r}"
+        )
+
+    run_id = json.loads(schema_metadata[b"id"])
+    # Files saved before runs could be truncated do not have this key
+    truncation_reason = json.loads(schema_metadata.get(b"truncation_reason", b"null"))
+    return construct_without_validation(
+        Run,
+        overall_scores=json.loads(schema_metadata[b"overall_scores"]),
+        run_data=ArrowRunData(table, json.loads(schema_metadata[b"metric_names"])),
+        llm_evaluator=json.loads(schema_metadata[b"llm_evaluator"]),
+        id=None if run_id is None else UUID(run_id),
+        truncated=truncation_reason is not None,
+        truncation_reason=truncation_reason,
+    )
+
+
+class ArrowRunData(Sequence):
+    """
+    A read-only sequence of RunData backed by an Arrow table.
+
+    Items are created on access, so a run can be compared and summarized without
+    creating an object for every item.
+
+    Parameters
+    ----------
+    table: pyarrow.Table
+        The table written by save_run
+    metric_names: List[str]
+        The names of the metrics, in the order of their score columns
+    """
+
+    def __init__(self, table: Any, metric_names: List[str]):
+        self.table = table
+        self.metric_names = metric_names
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:  # type: ignore
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("run data index out of range")
+        return self._row(index)
+
+    def __iter__(self) -> Iterator["RunData"]:
+        for batch in self.table.to_batches():
+            for row in batch.to_pylist():
+                yield self._to_run_data(row)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"ArrowRunData(num_items={len(self)}, metrics={self.metric_names})"
+
+    def _row(self, index: int) -> "RunData":
+        row = {
+            name: self.table.column(name)[index].as_py()
+            for name in self.table.column_names
+        }
+        return self._to_run_data(row)
+
+    def _to_run_data(self, row: Dict[str, Any]) -> "RunData":
+        from tonic_validate.classes.run import RunData
+
+        scores = {
+            metric_name: row[SCORE_COLUMN_PREFIX + metric_name]
+            for metric_name in self.metric_names
+        }
+        metadata = row["metadata"]
+        return construct_without_validation(
+            RunData,
+            scores=scores,
+            reference_question=row["reference_question"],
+            reference_answer=row["reference_answer"],
+            llm_answer=row["llm_answer"],
+            llm_context=row["llm_context"],
+            tags=row["tags"],
+            metadata=None if metadata is None else json.loads(metadata),
+        )
+
+    def score_columns(self) -> Dict[str, List[Optional[float]]]:
+        """Returns the scores as one column per metric, read straight from the table."""
+        return {
+            metric_name: self.table.column(
+                SCORE_COLUMN_PREFIX + metric_name
+            ).to_pylist()
+            for metric_name in self.metric_names
+        }
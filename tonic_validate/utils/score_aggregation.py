@@ -0,0 +1,366 @@
+import hashlib
+import math
+import random
+from collections import defaultdict
+from statistics import NormalDist
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    DefaultDict,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from tonic_validate.classes.metric_summary import MetricSummary
+
+if TYPE_CHECKING:
+    from tonic_validate.classes.run import RunData
+
+DEFAULT_PERCENTILES = (5.0, 25.0, 50.0, 75.0, 95.0)
+# The confidence interval of the mean is analytic unless bootstrap resamples are asked
+# for
+DEFAULT_BOOTSTRAP_SAMPLES = 0
+DEFAULT_CONFIDENCE = 0.95
+
+# Used to group items that do not have a value for the requested grouping
+UNGROUPED = "__ungrouped__"
+
+# The summary of a run, which maps each metric name to its summary, or, when grouping,
+# maps each group to such a mapping
+RunSummary = Union[Dict[str, MetricSummary], Dict[Any, Dict[str, MetricSummary]]]
+
+
+def score_columns(
+    run_data: Iterable["RunData"],
+) -> Dict[str, List[Optional[float]]]:
+    """Collects the scores of a run into one column per metric.
+
+    Every column has one entry per item, so the columns stay aligned with each other.
+    Items that do not have a score for a metric get None in that metric's column.
+
+    Parameters
+    ----------
+    run_data: Iterable[RunData]
+        The items of the run.
+
+    Returns
+    -------
+    Dict[str, List[Optional[float]]]
+        Maps each metric name to its column of scores.
+    """
+    # Run data backed by a columnar store can hand the columns over directly
+    if hasattr(run_data, "score_columns"):
+        return run_data.score_columns()  # type: ignore
+
+    columns: Dict[str, List[Optional[float]]] = {}
+    num_items = 0
+    for item in run_data:
+        for metric_name, score in item.scores.items():
+            column = columns.get(metric_name)
+            if column is None:
+                column = [None] * num_items
+                columns[metric_name] = column
+            column.append(score)
+        num_items += 1
+        for column in columns.values():
+            if len(column) < num_items:
+                column.append(None)
+    return columns
+
+
+def overall_scores(columns: Dict[str, List[Optional[float]]]) -> Dict[str, float]:
+    """Calculates the mean of each score column, ignoring None scores.
+
+    Metrics without a single score are left out, matching how the scorer has always
+    reported overall scores.
+
+    Parameters
+    ----------
+    columns: Dict[str, List[Optional[float]]]
+        The score columns, as returned by score_columns.
+
+    Returns
+    -------
+    Dict[str, float]
+        Maps each metric name to its mean score.
+    """
+    result: Dict[str, float] = {}
+    for metric_name, column in columns.items():
+        values = [score for score in column if score is not None]
+        if values:
+            result[metric_name] = math.fsum(values) / len(values)
+    return result
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Calculates a percentile of already sorted values using linear interpolation.
+
+    Parameters
+    ----------
+    sorted_values: Sequence[float]
+        The values, sorted in ascending order. Must not be empty.
+    q: float
+        The percentile to calculate, between 0 and 100.
+
+    Returns
+    -------
+    float
+        The value at the given percentile.
+    """
+    if not 0 <= q <= 100:
+        raise ValueError(f"Percentile {q} is not within valid range of 0 to 100")
+    position = (len(sorted_values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return float(sorted_values[lower])
+    fraction = position - lower
+    return (
+        sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+    )
+
+
+def column_seed(seed: Optional[int], metric_name: str) -> Optional[int]:
+    """Derives the bootstrap seed of one metric's column from the seed of the run, so
+    that the columns are resampled independently of each other but reproducibly."""
+    if seed is None:
+        return None
+    digest = hashlib.sha256(f"{seed}:{metric_name}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def analytic_interval(
+    values: Sequence[float], mean: float, std: float, confidence: float
+) -> Tuple[float, float]:
+    """Calculates the confidence interval of the mean without resampling.
+
+    Scores that are all 0 or 1 get the Wilson score interval, which stays within 0 and
+    1 and keeps its coverage for means close to either. Other scores get the normal
+    approximation.
+
+    Parameters
+    ----------
+    values: Sequence[float]
+        The scores. Must not be empty.
+    mean: float
+        The mean of the scores.
+    std: float
+        The sample standard deviation of the scores.
+    confidence: float
+        The confidence level of the interval, between 0 and 1.
+
+    Returns
+    -------
+    Tuple[float, float]
+        The lower and upper bound of the interval.
+    """
+    count = len(values)
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    if all(value in (0.0, 1.0) for value in values):
+        denominator = 1 + z * z / count
+        center = (mean + z * z / (2 * count)) / denominator
+        margin = (
+            z
+            * math.sqrt(mean * (1 - mean) / count + z * z / (4 * count * count))
+            / denominator
+        )
+        return (center - margin, center + margin)
+    margin = z * std / math.sqrt(count)
+    return (mean - margin, mean + margin)
+
+
+def summarize_column(
+    column: Sequence[Optional[float]],
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    bootstrap_samples: int = DEFAULT_BOOTSTRAP_SAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: Optional[int] = None,
+) -> MetricSummary:
+    """Calculates summary statistics for one column of scores.
+
+    Parameters
+    ----------
+    column: Sequence[Optional[float]]
+        The scores for a single metric. None scores are counted but otherwise ignored.
+    percentiles: Sequence[float]
+        The percentiles (0-100) to calculate.
+    bootstrap_samples: int
+        The number of bootstrap resamples used for the confidence interval of the mean.
+        Each resample costs one pass over the scores. If 0, the default, the interval
+        is calculated analytically instead, see analytic_interval.
+    confidence: float
+        The confidence level of the interval, between 0 and 1.
+    seed: Optional[int]
+        Seed for the bootstrap resampling, for reproducible intervals.
+
+    Returns
+    -------
+    MetricSummary
+        The summary statistics.
+    """
+    if not 0 < confidence < 1:
+        raise ValueError(f"Confidence {confidence} is not within valid range of 0 to 1")
+
+    values = [score for score in column if score is not None]
+    count = len(values)
+    none_count = len(column) - count
+    if count == 0:
+        return MetricSummary(count=0, none_count=none_count, percentiles={})
+
+    mean = math.fsum(values) / count
+    if count > 1:
+        variance = math.fsum((value - mean) ** 2 for value in values) / (count - 1)
+    else:
+        variance = 0.0
+    std = math.sqrt(variance)
+
+    sorted_values = sorted(values)
+    percentile_values = {q: percentile(sorted_values, q) for q in percentiles}
+
+    alpha = 1 - confidence
+    if bootstrap_samples > 0 and count > 1:
+        rng = random.Random(seed)
+        resample_means = sorted(
+            math.fsum(rng.choices(values, k=count)) / count
+            for _ in range(bootstrap_samples)
+        )
+        ci_low = percentile(resample_means, 100 * alpha / 2)
+        ci_high = percentile(resample_means, 100 * (1 - alpha / 2))
+    else:
+        ci_low, ci_high = analytic_interval(values, mean, std, confidence)
+
+    return MetricSummary(
+        count=count,
+        none_count=none_count,
+        mean=mean,
+        std=std,
+        min=sorted_values[0],
+        max=sorted_values[-1],
+        percentiles=percentile_values,
+        ci_low=ci_low,
+        ci_high=ci_high,
+    )
+
+
+def summarize_columns(
+    columns: Dict[str, List[Optional[float]]],
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    bootstrap_samples: int = DEFAULT_BOOTSTRAP_SAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: Optional[int] = None,
+) -> Dict[str, MetricSummary]:
+    """Calculates summary statistics for every score column.
+
+    See summarize_column for a description of the parameters. Each column is
+    resampled with its own seed, derived from seed and the metric name.
+    """
+    return {
+        metric_name: summarize_column(
+            column,
+            percentiles,
+            bootstrap_samples,
+            confidence,
+            column_seed(seed, metric_name),
+        )
+        for metric_name, column in columns.items()
+    }
+
+
+def group_indices(
+    run_data: Iterable["RunData"],
+    by_tag: bool = False,
+    by_metadata: Optional[str] = None,
+) -> Dict[Any, List[int]]:
+    """Groups the positions of the items in a run by tag or by a metadata value.
+
+    When grouping by tag, an item with several tags belongs to several groups. Items
+    without a tag, or without the metadata key, are put in the UNGROUPED group.
+
+    Parameters
+    ----------
+    run_data: Iterable[RunData]
+        The items of the run.
+    by_tag: bool
+        If True, groups the items by their tags.
+    by_metadata: Optional[str]
+        If set, groups the items by the value of this key in their metadata.
+
+    Returns
+    -------
+    Dict[Any, List[int]]
+        Maps each group to the positions of its items.
+    """
+    if by_tag == (by_metadata is not None):
+        raise ValueError("Exactly one of by_tag or by_metadata must be set")
+
+    groups: DefaultDict[Any, List[int]] = defaultdict(list)
+    for index, item in enumerate(run_data):
+        if by_tag:
+            keys = item.tags or [UNGROUPED]
+        else:
+            metadata = item.metadata or {}
+            keys = [metadata.get(by_metadata, UNGROUPED)]
+        for key in keys:
+            groups[key].append(index)
+    return dict(groups)
+
+
+def summarize_run_data(
+    run_data: Sequence["RunData"],
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    bootstrap_samples: int = DEFAULT_BOOTSTRAP_SAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: Optional[int] = None,
+    by_tag: bool = False,
+    by_metadata: Optional[str] = None,
+) -> RunSummary:
+    """Calculates summary statistics for the scores of a run.
+
+    The scores are collected into per-metric columns in a single pass over the items,
+    and every statistic is then calculated from those columns.
+
+    Parameters
+    ----------
+    run_data: Sequence[RunData]
+        The items of the run.
+    percentiles: Sequence[float]
+        The percentiles (0-100) to calculate.
+    bootstrap_samples: int
+        The number of bootstrap resamples for the confidence interval. 0, the default,
+        uses the analytic interval.
+    confidence: float
+        The confidence level of the interval, between 0 and 1.
+    seed: Optional[int]
+        Seed for the bootstrap resampling.
+    by_tag: bool
+        If True, calculates the statistics separately for each tag.
+    by_metadata: Optional[str]
+        If set, calculates the statistics separately for each value of this metadata key.
+
+    Returns
+    -------
+    RunSummary
+        Maps each metric name to its summary. When grouping, maps each group to such a
+        mapping.
+    """
+    columns = score_columns(run_data)
+    if not by_tag and by_metadata is None:
+        return summarize_columns(
+            columns, percentiles, bootstrap_samples, confidence, seed
+        )
+
+    grouped: Dict[Any, Dict[str, MetricSummary]] = {}
+    for group, indices in group_indices(run_data, by_tag, by_metadata).items():
+        group_columns = {
+            metric_name: [column[index] for index in indices]
+            for metric_name, column in columns.items()
+        }
+        grouped[group] = summarize_columns(
+            group_columns, percentiles, bootstrap_samples, confidence, seed
+        )
+    return grouped
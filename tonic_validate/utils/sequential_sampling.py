@@ -0,0 +1,199 @@
+import math
+import random
+from statistics import NormalDist
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from tonic_validate.classes.run import RunData
+
+DEFAULT_SAMPLING_BATCH_SIZE = 100
+DEFAULT_MIN_SAMPLED_ITEMS = 30
+
+
+class RunningMean:
+    """Keeps the mean and variance of a stream of scores (Welford's algorithm)."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self._sum_of_squares = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._sum_of_squares += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        if self.count < 2:
+            return 0.0
+        return self._sum_of_squares / (self.count - 1)
+
+    def interval(self, confidence: float, population: int) -> Tuple[float, float]:
+        """Calculates the confidence interval of the mean of the whole population.
+
+        Uses the normal approximation with the finite population correction, since the
+        scores are a sample drawn without replacement from the population's items.
+        """
+        if self.count == 0:
+            return (-math.inf, math.inf)
+        standard_error = math.sqrt(self.variance / self.count)
+        if population > 1:
+            standard_error *= math.sqrt(
+                max(population - self.count, 0) / (population - 1)
+            )
+        margin = NormalDist().inv_cdf(1 - (1 - confidence) / 2) * standard_error
+        return (self.mean - margin, self.mean + margin)
+
+
+class SequentialSampler:
+    """
+    Picks the items of a run in random order, batch by batch, and decides when the
+    scores of the items scored so far are enough to stop.
+
+    The sampler stops when the confidence interval of every metric's mean is narrower
+    than target_ci_width, or when every metric's comparison with a baseline is decided:
+    either the interval excludes the baseline score, so the scores differ, or it lies
+    within baseline_tolerance of it, so they match. It never stops before min_items
+    items were scored.
+
+    Checking after every batch gives the sampler several chances to stop on an
+    interval that misses the mean. To keep the chance of stopping on a wrong interval
+    within 1 - confidence, every check uses intervals at the confidence level
+    1 - (1 - confidence) / num_looks, where num_looks is the number of checks the
+    sampler can make (a Bonferroni correction).
+    """
+
+    def __init__(
+        self,
+        num_items: int,
+        target_ci_width: Optional[float] = None,
+        baseline_scores: Optional[Dict[str, float]] = None,
+        baseline_tolerance: float = 0.0,
+        confidence: float = 0.95,
+        batch_size: int = DEFAULT_SAMPLING_BATCH_SIZE,
+        min_items: int = DEFAULT_MIN_SAMPLED_ITEMS,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        num_items: int
+            The number of items in the run.
+        target_ci_width: Optional[float]
+            Stop once every metric's confidence interval is at most this wide.
+        baseline_scores: Optional[Dict[str, float]]
+            The overall scores of a baseline run to compare with.
+        baseline_tolerance: float
+            How far from the baseline score a metric may be to count as matching it.
+        confidence: float
+            The confidence level of the intervals, between 0 and 1.
+        batch_size: int
+            The number of items scored between checks.
+        min_items: int
+            The minimum number of items to score.
+        seed: Optional[int]
+            Seed for the random order of the items.
+        """
+        if target_ci_width is None and baseline_scores is None:
+            raise ValueError("Either target_ci_width or a baseline must be set")
+        if not 0 < confidence < 1:
+            raise ValueError(
+                f"Confidence {confidence} is not within valid range of 0 to 1"
+            )
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.num_items = num_items
+        self.target_ci_width = target_ci_width
+        self.baseline_scores = baseline_scores
+        self.baseline_tolerance = baseline_tolerance
+        self.confidence = confidence
+        self.batch_size = batch_size
+        self.min_items = min_items
+        # The batches after which stop_reason is checked, the first one once
+        # min_items items were scored
+        self.num_looks = max(
+            math.ceil(num_items / batch_size)
+            - math.ceil(min(min_items, num_items) / batch_size)
+            + 1,
+            1,
+        )
+        self.look_confidence = 1 - (1 - confidence) / self.num_looks
+        self.order = list(range(num_items))
+        random.Random(seed).shuffle(self.order)
+        self.num_sampled = 0
+        self.num_scored = 0
+        self.running_means: Dict[str, RunningMean] = {}
+
+    def next_batch(self) -> List[int]:
+        """Gets the indices of the next items to score, empty once every item is picked."""
+        batch = self.order[self.num_sampled : self.num_sampled + self.batch_size]
+        self.num_sampled += len(batch)
+        return batch
+
+    def add(self, run_data: Iterable["RunData"]) -> None:
+        """Adds the scores of newly scored items."""
+        for item in run_data:
+            self.num_scored += 1
+            for metric_name, score in item.scores.items():
+                if score is None:
+                    continue
+                running_mean = self.running_means.get(metric_name)
+                if running_mean is None:
+                    running_mean = self.running_means[metric_name] = RunningMean()
+                running_mean.add(score)
+
+    def intervals(self) -> Dict[str, Tuple[float, float]]:
+        """Calculates the current confidence interval of every metric's mean, at the
+        confidence level of a single check."""
+        return {
+            metric_name: running_mean.interval(self.look_confidence, self.num_items)
+            for metric_name, running_mean in self.running_means.items()
+        }
+
+    def stop_reason(self) -> Optional[str]:
+        """
+        Checks whether enough items were scored
+
+        Returns
+        -------
+        Optional[str]
+            Why sampling can stop, or None if more items need to be scored.
+        """
+        if self.num_scored < self.min_items or not self.running_means:
+            return None
+        intervals = self.intervals()
+        if self.target_ci_width is not None and all(
+            high - low <= self.target_ci_width for low, high in intervals.values()
+        ):
+            return (
+                f"Every metric's {self.confidence:.0%} confidence interval is at most "
+                f"{self.target_ci_width} wide after {self.num_scored} of "
+                f"{self.num_items} items"
+            )
+        if self.baseline_scores is not None:
+            compared = [
+                (intervals[metric_name], baseline_score)
+                for metric_name, baseline_score in self.baseline_scores.items()
+                if metric_name in intervals
+            ]
+            if compared and all(
+                self.__decided(interval, baseline_score)
+                for interval, baseline_score in compared
+            ):
+                return (
+                    f"Every metric's comparison with the baseline is decided at "
+                    f"{self.confidence:.0%} confidence after {self.num_scored} of "
+                    f"{self.num_items} items"
+                )
+        return None
+
+    def __decided(self, interval: Tuple[float, float], baseline_score: float) -> bool:
+        low, high = interval
+        differs = high < baseline_score or low > baseline_score
+        matches = (
+            baseline_score - self.baseline_tolerance <= low
+            and high <= baseline_score + self.baseline_tolerance
+        )
+        return differs or matches
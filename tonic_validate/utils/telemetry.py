@@ -1,7 +1,11 @@
+import atexit
 import json
+import logging
 import os
 import platform
-from typing import List, Optional
+import queue
+import threading
+from typing import Any, Callable, List, Optional
 import uuid
 from tonic_validate.classes.user_info import UserInfo
 from tonic_validate.config import Config
@@ -21,9 +25,100 @@ APP_DIR_NAME = "tonic-validate"
 # 7. Bitbucket: CI
 env_vars = ["GITHUB_ACTIONS", "GITLAB_CI", "TF_BUILD", "CI", "JENKINS_URL"]
 
+# Telemetry requests are best effort, so they never wait long for the server
+TELEMETRY_TIMEOUT = 2
+# Events beyond this are dropped instead of queued when the server is unreachable
+MAX_QUEUED_EVENTS = 100
+
+logger = logging.getLogger()
+
+
+class TelemetrySender:
+    """
+    Sends telemetry requests from a background thread, so that they never add
+    latency to the caller. Requests are dropped if the queue is full.
+    """
+
+    def __init__(self, max_queued_events: int = MAX_QUEUED_EVENTS):
+        self.queue: "queue.Queue[Callable[[], Any]]" = queue.Queue(max_queued_events)
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        # The number of queued requests that were not sent yet, which flush waits for
+        # without a thread of its own
+        self.unsent = 0
+        self.all_sent = threading.Condition()
+
+    def submit(self, send: Callable[[], Any]) -> None:
+        """
+        Queues a request to be sent in the background
+
+        Parameters
+        ----------
+        send: Callable[[], Any]
+            Sends the request. Exceptions it raises are ignored
+        """
+        self.start()
+        with self.all_sent:
+            self.unsent += 1
+        try:
+            self.queue.put_nowait(send)
+        except queue.Full:
+            self.__sent()
+            logger.debug("Telemetry queue is full, dropping event")
+
+    def start(self) -> None:
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(
+                target=self.run, name="tonic-validate-telemetry", daemon=True
+            )
+            self.thread.start()
+            # Give queued events a short chance to be sent before the process exits
+            atexit.register(self.flush, TELEMETRY_TIMEOUT)
+
+    def run(self) -> None:
+        while True:
+            send = self.queue.get()
+            try:
+                send()
+            except Exception as e:
+                logger.debug(f"Failed to send telemetry: {e}")
+            finally:
+                self.queue.task_done()
+                self.__sent()
+
+    def __sent(self) -> None:
+        with self.all_sent:
+            self.unsent -= 1
+            if self.unsent == 0:
+                self.all_sent.notify_all()
+
+    def flush(self, timeout: float) -> bool:
+        """
+        Waits until all queued requests have been sent
+
+        Parameters
+        ----------
+        timeout: float
+            The maximum time to wait, in seconds
+
+        Returns
+        -------
+        bool
+            True if all requests were sent before the timeout
+        """
+        with self.all_sent:
+            return self.all_sent.wait_for(lambda: self.unsent == 0, timeout)
+
+
+sender = TelemetrySender()
+
 
 class Telemetry:
     __has_called_scarf = False
+    __user_info: Optional[UserInfo] = None
+    __user_lock = threading.Lock()
 
     def __init__(self, api_key: Optional[str] = None):
         """
@@ -38,8 +133,9 @@ class Telemetry:
         self.http_client = HttpClient(self.config.TONIC_VALIDATE_TELEMETRY_URL, api_key)
 
         if not Telemetry.__has_called_scarf:
-            self.scarf_analytics()
             Telemetry.__has_called_scarf = True
+            if not self.config.TONIC_VALIDATE_DO_NOT_TRACK:
+                sender.submit(self.scarf_analytics)
 
     def scarf_analytics(self):
         try:
@@ -61,6 +157,7 @@ class Telemetry:
                 + platform.python_version()
                 + "&arch="
                 + platform.machine(),
+                timeout=TELEMETRY_TIMEOUT,
             )
         except Exception:
             pass
@@ -69,11 +166,19 @@ class Telemetry:
         """
         Retrieves the user information from the file. If the user does not exist, creates a new user
 
+        The user is only read from disk once per process.
+
         Returns
         -------
         UserInfo
             Information about the user
         """
+        with Telemetry.__user_lock:
+            if Telemetry.__user_info is None:
+                Telemetry.__user_info = self.__read_user()
+            return Telemetry.__user_info
+
+    def __read_user(self) -> UserInfo:
         app_dir_path = user_data_dir(appname=APP_DIR_NAME)
         user_id_path = os.path.join(app_dir_path, "user.json")
         # check if user_id exists else we create a new uuid and write it to the file
@@ -113,6 +218,9 @@ class Telemetry:
         """
         if self.config.TONIC_VALIDATE_DO_NOT_TRACK:
             return
+        sender.submit(lambda: self.__send_run(num_of_questions, metrics, run_time))
+
+    def __send_run(self, num_of_questions: int, metrics: List[str], run_time: float):
         try:
             from importlib.metadata import version
 
@@ -133,7 +241,7 @@ class Telemetry:
                 "validate_gh_action": self.config.TONIC_VALIDATE_GITHUB_ACTION,
                 "backend": "validate",
             },
-            timeout=5,
+            timeout=TELEMETRY_TIMEOUT,
         )
 
     def log_benchmark(self, num_of_questions: int):
@@ -147,6 +255,9 @@ class Telemetry:
         """
         if self.config.TONIC_VALIDATE_DO_NOT_TRACK:
             return
+        sender.submit(lambda: self.__send_benchmark(num_of_questions))
+
+    def __send_benchmark(self, num_of_questions: int):
         user_id = self.get_user()["user_id"]
         self.http_client.http_post(
             "/benchmarks",
@@ -157,7 +268,7 @@ class Telemetry:
                 "validate_gh_action": self.config.TONIC_VALIDATE_GITHUB_ACTION,
                 "backend": "validate",
             },
-            timeout=5,
+            timeout=TELEMETRY_TIMEOUT,
         )
 
     def link_user(self):
@@ -166,13 +277,16 @@ class Telemetry:
         """
         if self.config.TONIC_VALIDATE_DO_NOT_TRACK:
             return
+        sender.submit(self.__send_link_user)
+
+    def __send_link_user(self):
         telemetry_user = self.get_user()
         if telemetry_user["linked"]:
             return
         self.http_client.http_post(
             "/users/link",
             data={"telemetry_user_id": telemetry_user["user_id"]},
-            timeout=5,
+            timeout=TELEMETRY_TIMEOUT,
         )
         # Write the linked user to the file
         telemetry_user["linked"] = True
@@ -0,0 +1,209 @@
+import logging
+from enum import Enum
+from typing import TYPE_CHECKING, Callable, List, Optional, Union
+
+from tonic_validate.classes.exceptions import ContextLengthException
+
+if TYPE_CHECKING:
+    from tonic_validate.services.openai_service import OpenAIService
+    from tonic_validate.services.litellm_service import LiteLLMService
+
+logger = logging.getLogger()
+
+# Tokens kept free for the evaluator's response
+RESPONSE_TOKEN_RESERVE = 1024
+# Tokens used by the system message and the chat message framing
+MESSAGE_OVERHEAD_TOKENS = 32
+
+
+class ContextLengthPolicy(str, Enum):
+    """
+    What to do with a prompt that does not fit in the evaluator's context window.
+
+    PROVIDER sends every prompt and relies on the provider rejecting prompts that are
+    too long, which scores the item as None. The other policies check the prompt size
+    before sending it. FAIL_FAST raises a ContextLengthException without calling the
+    provider. TRUNCATE shortens the longest inputs of the prompt (contexts, answers
+    and statements) until it fits. SPLIT spreads the context list over several calls
+    when checking whether a statement is derived from the context, and counts the
+    statement as derived if any call says so. Prompts that cannot be split are
+    truncated.
+    """
+
+    PROVIDER = "provider"
+    FAIL_FAST = "fail_fast"
+    TRUNCATE = "truncate"
+    SPLIT = "split"
+
+
+def get_context_length_policy(
+    llm_service: "Union[LiteLLMService, OpenAIService]",
+) -> ContextLengthPolicy:
+    return getattr(llm_service, "context_length_policy", ContextLengthPolicy.PROVIDER)
+
+
+def prompt_token_limit(
+    llm_service: "Union[LiteLLMService, OpenAIService]",
+) -> Optional[int]:
+    """Gets the maximum number of prompt tokens for the service's model.
+
+    Returns None if the context window of the model is not known.
+    """
+    context_window = getattr(llm_service, "context_window", None)
+    if context_window is None:
+        return None
+    return context_window - RESPONSE_TOKEN_RESERVE - MESSAGE_OVERHEAD_TOKENS
+
+
+def truncate_text(
+    llm_service: "Union[LiteLLMService, OpenAIService]", text: str, max_tokens: int
+) -> str:
+    """Truncates a text to at most max_tokens tokens.
+
+    Services without an encoder, such as a FakeLLMService by default, count words as
+    tokens, so their texts are truncated to max_tokens words.
+    """
+    encoder = getattr(llm_service, "encoder", None)
+    if encoder is None:
+        words = text.split()
+        if len(words) <= max_tokens:
+            return text
+        return " ".join(words[:max_tokens])
+    tokens = encoder.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoder.decode(tokens[:max_tokens])
+
+
+def truncate_texts(
+    llm_service: "Union[LiteLLMService, OpenAIService]",
+    texts: List[str],
+    max_tokens: int,
+) -> List[str]:
+    """Truncates texts so that together they have at most max_tokens tokens.
+
+    Only the longest texts are truncated, to a common length, so short texts such as
+    the question are kept whole whenever possible.
+    """
+    token_counts = [llm_service.get_token_count(text) for text in texts]
+    if sum(token_counts) <= max_tokens:
+        return texts
+
+    # Find the largest length that every text can be cut to while staying in budget
+    remaining = max_tokens
+    cap = 0
+    sorted_counts = sorted(token_counts)
+    for i, token_count in enumerate(sorted_counts):
+        share = remaining // (len(sorted_counts) - i)
+        if token_count > share:
+            cap = share
+            break
+        remaining -= token_count
+    return [
+        text if token_count <= cap else truncate_text(llm_service, text, cap)
+        for text, token_count in zip(texts, token_counts)
+    ]
+
+
+def split_texts(
+    llm_service: "Union[LiteLLMService, OpenAIService]",
+    texts: List[str],
+    max_tokens: int,
+) -> List[List[str]]:
+    """Splits texts into consecutive groups that each have at most max_tokens tokens.
+
+    A single text that is too long on its own is truncated.
+    """
+    groups: List[List[str]] = []
+    group: List[str] = []
+    group_tokens = 0
+    for text in texts:
+        token_count = llm_service.get_token_count(text)
+        if token_count > max_tokens:
+            text = truncate_text(llm_service, text, max_tokens)
+            token_count = max_tokens
+        if group and group_tokens + token_count > max_tokens:
+            groups.append(group)
+            group = []
+            group_tokens = 0
+        group.append(text)
+        group_tokens += token_count
+    if group:
+        groups.append(group)
+    return groups
+
+
+def input_token_budget(
+    llm_service: "Union[LiteLLMService, OpenAIService]",
+    build_prompt: Callable[[List[str]], str],
+    texts: List[str],
+) -> Optional[int]:
+    """Calculates how many tokens the variable inputs of a prompt may use.
+
+    Parameters
+    ----------
+    llm_service: Union[LiteLLMService, OpenAIService]
+        The service the prompt is sent to.
+    build_prompt: Callable[[List[str]], str]
+        Builds the prompt from its variable inputs.
+    texts: List[str]
+        The variable inputs of the prompt.
+
+    Returns
+    -------
+    Optional[int]
+        The number of tokens available for the inputs, or None if the prompt already
+        fits or the service's policy does not check prompt sizes.
+    """
+    policy = get_context_length_policy(llm_service)
+    limit = prompt_token_limit(llm_service)
+    if policy == ContextLengthPolicy.PROVIDER or limit is None:
+        return None
+    prompt_tokens = llm_service.get_token_count(build_prompt(texts))
+    if prompt_tokens <= limit:
+        return None
+
+    if policy == ContextLengthPolicy.FAIL_FAST:
+        raise ContextLengthException(
+            f"Prompt has {prompt_tokens} tokens, which is more than the {limit} "
+            f"prompt tokens allowed for {llm_service.model}. The prompt was not sent."
+        )
+    input_tokens = sum(llm_service.get_token_count(text) for text in texts)
+    budget = limit - (prompt_tokens - input_tokens)
+    if budget <= 0:
+        raise ContextLengthException(
+            f"The prompt template alone is longer than the {limit} prompt tokens "
+            f"allowed for {llm_service.model}"
+        )
+    logger.debug(
+        f"Prompt has {prompt_tokens} tokens, limiting its inputs to {budget} tokens"
+    )
+    return budget
+
+
+def fit_prompt(
+    llm_service: "Union[LiteLLMService, OpenAIService]",
+    build_prompt: Callable[[List[str]], str],
+    texts: List[str],
+) -> str:
+    """Builds a prompt, applying the service's context length policy.
+
+    Parameters
+    ----------
+    llm_service: Union[LiteLLMService, OpenAIService]
+        The service the prompt is sent to.
+    build_prompt: Callable[[List[str]], str]
+        Builds the prompt from its variable inputs.
+    texts: List[str]
+        The variable inputs of the prompt, which are truncated if the prompt does not
+        fit.
+
+    Returns
+    -------
+    str
+        The prompt.
+    """
+    budget = input_token_budget(llm_service, build_prompt, texts)
+    if budget is None:
+        return build_prompt(texts)
+    return build_prompt(truncate_texts(llm_service, texts, budget))
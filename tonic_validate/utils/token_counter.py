@@ -0,0 +1,86 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Tuple
+
+if TYPE_CHECKING:
+    from tiktoken import Encoding
+
+logger = logging.getLogger()
+
+DEFAULT_ENCODING = "cl100k_base"
+# Number of token counts to remember, shared by every encoder in the process
+TOKEN_COUNT_CACHE_SIZE = 100_000
+
+_encoders: Dict[str, "Encoding"] = {}
+_encoders_lock = threading.Lock()
+
+_token_counts: "OrderedDict[Tuple[str, bytes], int]" = OrderedDict()
+_token_counts_lock = threading.Lock()
+
+
+def get_encoder(model: str) -> "Encoding":
+    """Gets the tiktoken encoder for a model.
+
+    Encoders are created once per model and shared by the whole process. Models that
+    tiktoken does not know use the cl100k_base encoding.
+
+    Parameters
+    ----------
+    model: str
+        The name of the model.
+
+    Returns
+    -------
+    Encoding
+        The encoder for the model.
+    """
+    with _encoders_lock:
+        encoder = _encoders.get(model)
+        if encoder is None:
+            import tiktoken
+
+            try:
+                encoder = tiktoken.encoding_for_model(model)
+            except Exception as _:
+                logger.info(
+                    f"Defaulting to {DEFAULT_ENCODING} for measuring token count"
+                )
+                encoder = tiktoken.get_encoding(DEFAULT_ENCODING)
+            _encoders[model] = encoder
+        return encoder
+
+
+def count_tokens(encoder: "Encoding", text: str) -> int:
+    """Counts the tokens in a text.
+
+    Counts are cached by encoding and a hash of the text, so counting the same text
+    again, e.g. a context chunk that appears in many prompts, does not encode it again.
+
+    Parameters
+    ----------
+    encoder: Encoding
+        The encoder to count tokens with.
+    text: str
+        The text to count the tokens of.
+
+    Returns
+    -------
+    int
+        The number of tokens in the text.
+    """
+    key = (encoder.name, hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest())
+    with _token_counts_lock:
+        count = _token_counts.get(key)
+        if count is not None:
+            _token_counts.move_to_end(key)
+            return count
+
+    count = len(encoder.encode(text, disallowed_special=()))
+
+    with _token_counts_lock:
+        _token_counts[key] = count
+        if len(_token_counts) > TOKEN_COUNT_CACHE_SIZE:
+            _token_counts.popitem(last=False)
+    return count
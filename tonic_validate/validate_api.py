@@ -1,12 +1,20 @@
+import logging
 from typing import Any, List, Optional, Dict
 from pydantic import ConfigDict, validate_call
 from tonic_validate.classes.benchmark import Benchmark
+from tonic_validate.classes.context_store import ContextStore
 from tonic_validate.classes.run import Run
 from tonic_validate.config import Config
 
 from tonic_validate.utils.http_client import HttpClient
 from tonic_validate.utils.telemetry import Telemetry
 
+logger = logging.getLogger()
+
+# Lists the optional features of the Tonic Validate server
+FEATURES_PATH = "/features"
+DEDUPLICATED_CONTEXT_FEATURE = "deduplicated_context"
+
 
 class ValidateApi:
     @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
@@ -32,6 +40,7 @@ class ValidateApi:
                 )
                 raise Exception(exception_message)
         self.client = HttpClient(self.config.TONIC_VALIDATE_BASE_URL, api_key)
+        self.__supports_deduplicated_context: Optional[bool] = None
         try:
             telemetry = Telemetry(api_key)
             telemetry.link_user()
@@ -45,6 +54,7 @@ class ValidateApi:
         run: Run,
         run_metadata: Optional[Dict[str, Any]] = {},
         tags: Optional[List[str]] = [],
+        deduplicate_context: bool = False,
     ) -> str:
         """Upload a run to a Tonic Validate project.
 
@@ -59,19 +69,58 @@ class ValidateApi:
             converted to strings before making the request.
         tags : Optional[List[str]]
             A list of tags which can be used to identify this run.  Tags will be rendered in the UI and can also make run searchable.
+        deduplicate_context : bool
+            If True, each unique context chunk is sent once under "contexts" and the
+            run data references the chunks by id. This needs a server that lists
+            "deduplicated_context": true in the response of GET /features. If the
+            server does not, e.g. because it has no /features endpoint, a warning is
+            logged and the context of every item is sent with the item, as when this
+            is False.
         """
         if run_metadata and "llm_evaluator" not in run_metadata:
             run_metadata["llm_evaluator"] = run.llm_evaluator
+        data: Dict[str, Any] = {"run_metadata": run_metadata, "tags": tags}
+        if deduplicate_context and not self.supports_deduplicated_context():
+            logger.warning(
+                "The Tonic Validate server does not list the "
+                f"{DEDUPLICATED_CONTEXT_FEATURE} feature at {FEATURES_PATH}, so "
+                "deduplicate_context is ignored and the context of every item is sent "
+                "with the item"
+            )
+            deduplicate_context = False
+        if deduplicate_context:
+            context_store = ContextStore()
+            data["data"] = [
+                run_data.to_dict(context_store) for run_data in run.run_data
+            ]
+            data["contexts"] = context_store.to_dict()
+        else:
+            data["data"] = [run_data.to_dict() for run_data in run.run_data]
         run_response = self.client.http_post(
-            f"/projects/{project_id}/runs/with_data",
-            data={
-                "run_metadata": run_metadata,
-                "tags": tags,
-                "data": [run_data.to_dict() for run_data in run.run_data],
-            },
+            f"/projects/{project_id}/runs/with_data", data=data
         )
         return run_response["id"]
 
+    def supports_deduplicated_context(self) -> bool:
+        """Whether the server accepts runs whose context chunks are sent once under
+        "contexts". The server is asked once, at GET /features, and a server that
+        does not list the feature there, or can't be asked, is taken not to support
+        it, since it would drop the context."""
+        if self.__supports_deduplicated_context is None:
+            try:
+                features = self.client.http_get(FEATURES_PATH, timeout=10)
+                self.__supports_deduplicated_context = (
+                    isinstance(features, dict)
+                    and features.get(DEDUPLICATED_CONTEXT_FEATURE) is True
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Could not get the features of the server from {FEATURES_PATH}: "
+                    f"{e}"
+                )
+                self.__supports_deduplicated_context = False
+        return self.__supports_deduplicated_context
+
     @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
     def get_benchmark(self, benchmark_id: str) -> Benchmark:
         """Get a Tonic Validate benchmark by its ID.
@@ -1,27 +1,75 @@
 from asyncio import Semaphore
 import asyncio
-from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor
-from typing import Any, Awaitable, Callable, DefaultDict, List, Dict, Type, Union
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Coroutine,
+    List,
+    Dict,
+    Iterable,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 
 from pydantic import ConfigDict, TypeAdapter, validate_call
 from tonic_validate.classes.benchmark import Benchmark, BenchmarkItem
 import logging
+from tonic_validate.classes.context_store import ContextList, ContextStore
 from tonic_validate.classes.exceptions import LLMException
 
 from tonic_validate.classes.llm_response import CallbackLLMResponse, LLMResponse
 from tonic_validate.classes.run import Run, RunData
+from tonic_validate.classes.run_stats import RunStats
+from tonic_validate.services.planned_llm_service import PlannedLLMService
+from tonic_validate.services.staged_llm_service import (
+    StagedLLMService,
+    gather_staged,
+    run_staged,
+    staged_branch,
+)
+from tonic_validate.services.service_factory import create_llm_service
+from tonic_validate.services.service_registry import ServiceRegistry
 import tonic_validate.metrics as tonic_metrics
-from tonic_validate.services.openai_service import OpenAIService
-from tonic_validate.services.litellm_service import LiteLLMService
-import tiktoken
+from tonic_validate.utils.score_aggregation import (
+    DEFAULT_CONFIDENCE,
+    overall_scores as calculate_overall_scores,
+    score_columns,
+)
+from tonic_validate.utils.circuit_breaker import CircuitBreaker
+from tonic_validate.utils.dataclass_util import construct_without_validation
+from tonic_validate.utils.event_loop_runner import EventLoopRunner
+from tonic_validate.utils.hedging import RequestHedger
+from tonic_validate.utils.llm_calls import parse_attempts
+from tonic_validate.utils.model_info import estimate_cost
+from tonic_validate.utils.prefilter import Prefilter, active_prefilters
+from tonic_validate.utils.retry_policy import RetryBudget, current_retry_budget
+from tonic_validate.utils.run_limits import RunLimits
+from tonic_validate.utils.sequential_sampling import (
+    DEFAULT_MIN_SAMPLED_ITEMS,
+    DEFAULT_SAMPLING_BATCH_SIZE,
+    SequentialSampler,
+)
+from tonic_validate.utils.instrumentation import (
+    current_item,
+    current_metric,
+    current_run_stats,
+)
 from tonic_validate.utils.telemetry import Telemetry
+from tonic_validate.utils.token_budget import ContextLengthPolicy
 from tqdm.asyncio import tqdm as async_tqdm
 from tqdm import tqdm
 import time
+import weakref
 
 logger = logging.getLogger()
 CallbackValidator = TypeAdapter(CallbackLLMResponse)
+# A service, the metrics it scores and the semaphore that limits its parallelism
+ServicePool = Tuple[Any, List[tonic_metrics.Metric], Semaphore]
 
 # Gets a list of all the metric names
 metric_dict: Dict[str, Type[tonic_metrics.Metric]] = {}
@@ -53,6 +101,23 @@ class ValidateScorer:
         fail_on_error: bool = False,
         quiet: bool = False,
         model_id: str = "",
+        context_length_policy: ContextLengthPolicy = ContextLengthPolicy.PROVIDER,
+        context_window: Optional[int] = None,
+        llm_service: Optional[Any] = None,
+        max_tokens: Optional[int] = None,
+        max_cost: Optional[float] = None,
+        max_run_time: Optional[float] = None,
+        prefilters: Optional[Sequence[Prefilter]] = None,
+        cheap_model_evaluator: Optional[str] = None,
+        audit_rate: float = 0.0,
+        metric_evaluators: Optional[Dict[str, Union[str, Any]]] = None,
+        plan_prompts: bool = False,
+        retry_budget: Optional[float] = None,
+        circuit_breaker_error_rate: Optional[float] = None,
+        request_timeout: Optional[float] = None,
+        hedge_requests: bool = False,
+        service_registry: Optional[ServiceRegistry] = None,
+        clock: Callable[[], float] = time.time,
     ):
         """
         Create a Tonic Validate scorer that can work with either OpenAIService or LiteLLMService.
@@ -64,54 +129,227 @@ class ValidateScorer:
         model_evaluator: str
             The model to be used for scoring.
         max_parsing_retries: int
-            The number of times to retry a failed score if it failed due to parsing.
+            The number of times to ask for a judgment whose response can't be parsed.
+            Only the call that got the response is sent again, not every call of the
+            metric.
         max_llm_retries: int
-            The number of times to retry a failed llm request.
+            The number of times to send a failed llm request. Requests that fail with
+            an error that retrying can't fix, e.g. an invalid API key or an unknown
+            model, are not retried.
         fail_on_error: bool
             If True, an error in calculating a metric will raise an exception. If False, the score will be set to None.
         quiet: bool
             If True, will suppress all logging except errors.
+        context_length_policy: ContextLengthPolicy
+            What to do with prompts that do not fit in the evaluator's context window.
+            PROVIDER (the default) sends them anyway and lets the provider reject them,
+            FAIL_FAST rejects them without calling the provider, TRUNCATE shortens their
+            longest inputs and SPLIT spreads long context lists over several calls.
+        context_window: Optional[int]
+            The context window of the evaluator in tokens. If not set, it is looked up
+            from the model name. Prompts are not checked if it is unknown.
+        llm_service: Optional[Any]
+            The service used to call the evaluator, instead of the one created from
+            model_evaluator. It must have get_response and get_token_count methods,
+            e.g. a FakeLLMService for scoring without network access.
+        max_tokens: Optional[int]
+            The maximum number of evaluator tokens (prompt and completion) per run.
+        max_cost: Optional[float]
+            The maximum estimated evaluator cost per run in US dollars.
+        max_run_time: Optional[float]
+            The maximum time in seconds per run, including the time spent on callbacks.
+            Once any of these limits is reached, no new items are scored. Items that
+            are being scored are finished and the run is returned with only the scored
+            items and truncated set to True.
+        prefilters: Optional[Sequence[Prefilter]]
+            Heuristics that make a judgment locally instead of asking the evaluator
+            when they are confident, e.g. DEFAULT_PREFILTERS from
+            tonic_validate.utils.prefilter. The number of calls they avoid is in
+            run.stats.
+        cheap_model_evaluator: Optional[str]
+            A cheaper model that judges first. The model_evaluator is only asked when
+            the cheap model's response is unparseable or ambiguous, or for audits. See
+            CascadeLLMService.
+        audit_rate: float
+            The fraction of the cheap model's usable responses that are also judged by
+            the model_evaluator, to measure how often the two agree.
+        metric_evaluators: Optional[Dict[str, Union[str, Any]]]
+            Maps metric names to the model, or the service, that scores them instead
+            of model_evaluator, e.g. {"duplication_metric": "gpt-4o-mini"}. Each model
+            gets its own service, with its own cache and retries, and the metrics of
+            different services are scored concurrently, each service with its own
+            parallelism.
+        plan_prompts: bool
+            If True, the prompts of every item are planned before any of them is sent:
+            identical prompts are sent once per run, prompts that share a prefix are
+            sent one after the other and up to parallelism prompts are sent at once,
+            rather than up to parallelism items scored at once. Every item is started
+            before any usage is recorded, so it can't be combined with max_tokens,
+            max_cost or max_run_time. See PlannedLLMService.
+        retry_budget: Optional[float]
+            The number of retries a run may send per request, on top of a few retries
+            it may always send, e.g. 0.2. Requests that fail once the budget is used
+            up are not retried, so that a failing provider can't stall a run with
+            retries. See RetryBudget.
+        circuit_breaker_error_rate: Optional[float]
+            If set, every service the scorer creates gets a circuit breaker that stops
+            sending requests once this fraction of its recent requests failed, e.g.
+            0.5, so that an outage of the provider fails the remaining calls right away
+            rather than after all of their retries. A probe request is sent every 30
+            seconds until the provider is back. See CircuitBreaker.
+        request_timeout: Optional[float]
+            The time in seconds after which a request of the services the scorer
+            creates is abandoned and retried.
+        hedge_requests: bool
+            If True, the services the scorer creates send a second request for
+            prompts whose first request takes longer than 95% of the recent requests,
+            for at most 5% of the requests, and use whichever response comes first.
+            See RequestHedger.
+        service_registry: Optional[ServiceRegistry]
+            If set, the services the scorer creates share their connections, caches,
+            circuit breakers and hedgers with the registry's other services of the same
+            model, e.g. those of other scorers, and the synchronous methods run on the
+            registry's event loop. See ServiceRegistry.
+        clock: Callable[[], float]
+            Returns the current time in seconds. max_run_time is measured with it.
         """
+        if plan_prompts and (
+            max_tokens is not None or max_cost is not None or max_run_time is not None
+        ):
+            raise ValueError(
+                "max_tokens, max_cost and max_run_time can't limit a run with "
+                "plan_prompts=True, since every item is started before any usage is "
+                "recorded"
+            )
         self.metrics = metrics
         self.model_evaluator = model_evaluator
         self.max_parsing_retries = max_parsing_retries
         self.max_llm_retries = max_llm_retries
         self.fail_on_error = fail_on_error
         self.quiet = quiet
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        self.max_run_time = max_run_time
+        self.clock = clock
+        self.prefilters = prefilters or ()
+        self.plan_prompts = plan_prompts
+        self.retry_budget = retry_budget
+        self.circuit_breaker_error_rate = circuit_breaker_error_rate
+        self.request_timeout = request_timeout
+        self.hedge_requests = hedge_requests
+        self.service_registry = service_registry
         self.telemetry = Telemetry()
+        # The event loop that the synchronous methods run on. The registry's loop is
+        # stopped by the registry, since the other scorers of the registry use it too.
+        if service_registry is not None:
+            self._runner = service_registry.runner
+        else:
+            self._runner = EventLoopRunner()
+            weakref.finalize(self, self._runner.close)
         logger.setLevel(logging.ERROR if quiet else logging.INFO)
 
-        try:
-            self.encoder = tiktoken.encoding_for_model(model_evaluator)
-        except Exception as _:
-            logger.info("Defaulting to cl100k_base for measuring token count")
-            self.encoder = tiktoken.get_encoding("cl100k_base")
-
-        model_name_lower = self.model_evaluator.lower()
-        if (
-            model_name_lower.startswith("gemini")
-            or model_name_lower.startswith("claude")
-            or model_name_lower.startswith("command")
-            or model_name_lower.startswith("mistral")
-            or model_name_lower.startswith("together_ai")
-            or model_name_lower.startswith("bedrock")
-            or model_name_lower.startswith("sagemaker")
-        ):
-            self.llm_service = LiteLLMService(
-                self.encoder,
+        if llm_service is not None:
+            self.llm_service = llm_service
+            self.encoder = getattr(llm_service, "encoder", None)
+        else:
+            self.llm_service = self.__create_llm_service(
                 self.model_evaluator,
-                max_retries=self.max_llm_retries,
                 model_id=model_id,
+                context_length_policy=context_length_policy,
+                context_window=context_window,
             )
-        else:
-            self.llm_service = OpenAIService(
-                self.encoder, self.model_evaluator, max_retries=self.max_llm_retries
+            self.encoder = self.llm_service.encoder
+        if cheap_model_evaluator is not None:
+            from tonic_validate.services.cascade_llm_service import CascadeLLMService
+
+            cheap_service = self.__create_llm_service(
+                cheap_model_evaluator,
+                model_id=model_id,
+                context_length_policy=context_length_policy,
+            )
+            self.llm_service = CascadeLLMService(
+                cheap_service, self.llm_service, audit_rate=audit_rate
             )
 
-    @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
+        # The services of the metrics that don't use llm_service
+        self.metric_services: Dict[str, Any] = {}
+        services_by_model: Dict[str, Any] = {}
+        metric_names = {metric.name for metric in self.metrics}
+        for metric_name, evaluator in (metric_evaluators or {}).items():
+            if metric_name not in metric_names:
+                raise ValueError(f"The scorer has no metric named {metric_name}")
+            if isinstance(evaluator, str):
+                if evaluator not in services_by_model:
+                    services_by_model[evaluator] = self.__create_llm_service(
+                        evaluator,
+                        model_id=model_id,
+                        context_length_policy=context_length_policy,
+                    )
+                evaluator = services_by_model[evaluator]
+            self.metric_services[metric_name] = evaluator
+
+        if max_cost is not None:
+            for service in [self.llm_service, *self.metric_services.values()]:
+                if estimate_cost(service.model, 1, 1) is None:
+                    logger.warning(
+                        f"The price of {service.model} is not known, so max_cost "
+                        "will not limit its calls. Add it to "
+                        "model_info.MODEL_TOKEN_PRICES."
+                    )
+
+    def __create_llm_service(
+        self,
+        model_evaluator: str,
+        model_id: str,
+        context_length_policy: ContextLengthPolicy,
+        context_window: Optional[int] = None,
+    ) -> Any:
+        """Creates a service with the scorer's retries, circuit breaker, request
+        timeout and hedger, through the service registry if the scorer has one."""
+        if self.service_registry is not None:
+            return self.service_registry.create_llm_service(
+                model_evaluator,
+                max_retries=self.max_llm_retries,
+                model_id=model_id,
+                context_length_policy=context_length_policy,
+                context_window=context_window,
+                request_timeout=self.request_timeout,
+                circuit_breaker_error_rate=self.circuit_breaker_error_rate,
+                hedge_requests=self.hedge_requests,
+            )
+        return create_llm_service(
+            model_evaluator,
+            max_retries=self.max_llm_retries,
+            model_id=model_id,
+            context_length_policy=context_length_policy,
+            context_window=context_window,
+            circuit_breaker=(
+                CircuitBreaker(error_rate=self.circuit_breaker_error_rate)
+                if self.circuit_breaker_error_rate is not None
+                else None
+            ),
+            request_timeout=self.request_timeout,
+            hedger=RequestHedger() if self.hedge_requests else None,
+        )
+
+    def _metric_groups(self) -> List[Tuple[Any, List[tonic_metrics.Metric]]]:
+        """Groups the metrics by the service that scores them, in the metrics' order."""
+        groups: Dict[int, Tuple[Any, List[tonic_metrics.Metric]]] = {}
+        for metric in self.metrics:
+            llm_service = self.metric_services.get(metric.name, self.llm_service)
+            if id(llm_service) not in groups:
+                groups[id(llm_service)] = (llm_service, [])
+            groups[id(llm_service)][1].append(metric)
+        return list(groups.values()) or [(self.llm_service, [])]
+
     async def _score_item_rundata(
-        self, response: LLMResponse, semaphore: Semaphore
-    ) -> RunData:
+        self,
+        response: LLMResponse,
+        service_pools: List[ServicePool],
+        context_store: ContextStore,
+        item_index: int,
+        limits: RunLimits,
+    ) -> Optional[RunData]:
         """
         Calculates scores for a single LLMResponse object
 
@@ -119,56 +357,108 @@ class ValidateScorer:
         ----------
         response: LLMResponse
             The LLMResponse object to calculate scores for
+        service_pools: List[ServicePool]
+            The services of the metrics, the metrics each of them scores and the
+            semaphore that limits how many items the service scores at once
+        context_store: ContextStore
+            The store the context chunks of the item are added to
+        item_index: int
+            The index of the item in the run, used to attribute its LLM calls
+        limits: RunLimits
+            The run's budgets, checked before the item is scored
 
         Returns
         -------
-        RunData
-            Contains the scores and other data
+        Optional[RunData]
+            Contains the scores and other data, or None if the run reached a limit
+            before the item was scored
         """
-        async with semaphore:
-            scores: Dict[str, Union[float, None]] = {}
-            for metric in self.metrics:
-                tries = 0
-                exceptions = []
-                while tries < self.max_parsing_retries:
-                    try:
-                        scores[metric.name] = await metric.score(
-                            response, self.llm_service
-                        )
-                        break
-                    except LLMException as e:
-                        if self.fail_on_error:
-                            raise Exception("Error getting LLM response: " + str(e))
-                        scores[metric.name] = None
-                        logger.warning(
-                            f"Error getting LLM response. Setting score to None. {e}"
-                        )
-                        break
-                    except Exception as e:
-                        tries += 1
-                        logger.warning(
-                            f"Error calculating {metric.name}: {e}. Retrying..."
-                        )
-                        exceptions.append(e)
+        scores: Dict[str, Union[float, None]] = {}
+        started: Optional[bool] = None
 
-                if tries == self.max_parsing_retries:
-                    if self.fail_on_error:
-                        raise Exception(
-                            f"Error calculating metric {metric.name}: "
-                            + str(exceptions)
+        async def score_metrics(
+            llm_service: Any,
+            metrics: List[tonic_metrics.Metric],
+            semaphore: Semaphore,
+        ) -> None:
+            nonlocal started
+            async with semaphore:
+                # The limits are checked once the first service starts on the item,
+                # the other services then finish it
+                if started is None:
+                    started = limits.check() is None
+                if not started:
+                    return
+                # Each item is scored in its own task, so this only applies to its calls
+                current_item.set(item_index)
+                if isinstance(llm_service, StagedLLMService):
+                    with staged_branch():
+                        # Send the first prompts of every metric in the same stage
+                        metric_scores = await gather_staged(
+                            *[
+                                self.__score_metric(response, metric, llm_service)
+                                for metric in metrics
+                            ]
                         )
-                    scores[metric.name] = None
-                    logger.warning(
-                        f"Error calculating {metric.name}. Setting score to None."
+                    for metric, score in zip(metrics, metric_scores):
+                        scores[metric.name] = score
+                    return
+                for metric in metrics:
+                    scores[metric.name] = await self.__score_metric(
+                        response, metric, llm_service
                     )
-            benchmark_item = response.benchmark_item
-            return RunData(
-                scores=scores,
-                reference_question=benchmark_item.question,
-                reference_answer=benchmark_item.answer,
-                llm_answer=response.llm_answer,
-                llm_context=response.llm_context_list,
+
+        if len(service_pools) == 1:
+            await score_metrics(*service_pools[0])
+        else:
+            await asyncio.gather(*[score_metrics(*pool) for pool in service_pools])
+        if not started:
+            return None
+
+        benchmark_item = response.benchmark_item
+        # Every field comes from an already validated LLMResponse
+        return construct_without_validation(
+            RunData,
+            # In the order of the metrics, whichever service finished first
+            scores={metric.name: scores[metric.name] for metric in self.metrics},
+            reference_question=benchmark_item.question,
+            reference_answer=benchmark_item.answer,
+            llm_answer=response.llm_answer,
+            # Keep the ids of the stored chunks instead of a copy per item
+            llm_context=ContextList(
+                context_store.add_all(response.llm_context_list), context_store
+            ),
+            tags=response.tags,
+            metadata=response.metadata,
+        )
+
+    async def __score_metric(
+        self,
+        response: LLMResponse,
+        metric: tonic_metrics.Metric,
+        llm_service: Any,
+    ) -> Optional[float]:
+        """Scores one metric of an item.
+
+        Responses that can't be parsed were already asked for again by the call that
+        got them (see get_judgment_response), so a metric that still fails is not
+        scored again, which would repeat all of its calls.
+        """
+        current_metric.set(metric.name)
+        try:
+            return await metric.score(response, llm_service)
+        except LLMException as e:
+            if self.fail_on_error:
+                raise Exception("Error getting LLM response: " + str(e))
+            logger.warning(f"Error getting LLM response. Setting score to None. {e}")
+            return None
+        except Exception as e:
+            if self.fail_on_error:
+                raise Exception(f"Error calculating metric {metric.name}: " + str(e))
+            logger.warning(
+                f"Error calculating {metric.name}: {e}. Setting score to None."
             )
+            return None
 
     @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
     async def a_score_responses(
@@ -190,36 +480,123 @@ class ValidateScorer:
         Run
             The Run object containing the scores and other data.
         """
+        return await self._a_score_responses(responses, parallelism)
+
+    async def _a_score_responses(
+        self,
+        responses: List[LLMResponse],
+        parallelism: int,
+        run_start_time: Optional[float] = None,
+        sampler: Optional[SequentialSampler] = None,
+    ) -> Run:
+        """Unvalidated version of a_score_responses, for already validated input.
+
+        run_start_time is when the run started, if it started before scoring, e.g.
+        with callbacks. It is used for max_run_time. If a sampler is given, the items
+        are scored in the sampler's order until it says to stop.
+        """
         try:
             start_time = time.time()
         except Exception as _:
             start_time = -1
 
-        semaphore = Semaphore(parallelism)
-        tasks = [
-            self._score_item_rundata(response, semaphore) for response in responses
+        metric_groups = self._metric_groups()
+        if self.plan_prompts:
+            metric_groups = [
+                (
+                    llm_service
+                    if isinstance(llm_service, StagedLLMService)
+                    else PlannedLLMService(llm_service, max_concurrency=parallelism),
+                    metrics,
+                )
+                for llm_service, metrics in metric_groups
+            ]
+        staged_services = [
+            llm_service
+            for llm_service, _ in metric_groups
+            if isinstance(llm_service, StagedLLMService)
         ]
+        service_pools = [
+            (
+                llm_service,
+                metrics,
+                # A staged service sends the prompts of every item together
+                Semaphore(
+                    max(len(responses), 1)
+                    if isinstance(llm_service, StagedLLMService)
+                    else parallelism
+                ),
+            )
+            for llm_service, metrics in metric_groups
+        ]
+        context_store = ContextStore()
+        stats = RunStats()
+        limits = RunLimits(
+            stats,
+            max_tokens=self.max_tokens,
+            max_cost=self.max_cost,
+            max_run_time=self.max_run_time,
+            start_time=run_start_time,
+            clock=self.clock,
+        )
 
-        run_data: List[RunData] = await async_tqdm.gather(
-            *tasks,
-            total=len(tasks),
-            desc="Scoring responses",
-            disable=self.quiet,
+        # The tasks created by gather inherit the run's statistics
+        stats_token = current_run_stats.set(stats)
+        prefilters_token = active_prefilters.set(self.prefilters)
+        parse_attempts_token = parse_attempts.set(self.max_parsing_retries)
+        retry_budget = (
+            RetryBudget(ratio=self.retry_budget)
+            if self.retry_budget is not None
+            else None
         )
+        retry_budget_token = current_retry_budget.set(retry_budget)
 
-        # Used to calculate overall score
-        total_scores: DefaultDict[str, float] = defaultdict(float)
-        num_scores: DefaultDict[str, int] = defaultdict(int)
+        async def score_items() -> Tuple[List[Optional[RunData]], Optional[str]]:
+            if sampler is not None:
+                return await self.__sample_items(
+                    responses, sampler, service_pools, context_store, limits
+                )
+            await self.__prepare_metrics(responses, service_pools)
+            tasks = [
+                self._score_item_rundata(
+                    response, service_pools, context_store, item_index, limits
+                )
+                for item_index, response in enumerate(responses)
+            ]
+            scored_items = await async_tqdm.gather(
+                *tasks,
+                total=len(tasks),
+                desc="Scoring responses",
+                disable=self.quiet,
+            )
+            return scored_items, None
 
-        for item in run_data:
-            for metric_name, score in item.scores.items():
-                if score is not None:
-                    total_scores[metric_name] += score
-                    num_scores[metric_name] += 1
+        try:
+            if staged_services:
+                scored_items, sampling_reason = await run_staged(
+                    score_items(), staged_services
+                )
+            else:
+                scored_items, sampling_reason = await score_items()
+        finally:
+            current_run_stats.reset(stats_token)
+            active_prefilters.reset(prefilters_token)
+            parse_attempts.reset(parse_attempts_token)
+            current_retry_budget.reset(retry_budget_token)
+        if retry_budget is not None and retry_budget.denied > 0:
+            logger.warning(
+                f"The retry budget of the run was used up, {retry_budget.denied} "
+                "failed requests were not retried."
+            )
+        run_data = [item for item in scored_items if item is not None]
+        truncation_reason = limits.reason or sampling_reason
+        if truncation_reason is not None:
+            logger.warning(
+                f"Scored {len(run_data)} of {len(responses)} items. "
+                f"{truncation_reason}, so the remaining items were skipped."
+            )
 
-        overall_scores: Dict[str, float] = {
-            metric: total / num_scores[metric] for metric, total in total_scores.items()
-        }
+        overall_scores = calculate_overall_scores(score_columns(run_data))
         try:
             end_time = time.time()
             run_time = end_time - start_time
@@ -228,38 +605,267 @@ class ValidateScorer:
 
         try:
             self.telemetry.log_run(
-                len(responses), [metric.name for metric in self.metrics], run_time
+                len(run_data), [metric.name for metric in self.metrics], run_time
             )
         except Exception as _:
             pass
 
-        return Run(
+        return construct_without_validation(
+            Run,
             overall_scores=overall_scores,
             run_data=run_data,
             llm_evaluator=self.model_evaluator,
             id=None,
+            context_store=context_store,
+            stats=stats,
+            truncated=truncation_reason is not None,
+            truncation_reason=truncation_reason,
         )
 
+    async def __prepare_metrics(
+        self, responses: List[LLMResponse], service_pools: List[ServicePool]
+    ) -> None:
+        """Lets every metric work on the responses together before they are scored,
+        see Metric.prepare. A metric that fails to prepare scores its items one by
+        one."""
+
+        async def prepare(metric: tonic_metrics.Metric, llm_service: Any) -> None:
+            current_metric.set(metric.name)
+            try:
+                await metric.prepare(responses, llm_service)
+            except Exception as e:
+                if self.fail_on_error:
+                    raise Exception(f"Error preparing metric {metric.name}: " + str(e))
+                logger.warning(f"Error preparing {metric.name}: {e}")
+
+        await asyncio.gather(
+            *[
+                prepare(metric, llm_service)
+                for llm_service, metrics, _ in service_pools
+                for metric in metrics
+            ]
+        )
+
+    async def __sample_items(
+        self,
+        responses: List[LLMResponse],
+        sampler: SequentialSampler,
+        service_pools: List[ServicePool],
+        context_store: ContextStore,
+        limits: RunLimits,
+    ) -> Tuple[List[Optional[RunData]], Optional[str]]:
+        """
+        Scores batches of items in the sampler's order until it says to stop
+
+        Returns
+        -------
+        Tuple[List[Optional[RunData]], Optional[str]]
+            The scored items at their position in responses, None for items that
+            were not scored, and why sampling stopped before scoring every item
+        """
+        scored_items: List[Optional[RunData]] = [None] * len(responses)
+        with tqdm(
+            total=len(responses), desc="Sampling responses", disable=self.quiet
+        ) as progress:
+            while limits.reason is None:
+                batch = sampler.next_batch()
+                if not batch:
+                    return scored_items, None
+                await self.__prepare_metrics(
+                    [responses[item_index] for item_index in batch], service_pools
+                )
+                batch_items = await asyncio.gather(
+                    *[
+                        self._score_item_rundata(
+                            responses[item_index],
+                            service_pools,
+                            context_store,
+                            item_index,
+                            limits,
+                        )
+                        for item_index in batch
+                    ]
+                )
+                for item_index, item in zip(batch, batch_items):
+                    scored_items[item_index] = item
+                sampler.add(item for item in batch_items if item is not None)
+                progress.update(len(batch))
+
+                stop_reason = sampler.stop_reason()
+                if stop_reason is not None:
+                    if sampler.num_sampled < len(responses):
+                        return scored_items, stop_reason
+                    return scored_items, None
+        return scored_items, None
+
     @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
     def score_responses(
         self,
         responses: List[LLMResponse],
         parallelism: int = DEFAULT_PARALLELISM_SCORING,
     ) -> Run:
-        try:
-            asyncio.get_running_loop()
-            in_loop = True
-        except RuntimeError:
-            in_loop = False
-
-        if in_loop:
-            # Hack to get asyncio.run to work inside juptyer notebooks
-            with ThreadPoolExecutor(1) as executor:
-                return executor.submit(
-                    asyncio.run, self.a_score_responses(responses, parallelism)
-                ).result()
-        else:
-            return asyncio.run(self.a_score_responses(responses, parallelism))
+        """Calculate metric scores for a list of LLMResponse objects.
+
+        Parameters
+        ----------
+        responses: List[LLMResponse]
+            The list of LLMResponse objects to be scored.
+        parallelism: int
+            The number of threads to use for scoring.
+
+        Returns
+        -------
+        Run
+            The Run object containing the scores and other data.
+        """
+        return self._score_responses(responses, parallelism)
+
+    def _score_responses(
+        self,
+        responses: List[LLMResponse],
+        parallelism: int,
+        run_start_time: Optional[float] = None,
+    ) -> Run:
+        """Unvalidated version of score_responses, for already validated input."""
+        return self._run_sync(
+            self._a_score_responses(responses, parallelism, run_start_time)
+        )
+
+    def _run_sync(self, coroutine: Coroutine[Any, Any, Run]) -> Run:
+        """Runs a coroutine to completion from synchronous code.
+
+        Every call runs on the scorer's background event loop, also inside a running
+        loop such as a Jupyter notebook's, so that the connections of the evaluator
+        services are reused between runs.
+        """
+        return self._runner.run(coroutine)
+
+    def close(self) -> None:
+        """Stops the background event loop of the synchronous methods, unless it is
+        the loop of the scorer's service registry.
+
+        The scorer can still be used, and starts the loop again when it needs it.
+        """
+        if self.service_registry is None:
+            self._runner.close()
+
+    @staticmethod
+    def __sampler(
+        responses: List[LLMResponse],
+        target_ci_width: Optional[float],
+        baseline: Optional[Run],
+        baseline_tolerance: float,
+        confidence: float,
+        batch_size: int,
+        min_items: int,
+        seed: Optional[int],
+    ) -> SequentialSampler:
+        """Creates the sampler of sample_responses and a_sample_responses."""
+        return SequentialSampler(
+            len(responses),
+            target_ci_width=target_ci_width,
+            baseline_scores=None if baseline is None else baseline.overall_scores,
+            baseline_tolerance=baseline_tolerance,
+            confidence=confidence,
+            batch_size=batch_size,
+            min_items=min_items,
+            seed=seed,
+        )
+
+    @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
+    async def a_sample_responses(
+        self,
+        responses: List[LLMResponse],
+        target_ci_width: Optional[float] = None,
+        baseline: Optional[Run] = None,
+        baseline_tolerance: float = 0.0,
+        confidence: float = DEFAULT_CONFIDENCE,
+        batch_size: int = DEFAULT_SAMPLING_BATCH_SIZE,
+        min_items: int = DEFAULT_MIN_SAMPLED_ITEMS,
+        seed: Optional[int] = None,
+        parallelism: int = DEFAULT_PARALLELISM_SCORING,
+    ) -> Run:
+        """Estimate the overall scores of a list of LLMResponse objects by scoring a
+        random sample of them.
+
+        Items are scored in random order, in batches. After each batch, the confidence
+        interval of each metric's mean is updated, and scoring stops once every
+        interval is narrower than target_ci_width, or once the comparison of every
+        metric with the baseline run is decided. If the run stops early, it is marked
+        as truncated and its overall scores are estimates from the scored items.
+
+        Parameters
+        ----------
+        responses: List[LLMResponse]
+            The list of LLMResponse objects to be sampled.
+        target_ci_width: Optional[float]
+            Stop once every metric's confidence interval is at most this wide.
+        baseline: Optional[Run]
+            Stop once every metric's score is known to differ from the baseline run's
+            overall score, or to be within baseline_tolerance of it.
+        baseline_tolerance: float
+            How far from the baseline score a metric may be to count as matching it.
+        confidence: float
+            The confidence level of the decision to stop, between 0 and 1. Since the
+            intervals are checked after every batch, each check uses a higher level,
+            see SequentialSampler.
+        batch_size: int
+            The number of items scored between checks.
+        min_items: int
+            The minimum number of items to score.
+        seed: Optional[int]
+            Seed for the random order of the items.
+        parallelism: int
+            The number of threads to use for scoring.
+
+        Returns
+        -------
+        Run
+            The Run object containing the scores of the sampled items.
+        """
+        sampler = self.__sampler(
+            responses,
+            target_ci_width,
+            baseline,
+            baseline_tolerance,
+            confidence,
+            batch_size,
+            min_items,
+            seed,
+        )
+        return await self._a_score_responses(responses, parallelism, sampler=sampler)
+
+    @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
+    def sample_responses(
+        self,
+        responses: List[LLMResponse],
+        target_ci_width: Optional[float] = None,
+        baseline: Optional[Run] = None,
+        baseline_tolerance: float = 0.0,
+        confidence: float = DEFAULT_CONFIDENCE,
+        batch_size: int = DEFAULT_SAMPLING_BATCH_SIZE,
+        min_items: int = DEFAULT_MIN_SAMPLED_ITEMS,
+        seed: Optional[int] = None,
+        parallelism: int = DEFAULT_PARALLELISM_SCORING,
+    ) -> Run:
+        """Estimate the overall scores of a list of LLMResponse objects by scoring a
+        random sample of them.
+
+        See a_sample_responses for a description of the parameters.
+        """
+        sampler = self.__sampler(
+            responses,
+            target_ci_width,
+            baseline,
+            baseline_tolerance,
+            confidence,
+            batch_size,
+            min_items,
+            seed,
+        )
+        return self._run_sync(
+            self._a_score_responses(responses, parallelism, sampler=sampler)
+        )
 
     # TODO: For backwards compatibility, remove in the future
     @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
@@ -271,7 +877,7 @@ class ValidateScorer:
         """
         Alias for score_responses. Used for backward compatibility
         """
-        return self.score_responses(responses, parallelism)
+        return self._score_responses(responses, parallelism)
 
     @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
     async def a_score(
@@ -299,18 +905,23 @@ class ValidateScorer:
         Run
             The Run object containing the scores and other data.
         """
-
+        limits = self.__callback_limits()
         semaphore = Semaphore(callback_parallelism)
 
-        async def create_response(item: BenchmarkItem) -> LLMResponse:
+        async def create_response(item: BenchmarkItem) -> Optional[LLMResponse]:
             async with semaphore:
+                if limits.time_limit_reached() is not None:
+                    return None
                 # Time the callback
                 start_time = time.time()
-                callback_response = await callback(item.question)
-                CallbackValidator.validate_python(callback_response)
+                callback_response = CallbackValidator.validate_python(
+                    await callback(item.question)
+                )
                 end_time = time.time()
                 run_time = end_time - start_time
-                return LLMResponse(
+                # The callback response was validated and coerced above
+                return construct_without_validation(
+                    LLMResponse,
                     llm_answer=callback_response["llm_answer"],
                     llm_context_list=callback_response["llm_context_list"],
                     benchmark_item=item,
@@ -318,14 +929,19 @@ class ValidateScorer:
                 )
 
         tasks = [create_response(item) for item in benchmark.items]
-        responses: List[LLMResponse] = await async_tqdm.gather(
-            *tasks,
-            total=len(tasks),
-            desc="Retrieving responses",
-            disable=self.quiet,
+        responses = self.__retrieved_responses(
+            await async_tqdm.gather(
+                *tasks,
+                total=len(tasks),
+                desc="Retrieving responses",
+                disable=self.quiet,
+            ),
+            limits,
         )
 
-        return await self.a_score_responses(responses, scoring_parallelism)
+        return await self._a_score_responses(
+            responses, scoring_parallelism, limits.start_time
+        )
 
     @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
     def score(
@@ -353,17 +969,22 @@ class ValidateScorer:
         Run
             The Run object containing the scores and other data.
         """
-        responses: List[LLMResponse] = []
+        limits = self.__callback_limits()
 
-        def create_response(item: BenchmarkItem) -> LLMResponse:
+        def create_response(item: BenchmarkItem) -> Optional[LLMResponse]:
+            if limits.time_limit_reached() is not None:
+                return None
             # Time the callback
             start_time = time.time()
-            callback_response = callback(item.question)
             # Validate type of callback_response
-            CallbackValidator.validate_python(callback_response)
+            callback_response = CallbackValidator.validate_python(
+                callback(item.question)
+            )
             end_time = time.time()
             run_time = end_time - start_time
-            return LLMResponse(
+            # The callback response was validated and coerced above
+            return construct_without_validation(
+                LLMResponse,
                 llm_answer=callback_response["llm_answer"],
                 llm_context_list=callback_response["llm_context_list"],
                 benchmark_item=item,
@@ -371,16 +992,42 @@ class ValidateScorer:
             )
 
         with ThreadPoolExecutor(max_workers=callback_parallelism) as executor:
-            responses = list(
+            responses = self.__retrieved_responses(
                 tqdm(
                     executor.map(create_response, benchmark.items),
                     total=len(benchmark.items),
                     desc="Retrieving responses",
                     disable=self.quiet,
-                )
+                ),
+                limits,
             )
 
-        return self.score_responses(responses, scoring_parallelism)
+        return self._score_responses(responses, scoring_parallelism, limits.start_time)
+
+    def __callback_limits(self) -> RunLimits:
+        """The limits checked before each callback of score and a_score. Only the time
+        limit applies, since the callbacks make no evaluator calls."""
+        return RunLimits(RunStats(), max_run_time=self.max_run_time, clock=self.clock)
+
+    @staticmethod
+    def __retrieved_responses(
+        responses: Iterable[Optional[LLMResponse]], limits: RunLimits
+    ) -> List[LLMResponse]:
+        """The responses of the callbacks that ran before the time limit was
+        reached."""
+        retrieved: List[LLMResponse] = []
+        num_items = 0
+        for response in responses:
+            num_items += 1
+            if response is not None:
+                retrieved.append(response)
+        if len(retrieved) < num_items:
+            logger.warning(
+                f"Retrieved {len(retrieved)} of {num_items} responses. "
+                f"{limits.time_limit_reached()}, so the remaining callbacks were "
+                "skipped."
+            )
+        return retrieved
 
     @staticmethod
     def metric_config_to_list(config: Dict[str, Dict[str, Any]]):